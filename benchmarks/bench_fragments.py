@@ -0,0 +1,109 @@
+"""
+1クリックあたりのサーバー側の時間を、「アプリ全体をリラン」と「部品（st.fragment）だけリラン」でくらべる
+
+streamlit.testing の AppTest で、学習者がよくやる操作を順番に行う。
+
+  ステージ1  写したコードの「できたかチェック」・「▶ 実行してみる」・3択を選ぶ・「解答する」
+  チャット    話しかけて「送信」（MINARIA_PROVIDER=local のダミーの返事）
+  BGM         音量スライダーを動かす
+
+  full      操作1回ぶんの AppTest.run()（スクリプト全体。st.fragment にする前はどの操作でもこれだった）
+  fragment  同じ操作で動いた部品の関数の秒数（minaria_app.py の @fragment が記録する ui.*）
+
+AppTest はいつも全体をリランするので、fragment の列は部品の中身にかかった時間だけで、
+Streamlit 自身の部品リランの手間（数ms）はふくまない。
+
+  python -m benchmarks.bench_fragments          # 5周
+  python -m benchmarks.bench_fragments -n 20
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+APP = ROOT / "minaria_app.py"
+
+# 本物の進みぐあいと OpenAI にはさわらない
+os.environ.setdefault("MINARIA_PROGRESS_DB", str(pathlib.Path(tempfile.mkdtemp()) / "bench_fragments.sqlite3"))
+os.environ.setdefault("MINARIA_PROVIDER", "local")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from minaria.metrics import get_metrics  # noqa: E402
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def _timed(at, action) -> float:
+    action()
+    started = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        raise SystemExit(f"アプリでエラー: {at.exception[0].value}")
+    return elapsed
+
+
+def _last(fragment: str) -> float:
+    return get_metrics().snapshot()["series"][f"ui.{fragment}"]["last"]
+
+
+def _round(results: dict) -> None:
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.run()
+    session = at.session_state["minaria"]
+
+    def record(label, fragment, action):
+        full = _timed(at, action)
+        results.setdefault(label, ([], [], fragment))
+        results[label][0].append(full)
+        results[label][1].append(_last(fragment))
+
+    session.page = "stage1"
+    at.run()
+    _button(at, "🌱 はじめる").click()
+    at.run()
+    at.text_area[0].input('print("Hello, world!")')
+    record("できたかチェック", "stage_step", _button(at, "できたかチェック").click)
+    record("▶ 実行してみる", "stage_step", _button(at, "▶ 実行してみる").click)
+    _button(at, "▶ クイズに進む").click()
+    at.run()
+    record("3択を選ぶ", "stage_step", lambda: at.radio[0].set_value(at.radio[0].options[1]))
+    record("解答する", "stage_step", _button(at, "解答する").click)
+
+    session.page = "chat"
+    at.run()
+    at.text_input[0].input("こんにちは")
+    record("チャット送信", "chat", _button(at, "送信").click)
+
+    record("BGMの音量", "bgm", lambda: at.sidebar.slider[0].set_value(0.3))
+
+
+def _ms(values) -> str:
+    ordered = sorted(values)
+    p95 = ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)]
+    return f"p50={statistics.median(values) * 1000:7.2f}ms p95={p95 * 1000:7.2f}ms"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    _round({})  # 1周目は import や問題バンクの読みこみがあるので数えない
+    results = {}
+    for _ in range(args.rounds):
+        _round(results)
+
+    for label, (full, fragment, name) in results.items():
+        print(f"{label:12s} full {_ms(full)} | fragment({name:10s}) {_ms(fragment)}")
+
+
+if __name__ == "__main__":
+    main()
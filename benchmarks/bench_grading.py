@@ -0,0 +1,70 @@
+"""
+答えの判定（minaria.grading）の速さを測る
+
+問題バンクの正解（copy_sample / rewrite_answer）それぞれに、正解・書きかたちがい・まちがいの
+答えを何回も判定して、1回あたりの時間を出す。
+
+  cached    問題バンクを読むときに作っておいた ExpectedAnswer で判定する（アプリと同じ）
+  uncached  判定のたびに正解の構文木も作りなおす（キャッシュしなかったらこうなる）
+
+  python -m benchmarks.bench_grading            # 各2000回
+  python -m benchmarks.bench_grading -n 10000
+"""
+import argparse
+import statistics
+import time
+
+from minaria.grading import ExpectedAnswer
+from minaria.progress_store import STAGES
+from minaria.question_bank import get_question_bank
+
+
+def _variants(source: str) -> list:
+    return [
+        source,                                   # そのまま
+        source.replace('"', "'"),                 # クォートちがい
+        source.replace("(", "( ").replace(")", " )"),  # 空白ちがい
+        source.replace("print", "prnt"),          # まちがい
+        source + "(",                             # 文法エラー
+    ]
+
+
+def _measure(grade, cases, rounds: int) -> list:
+    seconds = []
+    for i in range(rounds):
+        answer, submission = cases[i % len(cases)]
+        started = time.perf_counter()
+        grade(answer, submission)
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+
+def _summary(label: str, seconds: list) -> None:
+    ordered = sorted(seconds)
+    p95 = ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)]
+    print(f"{label:9s} mean={statistics.mean(seconds) * 1e6:7.1f}µs p50={statistics.median(seconds) * 1e6:7.1f}µs "
+          f"p95={p95 * 1e6:7.1f}µs max={ordered[-1] * 1e6:7.1f}µs")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rounds", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    cases = []
+    for stage in STAGES:
+        for answers in get_question_bank(stage).answers:
+            for answer in answers.values():
+                cases.extend((answer, submission) for submission in _variants(answer.source))
+    if not cases:
+        raise SystemExit("判定する正解がありません（content/ に copy_sample / rewrite_answer のある問題がない）")
+    print(f"{len(cases)} 件の答え（正解 {len(cases) // 5} 個 × 5 とおり）")
+
+    _summary("cached", _measure(lambda answer, code: answer.matches(code), cases, args.rounds))
+    _summary("uncached", _measure(
+        lambda answer, code: ExpectedAnswer(answer.source, answer.rules).matches(code), cases, args.rounds
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+起動の速さ（コールドスタート）を測る
+
+openai を使うときまで import しないようにしたので、その効果を見る。
+毎回まっさらな Python プロセスで
+
+  openai        import openai だけにかかる時間（前は起動のたびに払っていた）
+  app (lazy)    いまのアプリでホーム画面を1回描くまで
+  app (eager)   先に import openai してからホーム画面を描くまで（前の起動のしかた）
+
+を測り、ホーム画面のあとで openai が読みこまれているかも表示する。
+
+  python -m benchmarks.bench_import            # 各5回
+  python -m benchmarks.bench_import -n 10
+"""
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+# 本物の進みぐあいにはさわらない（子プロセスのアプリもこの環境変数を受けつぐ）
+os.environ.setdefault("MINARIA_PROGRESS_DB", str(pathlib.Path(tempfile.mkdtemp()) / "bench_import.sqlite3"))
+
+_IMPORT_ONLY = """
+import json, sys, time
+t = time.perf_counter()
+import openai
+print(json.dumps({"seconds": time.perf_counter() - t, "openai": True}))
+"""
+
+_APP_FIRST_RUN = """
+import json, sys, time
+t = time.perf_counter()
+if {eager!r}:
+    import openai
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+if at.exception:
+    raise SystemExit(at.exception[0].value)
+print(json.dumps({{"seconds": time.perf_counter() - t, "openai": "openai" in sys.modules}}))
+"""
+
+
+def _run(code: str) -> dict:
+    env = dict(os.environ, MINARIA_PROGRESS_DB=os.environ["MINARIA_PROGRESS_DB"])
+    # AI なし（お休みモード）でも起動できることも一緒に確かめる
+    env.pop("OPENAI_API_KEY", None)
+    env.pop("MINARIA_PROVIDER", None)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app = str(BASE_DIR / "minaria_app.py")
+    cases = [
+        ("openai", _IMPORT_ONLY),
+        ("app (lazy)", _APP_FIRST_RUN.format(eager=False, app=app)),
+        ("app (eager)", _APP_FIRST_RUN.format(eager=True, app=app)),
+    ]
+    for label, code in cases:
+        results = [_run(code) for _ in range(args.rounds)]
+        seconds = [r["seconds"] for r in results]
+        print(
+            f"{label:12s} mean={statistics.mean(seconds):.3f}s min={min(seconds):.3f}s "
+            f"openai読みこみ={'あり' if results[-1]['openai'] else 'なし'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
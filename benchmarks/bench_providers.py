@@ -0,0 +1,120 @@
+"""
+ローカルのダミー（MINARIA_PROVIDER=local）で、チャットとボイスの速さを測る
+
+  python -m benchmarks.bench_providers                 # 既定の待ち時間
+  python -m benchmarks.bench_providers --latency 0.8 --tts-latency 1.2 -n 10
+
+測るもの
+  chat   チャットページで「送信」したときの 最初の文字まで(TTFT) / 全体 / 1回のリランにかかった時間
+         （streamlit.testing の AppTest で本物のページを動かす）
+  speak  speak_minaria の2つの方法での「声が出るまで」
+           blocking  言い換えを全部待つ → 音声化を全部待つ
+           stream    1文できたところから順に音声化（minaria.voice_stream）
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import tempfile
+import time
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+# 本物の進みぐあいにはさわらない（送信のたびに XP が保存される）
+os.environ.setdefault("MINARIA_PROGRESS_DB", str(pathlib.Path(tempfile.mkdtemp()) / "bench_providers.sqlite3"))
+
+SPEAK_TEXTS = [
+    "ヒント：print のあとには () をつけて、その中に表示したいものを書くよ。文字のときは \" でかこもうね。",
+    "正解！ よくできました。つぎの問題もいっしょにがんばろう！",
+    "for 文は、くりかえしたいことを何回でもやってくれる魔法だよ。range の数だけまわるんだ。",
+]
+
+
+def _summary(values) -> str:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return "n=0"
+    p95 = values[min(int(0.95 * len(values)), len(values) - 1)]
+    return f"n={len(values)} mean={statistics.mean(values):.3f}s p50={statistics.median(values):.3f}s p95={p95:.3f}s"
+
+
+def bench_chat(rounds: int) -> None:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(BASE_DIR / "minaria_app.py"), default_timeout=120)
+    at.run()
+    at.session_state["minaria"].page = "chat"
+    at.run()
+
+    run_times = []
+    for i in range(rounds):
+        at.text_input[0].input(f"きょうは {i} 回目のおしゃべりだよ。Python のことを教えて！")
+        button = next(b for b in at.button if b.label == "送信")
+        started = time.perf_counter()
+        button.click()
+        at.run()
+        run_times.append(time.perf_counter() - started)
+        if at.exception:
+            raise SystemExit(at.exception[0].value)
+
+    replies = at.session_state["minaria"].chat.metrics
+    print("chat")
+    print(f"  ttft   {_summary(r['ttft'] for r in replies)}")
+    print(f"  total  {_summary(r['total'] for r in replies)}")
+    print(f"  rerun  {_summary(run_times)}")
+
+
+def bench_speak(rounds: int) -> None:
+    from minaria.providers import LocalProvider
+    from minaria.voice_stream import stream_speech
+
+    provider = LocalProvider()
+    model, prompt, tts_model, voice = "gpt-4o-mini", "（ベンチマーク）", "gpt-4o-mini-tts", "alloy"
+
+    blocking, streaming = [], []
+    for i in range(rounds):
+        text = SPEAK_TEXTS[i % len(SPEAK_TEXTS)]
+
+        started = time.perf_counter()
+        rewrite = provider.complete_text(model, [{"role": "system", "content": prompt}, {"role": "user", "content": text}])
+        provider.synthesize(rewrite, tts_model, voice)
+        blocking.append(time.perf_counter() - started)
+
+        _speech, first_audio = stream_speech(
+            provider, text, rewrite_model=model, prompt=prompt, tts_model=tts_model, voice=voice,
+            on_audio=lambda audio, mime: None,
+        )
+        streaming.append(first_audio)
+
+    print("speak（声が出るまで）")
+    print(f"  blocking  {_summary(blocking)}")
+    print(f"  stream    {_summary(streaming)}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("what", nargs="?", choices=["chat", "speak", "all"], default="all")
+    parser.add_argument("-n", "--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, help="最初の文字までの待ち（秒）")
+    parser.add_argument("--token-delay", type=float, help="文字のかたまりごとの待ち（秒）")
+    parser.add_argument("--tts-latency", type=float, help="音声化1回の待ち（秒）")
+    args = parser.parse_args(argv)
+
+    # アプリ側（AppTest）も同じダミーを使うよう、環境変数で渡す
+    os.environ["MINARIA_PROVIDER"] = "local"
+    for name, value in (
+        ("MINARIA_LOCAL_LATENCY", args.latency),
+        ("MINARIA_LOCAL_TOKEN_DELAY", args.token_delay),
+        ("MINARIA_LOCAL_TTS_LATENCY", args.tts_latency),
+    ):
+        if value is not None:
+            os.environ[name] = str(value)
+
+    if args.what in ("chat", "all"):
+        bench_chat(args.rounds)
+    if args.what in ("speak", "all"):
+        bench_speak(args.rounds)
+
+
+if __name__ == "__main__":
+    main()
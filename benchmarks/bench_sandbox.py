@@ -0,0 +1,72 @@
+"""
+「▶ 実行してみる」の速さを測る
+
+  pool     先に起動しておいたワーカー（minaria.sandbox）で動かす
+  fresh    1回ごとに新しい Python を起動して動かす（プールがなかったらこうなる）
+
+どちらも学習者が書きそうなコード（print / for / if）を順番に動かし、
+1回あたりの秒数と、プールのメトリクス（sandbox.*）を表示する。
+
+  python -m benchmarks.bench_sandbox            # 各200回
+  python -m benchmarks.bench_sandbox -n 50 --workers 4
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from minaria.metrics import get_metrics
+from minaria.sandbox import SandboxPool
+
+SAMPLES = (
+    'print("Hello, world!")',
+    'name = "Minaria"\nprint(name)',
+    "print(3 + 5)",
+    "for i in range(1, 4):\n    print(i)",
+    'score = 85\nif score >= 80:\n    print("Great!")',
+)
+
+
+def _summary(label: str, seconds: list) -> None:
+    ordered = sorted(seconds)
+    p95 = ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)]
+    print(f"{label:6s} mean={statistics.mean(seconds) * 1000:.2f}ms p50={statistics.median(seconds) * 1000:.2f}ms "
+          f"p95={p95 * 1000:.2f}ms")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rounds", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    pool = SandboxPool(size=args.workers)
+    pool.run("pass")  # 起動を待つ
+    seconds = []
+    for i in range(args.rounds):
+        started = time.perf_counter()
+        result = pool.run(SAMPLES[i % len(SAMPLES)])
+        seconds.append(time.perf_counter() - started)
+        assert result.ok, result
+    _summary("pool", seconds)
+
+    seconds = []
+    for i in range(max(1, args.rounds // 10)):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-I", "-S", "-c", SAMPLES[i % len(SAMPLES)]],
+                       capture_output=True, check=True)
+        seconds.append(time.perf_counter() - started)
+    _summary("fresh", seconds)
+
+    snapshot = get_metrics().snapshot()
+    for name in ("sandbox.run", "sandbox.wait"):
+        summary = snapshot["series"].get(name, {})
+        if summary.get("count"):
+            print(f"{name}: count={summary['count']} p50={summary['p50'] * 1000:.2f}ms p95={summary['p95'] * 1000:.2f}ms")
+    print("gauges:", {k: v for k, v in snapshot["gauges"].items() if k.startswith("sandbox.")})
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""ミナリアのPythonクエスト 用の補助モジュール群"""
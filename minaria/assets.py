@@ -0,0 +1,176 @@
+"""
+アプリが使う画像・音・動画の一覧（asset manifest）
+
+これまでは描画のたびに os.path.exists や Path.exists() で1つずつ確かめていて、
+ファイルがないことに気づくのは「その画面を開いたとき」だった
+（stage1_clear.mp4 はリポジトリにないので、ステージ1クリア画面で落ちていた）。
+
+ここではプロセス起動時に1回だけ、アプリから参照されている全アセットを集めて
+サイズ・sha256・MIMEタイプを調べておく。実行中の確認は dict を引くだけ。
+
+  python -m minaria.assets          # 一覧を表示。足りないファイルがあれば終了コード 1
+  python -m minaria.assets --json   # JSON で出力
+"""
+import ast
+import hashlib
+import json
+import mimetypes
+import pathlib
+import sys
+import threading
+from dataclasses import asdict, dataclass
+
+from minaria.question_bank import bank_files, read_bank_file
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent
+APP_SCRIPT = BASE_DIR / "minaria_app.py"
+PACKAGE_DIR = BASE_DIR / "minaria"
+
+# この拡張子で終わる文字列リテラルを「アセットへの参照」とみなす
+ASSET_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".mp3", ".m4a", ".ogg", ".wav", ".mp4", ".webm")
+
+
+@dataclass(frozen=True)
+class AssetInfo:
+    path: str        # リポジトリ直下からの相対パス
+    exists: bool
+    size: int = 0
+    sha256: str = ""
+    mime: str = ""
+
+
+def normalize(path) -> str:
+    """"./a.png" や絶対パスを、manifest のキー（相対パス）にそろえる"""
+    p = pathlib.PurePath(path)
+    if p.is_absolute():
+        try:
+            return pathlib.Path(p).resolve().relative_to(BASE_DIR).as_posix()
+        except ValueError:
+            return str(path)
+    return p.as_posix().removeprefix("./")
+
+
+def _asset_ref(value):
+    value = value.strip()
+    if value.lower().endswith(ASSET_SUFFIXES) and "\n" not in value:
+        return normalize(value)
+    return None
+
+
+def _strings(obj):
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from _strings(value)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            yield from _strings(value)
+
+
+def app_sources() -> list:
+    """アセットを参照しているアプリのソース（本体・共通の部品・ステージの定義・ページごとのモジュール）"""
+    sources = [APP_SCRIPT, PACKAGE_DIR / "ui.py", PACKAGE_DIR / "stages.py"]
+    sources.extend(sorted((PACKAGE_DIR / "pages").glob("*.py")))
+    return [path for path in sources if path.is_file()]
+
+
+def collect_asset_refs(sources=None) -> set:
+    """アプリのソースと問題バンク（content/）から、アセットのパスらしい文字列を全部集める"""
+    values = []
+    for source in app_sources() if sources is None else sources:
+        tree = ast.parse(pathlib.Path(source).read_text(encoding="utf-8"))
+        values.extend(node.value for node in ast.walk(tree) if isinstance(node, ast.Constant) and isinstance(node.value, str))
+    for path in bank_files():
+        values.extend(_strings(read_bank_file(path)))
+    return {ref for ref in map(_asset_ref, values) if ref}
+
+
+def inspect_asset(rel: str) -> AssetInfo:
+    path = BASE_DIR / rel
+    if not path.is_file():
+        return AssetInfo(path=rel, exists=False)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    return AssetInfo(path=rel, exists=True, size=path.stat().st_size, sha256=h.hexdigest(), mime=mime)
+
+
+class AssetManifest:
+    """パス → AssetInfo の辞書。参照は O(1)。"""
+
+    def __init__(self, refs):
+        self._assets = {rel: inspect_asset(rel) for rel in sorted(refs)}
+        self._lock = threading.Lock()
+
+    def get(self, path) -> AssetInfo:
+        rel = normalize(path)
+        info = self._assets.get(rel)
+        if info is None:
+            # 一覧にない（動的に組み立てた）パスは、最初の1回だけ調べて覚えておく
+            with self._lock:
+                info = self._assets.setdefault(rel, inspect_asset(rel))
+        return info
+
+    def exists(self, path) -> bool:
+        return self.get(path).exists
+
+    def missing(self) -> list:
+        return [info.path for info in self._assets.values() if not info.exists]
+
+    def __iter__(self):
+        return iter(self._assets.values())
+
+    def __len__(self):
+        return len(self._assets)
+
+
+# ======================================================
+#  プロセス全体で1つだけの manifest
+# ======================================================
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_asset_manifest() -> AssetManifest:
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = AssetManifest(collect_asset_refs())
+    return _manifest
+
+
+def asset_exists(path) -> bool:
+    """アセットがあるかどうか（起動時に調べた結果を引くだけ）"""
+    return get_asset_manifest().exists(path)
+
+
+# ======================================================
+#  検証コマンド
+# ======================================================
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    manifest = AssetManifest(collect_asset_refs())
+
+    if "--json" in argv:
+        print(json.dumps([asdict(info) for info in manifest], ensure_ascii=False, indent=2))
+    else:
+        for info in manifest:
+            if info.exists:
+                print(f"  ok       {info.path}  ({info.size // 1024} KB, {info.mime}, {info.sha256[:12]})")
+            else:
+                print(f"  MISSING  {info.path}")
+
+    missing = manifest.missing()
+    if missing:
+        print(f"{len(missing)} missing asset(s): {', '.join(missing)}", file=sys.stderr)
+        return 1
+    print(f"{len(manifest)} assets ok", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+リランしても止まらない BGM プレイヤー（Streamlit カスタムコンポーネント）
+
+st.markdown で <audio> を埋め込むと、ボタンを押すたびに要素が作り直されて
+音源（base64）も毎回送られ、曲も頭から鳴り直してしまう。
+コンポーネントの iframe は key が同じならリランしても残るので、
+音源は最初の1回だけ渡し、そのあとは音量だけを小さなメッセージで届ける。
+"""
+import pathlib
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_COMPONENT_DIR = pathlib.Path(__file__).resolve().parent / "components" / "bgm"
+_bgm_component = components.declare_component("minaria_bgm", path=str(_COMPONENT_DIR))
+
+
+def bgm_player(track: str, volume: float, sources_factory, key: str = "minaria_bgm_player"):
+    """
+    BGM を鳴らす。
+    track           … 曲の識別子（パスなど）。変わると曲を切り替える
+    sources_factory … [(src, MIMEタイプ), ...] を返す関数。必要なときだけ呼ぶ
+                      （ブラウザが再生できる最初の1本を選ぶ）
+    """
+    # ブラウザ側がすでにこの曲を読み込んでいれば、音源は送らない
+    state = st.session_state.get(key)
+    loaded = isinstance(state, dict) and state.get("loaded") == track
+    sources = None if loaded else [{"src": src, "type": mime} for src, mime in sources_factory()]
+
+    vol = max(0.0, min(float(volume), 1.0))
+    _bgm_component(track=track, sources=sources, volume=vol, key=key, default=None)
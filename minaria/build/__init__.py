@@ -0,0 +1 @@
+"""アセットのビルド（python -m minaria.build ...）"""
@@ -0,0 +1,77 @@
+"""
+アセットのビルド
+
+  python -m minaria.build images            # 画像の軽量版
+  python -m minaria.build images --force    # 全部作り直す
+  python -m minaria.build videos            # 動画の low / mid 版とポスター（ffmpeg）
+  python -m minaria.build audio             # 音声の重複まとめ・音量そろえ・Opus / AAC 版（ffmpeg）
+  python -m minaria.build all               # ぜんぶ
+"""
+import argparse
+import sys
+
+
+def _csv(value: str):
+    return tuple(v.strip() for v in value.split(",") if v.strip())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m minaria.build", description="ミナリアのアセットをビルドする")
+    sub = parser.add_subparsers(dest="stage", required=True)
+
+    images = sub.add_parser("images", help="monster_*.png / minaria.png の軽量版をつくる")
+    images.add_argument("--widths", type=lambda v: tuple(int(w) for w in _csv(v)), default=None)
+    images.add_argument("--formats", type=_csv, default=None)
+    images.add_argument("--force", action="store_true", help="キャッシュを無視して作り直す")
+
+    videos = sub.add_parser("videos", help="*.mp4 の low / mid 版（mp4・webm）とポスターをつくる")
+    videos.add_argument("--qualities", type=_csv, default=None, help="low,mid")
+    videos.add_argument("--formats", type=_csv, default=None, help="mp4,webm")
+    videos.add_argument("--force", action="store_true", help="キャッシュを無視して作り直す")
+
+    audio = sub.add_parser("audio", help="*.mp3 の重複をまとめ、音量をそろえた Opus / AAC 版をつくる")
+    audio.add_argument("--formats", type=_csv, default=None, help="opus,aac")
+    audio.add_argument("--force", action="store_true", help="キャッシュを無視して作り直す")
+
+    everything = sub.add_parser("all", help="images / videos / audio をまとめて実行")
+    everything.add_argument("--force", action="store_true", help="キャッシュを無視して作り直す")
+
+    args = parser.parse_args(argv)
+    stages = ("images", "videos", "audio") if args.stage == "all" else (args.stage,)
+    options = vars(args) if args.stage != "all" else {"force": args.force}
+
+    for stage in stages:
+        _run_stage(stage, options)
+    return 0
+
+
+def _run_stage(stage: str, options: dict) -> None:
+    force = options.get("force", False)
+
+    if stage == "images":
+        from .images import DEFAULT_FORMATS, DEFAULT_WIDTHS, build_images
+
+        print("building images ...")
+        build_images(
+            widths=options.get("widths") or DEFAULT_WIDTHS,
+            formats=options.get("formats") or DEFAULT_FORMATS,
+            force=force,
+        )
+    elif stage == "videos":
+        from .videos import QUALITIES, build_videos
+
+        print("building videos ...")
+        build_videos(
+            qualities=options.get("qualities") or tuple(QUALITIES),
+            formats=options.get("formats") or ("mp4", "webm"),
+            force=force,
+        )
+    elif stage == "audio":
+        from .audio import FORMATS, build_audio
+
+        print("building audio ...")
+        build_audio(formats=options.get("formats") or tuple(FORMATS), force=force)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
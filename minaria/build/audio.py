@@ -0,0 +1,135 @@
+"""
+効果音・ボイス・BGM の軽量版（Opus / AAC）をつくる
+
+mp3 はリポジトリ直下と sounds/ に同じものが2つずつあり、
+30秒ほどのボイスが 1本 150〜260KB ある。ここでは
+  1. 中身の sha256 で重複をまとめ（同じ音は1回だけ変換）
+  2. ffmpeg の loudnorm で音量をそろえ
+  3. 低ビットレートの Opus（webm）と AAC（m4a）を作る
+実行時は minaria.renditions.resolve_audio() が manifest を見て選ぶ。
+"""
+import fnmatch
+import pathlib
+
+from .common import BASE_DIR, BUILD_DIR, MANIFEST_VERSION, file_sha256, prune, read_manifest, rel_path, run_ffmpeg, write_manifest
+
+AUDIO_DIR = BUILD_DIR / "audio"
+AUDIO_MANIFEST = AUDIO_DIR / "manifest.json"
+
+SOURCE_PATTERNS = ("*.mp3", "sounds/*.mp3")
+
+# 音の種類ごとの設定（loudness は LUFS、channels=None は元のまま）
+# BGM は元のチャンネル数のまま（ステレオをモノラルにまとめて聞こえかたを変えない）
+PROFILES = {
+    "voice": {"loudness": -16, "channels": 1, "opus": "16k", "aac": "32k"},
+    "sfx":   {"loudness": -16, "channels": None, "opus": "32k", "aac": "48k"},
+    "bgm":   {"loudness": -20, "channels": None, "opus": "24k", "aac": "40k"},
+}
+
+# ファイル名 → 種類（上から順に当てはめる）
+PROFILE_RULES = (
+    ("minaria_*.mp3", "voice"),
+    ("*_loop*.mp3", "bgm"),
+    ("*.mp3", "sfx"),
+)
+
+FORMATS = {
+    "opus": {"ext": ".webm", "mime": "audio/webm; codecs=opus", "codec": ["-c:a", "libopus", "-vbr", "on"]},
+    "aac":  {"ext": ".m4a", "mime": "audio/mp4", "codec": ["-c:a", "aac", "-movflags", "+faststart"]},
+}
+
+
+def find_sources():
+    sources = []
+    for pattern in SOURCE_PATTERNS:
+        sources.extend(sorted(BASE_DIR.glob(pattern)))
+    return sources
+
+
+def profile_for(path) -> str:
+    name = pathlib.Path(path).name
+    for pattern, profile in PROFILE_RULES:
+        if fnmatch.fnmatch(name, pattern):
+            return profile
+    return "sfx"
+
+
+def _settings_tag(profile: dict, fmt: str) -> str:
+    """ファイル名に入れる設定（"24k" / "16k-1ch"）。設定を変えたら前の版を使い回さない"""
+    channels = profile["channels"]
+    return profile[fmt] + (f"-{channels}ch" if channels else "")
+
+
+def _args(src, profile: dict, fmt: str) -> list:
+    return [
+        "-i", str(src),
+        "-vn",
+        "-af", f"loudnorm=I={profile['loudness']}:TP=-1.5:LRA=11",
+        "-ar", "48000",
+        *(["-ac", str(profile["channels"])] if profile["channels"] else []),
+        *FORMATS[fmt]["codec"],
+        "-b:a", profile[fmt],
+    ]
+
+
+def build_audio(sources=None, formats=tuple(FORMATS), force: bool = False) -> dict:
+    """音声の軽量版を作って manifest を書き出す。manifest の中身を返す。"""
+    AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+    full_build = sources is None
+    sources = find_sources() if sources is None else [pathlib.Path(s).resolve() for s in sources]
+
+    manifest = read_manifest(AUDIO_MANIFEST) if not full_build else {}
+    audio = manifest.get("audio", {})
+
+    # 1. 中身が同じファイルをまとめる
+    outputs = []
+    groups = {}
+    for src in sources:
+        groups.setdefault(file_sha256(src), []).append(src)
+
+    for digest, paths in groups.items():
+        src = paths[0]
+        profile_name = profile_for(src)
+        profile = PROFILES[profile_name]
+
+        renditions = []
+        for fmt in formats:
+            out = AUDIO_DIR / f"{digest[:12]}-{profile_name}-{_settings_tag(profile, fmt)}{FORMATS[fmt]['ext']}"
+            if force or not out.exists():
+                run_ffmpeg(_args(src, profile, fmt), out)
+            outputs.append(out)
+            if out.stat().st_size >= src.stat().st_size:
+                # ごく短い効果音などは、かえって大きくなるので元の mp3 を使う
+                continue
+            renditions.append({
+                "format": fmt,
+                "mime": FORMATS[fmt]["mime"],
+                "path": rel_path(out),
+                "bytes": out.stat().st_size,
+            })
+
+        # 2. 同じ中身のパスはすべて同じ軽量版を指す
+        for path in paths:
+            audio[rel_path(path)] = {
+                "sha256": digest,
+                "bytes": path.stat().st_size,
+                "profile": profile_name,
+                "renditions": renditions,
+            }
+
+        names = ", ".join(rel_path(p) for p in paths)
+        sizes = ", ".join(f"{r['format']} {r['bytes'] // 1024} KB" for r in renditions) or "(keep mp3)"
+        print(f"  [{profile_name}] {names}: {src.stat().st_size // 1024} KB -> {sizes}")
+
+    duplicates = sum(len(paths) - 1 for paths in groups.values())
+    if duplicates:
+        print(f"  {duplicates} duplicate file(s) share renditions")
+
+    manifest = {"version": MANIFEST_VERSION, "audio": audio}
+    write_manifest(AUDIO_MANIFEST, manifest)
+
+    if full_build:
+        removed = prune(AUDIO_DIR, outputs)
+        if removed:
+            print(f"  removed {removed} stale file(s)")
+    return manifest
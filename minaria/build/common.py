@@ -0,0 +1,85 @@
+"""
+アセットのビルド（画像・動画・音声の軽量版づくり）で共通に使う道具
+"""
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent.parent
+
+# 作ったファイルと manifest の置き場所（git には入れない）
+BUILD_DIR = pathlib.Path(os.getenv("MINARIA_BUILD_DIR", BASE_DIR / "build")).resolve()
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path) -> str:
+    """ファイルの sha256（大きなファイルでも少しずつ読む）"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def rel_path(path) -> str:
+    """リポジトリ直下からの相対パス（manifest のキーに使う）"""
+    return pathlib.Path(path).resolve().relative_to(BASE_DIR).as_posix()
+
+
+def read_manifest(path) -> dict:
+    """manifest を読む。なければ空の dict。"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(path, data: dict) -> None:
+    """manifest を書く（途中で落ちても壊れないよう、一時ファイル → 置き換え）"""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def prune(out_dir, keep) -> int:
+    """manifest から参照されていない古い生成物を消す。消した数を返す。"""
+    keep = {pathlib.Path(p).resolve() for p in keep}
+    removed = 0
+    for file in pathlib.Path(out_dir).iterdir():
+        if file.name == "manifest.json" or not file.is_file():
+            continue
+        if file.resolve() not in keep:
+            file.unlink()
+            removed += 1
+    return removed
+
+
+# ======================================================
+#  ffmpeg（packages.txt で入る。別の場所なら MINARIA_FFMPEG で指定）
+# ======================================================
+def ffmpeg_exe() -> str:
+    exe = os.getenv("MINARIA_FFMPEG") or shutil.which("ffmpeg")
+    if not exe:
+        raise SystemExit("ffmpeg が見つかりません。packages.txt の ffmpeg を入れるか MINARIA_FFMPEG を設定してください。")
+    return exe
+
+
+def run_ffmpeg(args, out_path) -> None:
+    """ffmpeg を実行して out_path を作る。失敗したら途中のファイルを残さない。"""
+    out_path = pathlib.Path(out_path)
+    tmp = out_path.with_name(out_path.stem + ".tmp" + out_path.suffix)
+    cmd = [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y", *args, str(tmp)]
+    try:
+        subprocess.run(cmd, check=True)
+    except (subprocess.CalledProcessError, KeyboardInterrupt):
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, out_path)
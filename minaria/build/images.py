@@ -0,0 +1,129 @@
+"""
+モンスター画像・ミナリア画像の軽量版（WebP / AVIF / JPEG）をつくる
+
+元の PNG は 1枚 0.7〜2MB あり、そのまま st.image に渡すと問題を開くたびに
+まるごと送られる。画面に出す幅（最大 700px くらい）に縮めた版を作っておき、
+実行時は minaria.renditions.resolve_image() がいちばん良いものを選ぶ。
+
+生成物のファイル名には元画像の sha256 を入れているので、
+元画像が変わらない限り作り直さない（--force で強制）。
+"""
+import pathlib
+
+from .common import BASE_DIR, BUILD_DIR, MANIFEST_VERSION, file_sha256, prune, read_manifest, rel_path, write_manifest
+
+IMAGE_DIR = BUILD_DIR / "images"
+IMAGE_MANIFEST = IMAGE_DIR / "manifest.json"
+
+SOURCE_PATTERNS = ("monster_*.png", "minaria.png")
+DEFAULT_WIDTHS = (360, 720, 1080)
+DEFAULT_FORMATS = ("webp", "avif", "jpeg")
+
+# 形式ごとの保存オプション
+SAVE_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "avif": {"format": "AVIF", "quality": 55},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+EXTENSIONS = {"webp": ".webp", "avif": ".avif", "jpeg": ".jpg"}
+
+# 透明部分は JPEG にできないので、アプリの背景色でぬりつぶす
+JPEG_BACKGROUND = (255, 255, 255)
+
+
+def find_sources():
+    sources = []
+    for pattern in SOURCE_PATTERNS:
+        sources.extend(sorted(BASE_DIR.glob(pattern)))
+    return sources
+
+
+def supported_formats(formats):
+    """この環境の Pillow で保存できる形式だけに絞る"""
+    from PIL import features
+
+    available = []
+    for fmt in formats:
+        if fmt == "avif" and not features.check("avif"):
+            try:
+                import pillow_avif  # noqa: F401  古い Pillow 用のプラグイン
+            except ImportError:
+                print("  (skip avif: this Pillow cannot write AVIF)")
+                continue
+        if fmt == "webp" and not features.check("webp"):
+            print("  (skip webp: this Pillow cannot write WebP)")
+            continue
+        available.append(fmt)
+    return available
+
+
+def _render(image, width: int, fmt: str, out_path: pathlib.Path) -> None:
+    from PIL import Image
+
+    height = round(image.height * width / image.width)
+    resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+    if fmt == "jpeg" and resized.mode in ("RGBA", "LA", "P"):
+        rgba = resized.convert("RGBA")
+        flat = Image.new("RGB", rgba.size, JPEG_BACKGROUND)
+        flat.paste(rgba, mask=rgba.getchannel("A"))
+        resized = flat
+
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    resized.save(tmp, **SAVE_OPTIONS[fmt])
+    tmp.replace(out_path)
+
+
+def build_images(sources=None, widths=DEFAULT_WIDTHS, formats=DEFAULT_FORMATS, force: bool = False) -> dict:
+    """軽量版をつくって manifest を書き出す。manifest の中身を返す。"""
+    from PIL import Image
+
+    IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+    formats = supported_formats(formats)
+    full_build = sources is None
+    sources = find_sources() if sources is None else [pathlib.Path(s).resolve() for s in sources]
+
+    manifest = read_manifest(IMAGE_MANIFEST) if not full_build else {}
+    images = manifest.get("images", {})
+
+    for src in sources:
+        key = rel_path(src)
+        digest = file_sha256(src)
+        with Image.open(src) as image:
+            image.load()
+            entry = {
+                "sha256": digest,
+                "bytes": src.stat().st_size,
+                "width": image.width,
+                "height": image.height,
+                "renditions": [],
+            }
+            # 元より大きくはしない
+            targets = [w for w in widths if w < image.width] or [image.width]
+            for width in targets:
+                for fmt in formats:
+                    out = IMAGE_DIR / f"{src.stem}-{digest[:12]}-{width}{EXTENSIONS[fmt]}"
+                    if force or not out.exists():
+                        _render(image, width, fmt, out)
+                    entry["renditions"].append({
+                        "format": fmt,
+                        "width": width,
+                        "path": rel_path(out),
+                        "bytes": out.stat().st_size,
+                    })
+
+        sizes = [r["bytes"] // 1024 for r in entry["renditions"]]
+        if sizes:
+            print(f"  {key}: {entry['bytes'] // 1024} KB -> {len(sizes)} renditions "
+                  f"({min(sizes)}-{max(sizes)} KB)")
+        images[key] = entry
+
+    manifest = {"version": MANIFEST_VERSION, "images": images}
+    write_manifest(IMAGE_MANIFEST, manifest)
+
+    if full_build:
+        keep = [BASE_DIR / r["path"] for e in images.values() for r in e["renditions"]]
+        removed = prune(IMAGE_DIR, keep)
+        if removed:
+            print(f"  removed {removed} stale file(s)")
+    return manifest
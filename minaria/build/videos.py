@@ -0,0 +1,112 @@
+"""
+動画（タイトル・ステージクリア）の低／中ビットレート版とポスター画像をつくる
+
+元の mp4 は 1本 2.7MB 前後の高ビットレートで、学校の Wi-Fi だと
+タイトル画面で止まってしまう。ffmpeg で H.264（mp4）と VP9（webm）の
+low / mid 版、それに最初のコマを JPEG にしたポスターを作っておく。
+実行時は minaria.renditions.resolve_video() が manifest を見て選ぶ。
+"""
+import pathlib
+
+from .common import BASE_DIR, BUILD_DIR, MANIFEST_VERSION, file_sha256, prune, read_manifest, rel_path, run_ffmpeg, write_manifest
+
+VIDEO_DIR = BUILD_DIR / "videos"
+VIDEO_MANIFEST = VIDEO_DIR / "manifest.json"
+
+SOURCE_PATTERNS = ("*.mp4",)
+
+# 画質ごとの高さとビットレート（高さは元より大きくしない）
+QUALITIES = {
+    "low": {"height": 480, "h264": "400k", "vp9": "300k", "audio": "48k"},
+    "mid": {"height": 720, "h264": "1000k", "vp9": "700k", "audio": "64k"},
+}
+
+POSTER_AT = "0.5"  # 何秒目のコマをポスターにするか
+POSTER_HEIGHT = 720
+
+
+def find_sources():
+    sources = []
+    for pattern in SOURCE_PATTERNS:
+        sources.extend(sorted(BASE_DIR.glob(pattern)))
+    return sources
+
+
+def _scale(height: int) -> str:
+    return f"scale=-2:'min({height},ih)'"
+
+
+def _h264_args(src, q) -> list:
+    return [
+        "-i", str(src),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", _scale(q["height"]),
+        "-c:v", "libx264", "-preset", "slow", "-profile:v", "main", "-pix_fmt", "yuv420p",
+        "-b:v", q["h264"], "-maxrate", q["h264"], "-bufsize", "2M",
+        "-c:a", "aac", "-b:a", q["audio"],
+        "-movflags", "+faststart",
+    ]
+
+
+def _vp9_args(src, q) -> list:
+    return [
+        "-i", str(src),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", _scale(q["height"]),
+        "-c:v", "libvpx-vp9", "-b:v", q["vp9"], "-row-mt", "1", "-deadline", "good", "-cpu-used", "4",
+        "-c:a", "libopus", "-b:a", q["audio"],
+    ]
+
+
+def _poster_args(src) -> list:
+    return ["-ss", POSTER_AT, "-i", str(src), "-frames:v", "1", "-vf", _scale(POSTER_HEIGHT), "-q:v", "4"]
+
+
+def build_videos(sources=None, qualities=tuple(QUALITIES), formats=("mp4", "webm"), force: bool = False) -> dict:
+    """動画の軽量版とポスターを作って manifest を書き出す。manifest の中身を返す。"""
+    VIDEO_DIR.mkdir(parents=True, exist_ok=True)
+    full_build = sources is None
+    sources = find_sources() if sources is None else [pathlib.Path(s).resolve() for s in sources]
+
+    manifest = read_manifest(VIDEO_MANIFEST) if not full_build else {}
+    videos = manifest.get("videos", {})
+
+    for src in sources:
+        key = rel_path(src)
+        digest = file_sha256(src)
+        prefix = f"{src.stem}-{digest[:12]}"
+        entry = {"sha256": digest, "bytes": src.stat().st_size, "poster": None, "renditions": []}
+
+        poster = VIDEO_DIR / f"{prefix}-poster.jpg"
+        if force or not poster.exists():
+            run_ffmpeg(_poster_args(src), poster)
+        entry["poster"] = rel_path(poster)
+
+        for quality in qualities:
+            q = QUALITIES[quality]
+            for fmt in formats:
+                out = VIDEO_DIR / f"{prefix}-{quality}.{fmt}"
+                if force or not out.exists():
+                    print(f"  encoding {out.name} ...")
+                    run_ffmpeg(_h264_args(src, q) if fmt == "mp4" else _vp9_args(src, q), out)
+                entry["renditions"].append({
+                    "quality": quality,
+                    "format": fmt,
+                    "path": rel_path(out),
+                    "bytes": out.stat().st_size,
+                })
+
+        sizes = ", ".join(f"{r['quality']}/{r['format']} {r['bytes'] // 1024} KB" for r in entry["renditions"])
+        print(f"  {key}: {entry['bytes'] // 1024} KB -> {sizes}")
+        videos[key] = entry
+
+    manifest = {"version": MANIFEST_VERSION, "videos": videos}
+    write_manifest(VIDEO_MANIFEST, manifest)
+
+    if full_build:
+        keep = [BASE_DIR / r["path"] for e in videos.values() for r in e["renditions"]]
+        keep += [BASE_DIR / e["poster"] for e in videos.values() if e.get("poster")]
+        removed = prune(VIDEO_DIR, keep)
+        if removed:
+            print(f"  removed {removed} stale file(s)")
+    return manifest
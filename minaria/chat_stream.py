@@ -0,0 +1,58 @@
+"""
+チャットの返事をトークンごとに受け取る
+
+返事が全部できるまで画面が固まっていたので、ストリームで受け取りながら
+on_delta(ここまでの文) を呼んで、会話ログに少しずつ書いていけるようにする。
+最初の文字までの時間（TTFT）と全体の時間も測って返す。
+"""
+import contextlib
+import time
+from typing import NamedTuple
+
+from minaria.metrics import get_metrics
+
+# 画面の書き換えはこの秒数おきにまとめる（トークンごとに送ると重い）
+REDRAW_INTERVAL = 0.05
+
+
+class ChatReply(NamedTuple):
+    text: str
+    ttft: float          # 最初の文字が届くまでの秒数（届かなければ None）
+    total: float         # 全体の秒数
+    error: Exception     # 途中で失敗したとき（成功なら None）
+
+
+def stream_reply(provider, model: str, input_messages, on_delta) -> ChatReply:
+    """
+    返事をストリームで受け取る。on_delta(ここまでの文) を適度な間隔で呼ぶ。
+    途中で失敗しても、それまでに届いた文は text に入れて返す。
+    """
+    started = time.perf_counter()
+    ttft = None
+    text = ""
+    error = None
+    last_redraw = 0.0
+
+    try:
+        # on_delta で止められても（ページを移った・リランなど）、ストリームはその場で閉じる
+        with contextlib.closing(provider.stream_text(model, input_messages)) as deltas:
+            for delta in deltas:
+                now = time.perf_counter()
+                if ttft is None:
+                    ttft = now - started
+                text += delta
+                if now - last_redraw >= REDRAW_INTERVAL:
+                    on_delta(text)
+                    last_redraw = now
+    except Exception as e:
+        error = e
+
+    total = time.perf_counter() - started
+    metrics = get_metrics()
+    if ttft is not None:
+        metrics.observe("chat.ttft", ttft)
+    metrics.observe("chat.total", total)
+    if error is not None:
+        metrics.incr("chat.errors")
+
+    return ChatReply(text=text, ttft=ttft, total=total, error=error)
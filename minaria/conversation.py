@@ -0,0 +1,122 @@
+"""
+チャットの「会話の記憶」（トークン予算つき）
+
+これまではシステムプロンプト ＋ 最新の入力しか送っていなかったので、
+ミナリアは1つ前のやりとりも覚えていなかった。かといって会話ログを全部送ると、
+会話が長くなるほどプロンプトも待ち時間も増えていく。そこで
+
+  [システムプロンプト]            ← 毎回まったく同じ（プロンプトキャッシュが効く）
+  [これまでのまとめ]              ← 古いやりとりを要約したもの（ときどきだけ変わる）
+  [最近のやりとり …]              ← 予算内に収まる新しいほう
+  [今回の入力]
+
+の形で送る。最近のやりとりが予算を超えたら、古いほうをまとめに畳みこむ。
+畳むときは予算の半分まで一気に減らすので、要約の API 呼び出しは毎回ではなく
+ときどきだけになる。
+
+環境変数
+  MINARIA_CHAT_CONTEXT_TOKENS  最近のやりとりに使う予算（既定 1500 トークン）
+"""
+import os
+import time
+
+from minaria.metrics import get_metrics
+
+CONTEXT_TOKENS = int(os.getenv("MINARIA_CHAT_CONTEXT_TOKENS", "1500"))
+
+# 畳んだあとに残す量（予算に対する割合）
+KEEP_RATIO = 0.5
+
+# 1メッセージぶんの枠（role など）のおおよそのトークン数
+MESSAGE_OVERHEAD = 4
+
+SUMMARY_PROMPT = (
+    "あなたは会話の記録係です。これまでのまとめと新しいやりとりを読んで、"
+    "ユーザーについて分かったこと（名前・好きなもの・困っていること・約束したこと）と"
+    "話題の流れを、日本語で300字以内の箇条書きにまとめてください。"
+)
+
+# 会話ログの話し手 → API の role
+_ROLES = {"あなた": "user", "ミナリア": "assistant"}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    ざっくりしたトークン数（API を呼ばずに数える）。
+    日本語などはだいたい1文字1トークン、英数字は4文字で1トークンくらい。
+    """
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4 + MESSAGE_OVERHEAD
+
+
+def new_memory() -> dict:
+    """セッションに置いておく記憶（summary: まとめ, folded: まとめ済みのメッセージ数）"""
+    return {"summary": "", "folded": 0}
+
+
+def _turn_start(messages, index: int) -> int:
+    """index 以降で、最初の「あなた」の発言の位置（やりとりの途中で切らない）"""
+    while index < len(messages) and messages[index][0] != "あなた":
+        index += 1
+    return index
+
+
+def summarize_turns(provider, model: str, previous: str, turns) -> str:
+    """前のまとめ ＋ 畳むやりとり から、新しいまとめを作る"""
+    log = "\n".join(f"{speaker}：{text}" for speaker, text in turns)
+    return provider.complete_text(
+        model,
+        [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"これまでのまとめ：\n{previous or '（なし）'}\n\n新しいやりとり：\n{log}"},
+        ],
+    ).strip()
+
+
+def fold_history(messages, memory: dict, summarize, budget: int = CONTEXT_TOKENS) -> None:
+    """
+    まだ畳んでいないやりとりが予算を超えていたら、古いほうをまとめに畳む。
+    summarize(前のまとめ, やりとりのリスト) -> 新しいまとめ。
+    失敗したときは古いまとめのまま、そのやりとりは忘れる（予算は必ず守る）。
+    """
+    if memory["folded"] > len(messages):
+        # 会話ログが消された（リセットなど）
+        memory.update(new_memory())
+
+    recent = messages[memory["folded"]:]
+    if sum(estimate_tokens(text) for _speaker, text in recent) <= budget:
+        return
+
+    # 新しいほうから、予算の KEEP_RATIO ぶんだけ残す
+    keep_from = len(messages)
+    used = 0
+    while keep_from > memory["folded"]:
+        cost = estimate_tokens(messages[keep_from - 1][1])
+        if used + cost > budget * KEEP_RATIO:
+            break
+        used += cost
+        keep_from -= 1
+    keep_from = _turn_start(messages, keep_from)
+
+    turns = messages[memory["folded"]:keep_from]
+    metrics = get_metrics()
+    started = time.perf_counter()
+    try:
+        memory["summary"] = summarize(memory["summary"], turns)
+        metrics.observe("chat.summary", time.perf_counter() - started)
+    except Exception:
+        metrics.incr("chat.summary_errors")
+    memory["folded"] = keep_from
+
+
+def build_input(system_prompt: str, messages, memory: dict, user_input: str):
+    """API に送る input（システムプロンプトが必ず先頭で、毎回同じ文になる）"""
+    items = [{"role": "system", "content": system_prompt}]
+    if memory["summary"]:
+        items.append({"role": "system", "content": f"これまでの会話のまとめ：\n{memory['summary']}"})
+    for speaker, text in messages[memory["folded"]:]:
+        items.append({"role": _ROLES.get(speaker, "user"), "content": text})
+    items.append({"role": "user", "content": user_input})
+
+    get_metrics().gauge("chat.context_tokens", sum(estimate_tokens(item["content"]) for item in items))
+    return items
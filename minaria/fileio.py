@@ -0,0 +1,162 @@
+"""
+こわれにくいファイルの読み書き
+
+  atomic_write_bytes(path, data)   一時ファイルに書いて fsync → rename（途中で落ちても元のファイルは無事）
+  file_lock(path)                  プロセスをまたぐアドバイザリーロック（<path>.lock を flock）
+  write_checked_json(path, obj)    チェックサムつきで保存し、前の世代を path.1, path.2 … に残す
+  read_checked_json(path)          チェックサムを確かめて読む。こわれていたら前の世代から読む
+
+open(path, "w") で直接書くと、書いている途中で落ちたり2つのプロセスが同時に書いたりしたとき、
+ファイルが空や半端になり、読む側は黙って 0 扱いになっていた。
+"""
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 残しておく前の世代の数
+BACKUPS = 2
+
+FORMAT_VERSION = 1
+
+
+class CorruptFileError(ValueError):
+    """チェックサムが合わない・形がおかしい（前の世代もすべて）"""
+
+
+def _fsync_dir(directory: pathlib.Path) -> None:
+    # rename をディスクに残すには、ディレクトリも fsync する（できない OS では何もしない）
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path, data: bytes, fsync: bool = True) -> None:
+    """path を data で丸ごと置きかえる。読む側からは「前の中身」か「新しい中身」しか見えない。"""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+    if fsync:
+        _fsync_dir(path.parent)
+
+
+@contextlib.contextmanager
+def file_lock(path, shared: bool = False):
+    """
+    <path>.lock をロックする（ほかのプロセスが持っていれば待つ）。
+    アドバイザリーなので、同じくこの関数を使うもの同士でだけ効く。
+    shared=True は読む人どうしなら同時に持てる（Windows では常に排他）。
+    """
+    lock_path = pathlib.Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _checksum(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _encode(obj) -> bytes:
+    payload = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    envelope = {"version": FORMAT_VERSION, "sha256": _checksum(payload.encode("utf-8")), "data": payload}
+    return json.dumps(envelope, ensure_ascii=False).encode("utf-8")
+
+
+def _decode(raw: bytes):
+    try:
+        envelope = json.loads(raw)
+        payload = envelope["data"]
+        if envelope.get("version") != FORMAT_VERSION or _checksum(payload.encode("utf-8")) != envelope["sha256"]:
+            raise CorruptFileError("checksum mismatch")
+        return json.loads(payload)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise CorruptFileError(str(e)) from e
+
+
+def backup_path(path, generation: int) -> pathlib.Path:
+    return pathlib.Path(f"{path}.{generation}")
+
+
+def write_checked_json(path, obj, backups: int = BACKUPS) -> None:
+    """
+    チェックサムつきの JSON を atomic に書く。前の中身は path.1 に、path.1 は path.2 に…とずらして残す。
+    複数プロセスから書くときは file_lock(path) の中で呼ぶこと。
+    """
+    path = pathlib.Path(path)
+    if backups > 0 and path.exists():
+        for generation in range(backups, 1, -1):
+            older = backup_path(path, generation - 1)
+            if older.exists():
+                os.replace(older, backup_path(path, generation))
+        # 今の中身はハードリンクで残す（コピーしない。置きかえても前の中身はそのまま）
+        first = backup_path(path, 1)
+        with contextlib.suppress(FileNotFoundError):
+            first.unlink()
+        try:
+            os.link(path, first)
+        except OSError:
+            atomic_write_bytes(first, path.read_bytes())
+    atomic_write_bytes(path, _encode(obj))
+
+
+def read_checked_json(path, backups: int = BACKUPS):
+    """
+    チェックサムを確かめて読む。こわれていたら path.1, path.2 … の順に試す。
+    ファイルがなければ FileNotFoundError、全部こわれていたら CorruptFileError。
+    """
+    path = pathlib.Path(path)
+    candidates = [path] + [backup_path(path, g) for g in range(1, backups + 1)]
+    found = False
+    for candidate in candidates:
+        try:
+            raw = candidate.read_bytes()
+        except FileNotFoundError:
+            continue
+        found = True
+        try:
+            return _decode(raw)
+        except CorruptFileError:
+            continue
+    if not found:
+        raise FileNotFoundError(path)
+    raise CorruptFileError(f"{path} とその前の世代がすべてこわれています")
@@ -0,0 +1,129 @@
+"""
+書いたコードが正解かどうかを、構文木（ast）で見る
+
+これまでは normalize_code で空白を全部消し、' を " にそろえて文字列でくらべていたので、
+print("Hello, world!") と print("Hello,world!") が同じあつかいになる一方、
+意味が同じ書きかた（80 <= score と score >= 80 など）はまちがいになっていた。
+「好きな名前でOK」の問題は is_valid_name_assignment という専用の文字列チェックだった。
+
+ここでは正解も答えも ast にして、形（構文木）でくらべる。空白・クォートの種類・
+よけいなカッコのちがいは、構文木にした時点で消える。
+
+  answer = ExpectedAnswer('name = "Cocomoa"', rules=("any_string",))
+  answer.matches("name = 'Hanako'")   # True
+
+ルール（問題バンクの answer_rules。なければ DEFAULT_RULES）
+  any_string     正解の中の文字列は、空でない文字列ならなんでもよい
+  any_number     正解の中の数は、数ならなんでもよい
+  compare_order  くらべる式の左右を入れかえてもよい（80 <= score と score >= 80、a == b と b == a）
+
+正解の中に ... と書いたところは、どんな式でもよい（print(...) など）。
+正解の構文木は ExpectedAnswer を作るときに1回だけ作る（問題バンクを読むときに作っておく）。
+answer.fingerprint は、ルールでそろえたあとの構文木の指紋（空白やクォートだけ変えても同じ）。
+"""
+import ast
+import hashlib
+
+GRADING_RULES = ("any_string", "any_number", "compare_order")
+DEFAULT_RULES = ("compare_order",)
+
+# 左右を入れかえたときの演算子
+_MIRRORED = {ast.Lt: ast.Gt, ast.Gt: ast.Lt, ast.LtE: ast.GtE, ast.GtE: ast.LtE, ast.Eq: ast.Eq, ast.NotEq: ast.NotEq}
+_SYMMETRIC = (ast.Eq, ast.NotEq)
+
+
+class _CompareOrder(ast.NodeTransformer):
+    """a OP b を1つの向きにそろえる（定数は右、== / != は左右を決まった順に）"""
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) != 1 or type(node.ops[0]) not in _MIRRORED:
+            return node
+        left, right, op = node.left, node.comparators[0], node.ops[0]
+        if isinstance(op, _SYMMETRIC):
+            swap = ast.dump(left) > ast.dump(right)
+        else:
+            swap = isinstance(left, ast.Constant) and not isinstance(right, ast.Constant)
+        if swap:
+            node.left, node.comparators = right, [left]
+            node.ops = [_MIRRORED[type(op)]()]
+        return node
+
+
+def _canonical(tree, rules):
+    if "compare_order" in rules:
+        tree = _CompareOrder().visit(tree)
+    return tree
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, complex)) and not isinstance(value, bool)
+
+
+def _has_wildcards(tree, rules) -> bool:
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant):
+            if node.value is Ellipsis:
+                return True
+            if "any_string" in rules and isinstance(node.value, str):
+                return True
+            if "any_number" in rules and _is_number(node.value):
+                return True
+    return False
+
+
+def _match(expected, actual, rules) -> bool:
+    if isinstance(expected, ast.Constant):
+        if expected.value is Ellipsis:
+            return isinstance(actual, ast.expr)
+        if not isinstance(actual, ast.Constant):
+            return False
+        if "any_string" in rules and isinstance(expected.value, str):
+            return isinstance(actual.value, str) and actual.value != ""
+        if "any_number" in rules and _is_number(expected.value):
+            return _is_number(actual.value)
+        return type(expected.value) is type(actual.value) and expected.value == actual.value
+
+    if type(expected) is not type(actual):
+        return False
+    if isinstance(expected, ast.AST):
+        return all(
+            _match(getattr(expected, name, None), getattr(actual, name, None), rules)
+            for name in expected._fields
+        )
+    if isinstance(expected, list):
+        return len(expected) == len(actual) and all(_match(e, a, rules) for e, a in zip(expected, actual))
+    return expected == actual
+
+
+class ExpectedAnswer:
+    """1つの正解（構文木は作るときに1回だけ作る）"""
+
+    __slots__ = ("source", "rules", "fingerprint", "_tree", "_dump")
+
+    def __init__(self, source: str, rules=DEFAULT_RULES):
+        unknown = set(rules) - set(GRADING_RULES)
+        if unknown:
+            raise ValueError(f"知らないルール: {', '.join(sorted(unknown))}")
+        self.source = source
+        self.rules = frozenset(rules)
+        self._tree = _canonical(ast.parse(source), self.rules)  # SyntaxError はそのまま
+        # ワイルドカードがなければ ast.dump の文字列どうしをくらべるだけでよい
+        dump = ast.dump(self._tree)
+        self._dump = None if _has_wildcards(self._tree, self.rules) else dump
+        self.fingerprint = hashlib.blake2b(
+            f"{sorted(self.rules)}:{dump}".encode("utf-8"), digest_size=8
+        ).hexdigest()
+
+    def matches(self, submission: str) -> bool:
+        try:
+            tree = ast.parse(submission.strip())
+        except (SyntaxError, ValueError):
+            return False
+        tree = _canonical(tree, self.rules)
+        if self._dump is not None:
+            return ast.dump(tree) == self._dump
+        return _match(self._tree, tree, self.rules)
+
+    def __repr__(self):
+        return f"ExpectedAnswer({self.source!r}, rules={sorted(self.rules)})"
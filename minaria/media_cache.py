@@ -0,0 +1,112 @@
+"""
+音・動画ファイルの base64 キャッシュ（プロセス全体で共有）
+
+Streamlit はボタンを押すたびにスクリプトを頭から実行し直すので、
+BGM や動画を毎回 open → read → base64 するとCPUとメモリがもったいない。
+ここでは「パス＋更新時刻＋サイズ」をキーにして、エンコード済みの文字列を
+1プロセスにつき1回だけ作って使い回す。
+"""
+import base64
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+
+# キャッシュ全体の上限（MB）。環境変数で変えられる
+DEFAULT_MAX_BYTES = int(os.getenv("MINARIA_MEDIA_CACHE_MB", "64")) * 1024 * 1024
+
+
+class MediaCache:
+    """メモリ上限つき LRU キャッシュ（ヒット／ミス回数も数える）"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (path, mtime_ns, size) -> base64文字列
+        self._key_by_path = {}         # path -> いま入っているキー（古い版の掃除用）
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_b64(self, path) -> str:
+        """ファイルの中身を base64 文字列で返す。なければ FileNotFoundError。"""
+        file_path = pathlib.Path(path).resolve()
+        stat = file_path.stat()
+        key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        # 読み込みとエンコードはロックの外で行う（重いので）
+        data = base64.b64encode(file_path.read_bytes()).decode("utf-8")
+
+        with self._lock:
+            self._store(key, data)
+        return data
+
+    def _store(self, key, data: str) -> None:
+        path = key[0]
+
+        # 同じファイルの古い版（更新前）は捨てる
+        old_key = self._key_by_path.pop(path, None)
+        if old_key is not None and old_key in self._entries:
+            self._bytes -= len(self._entries.pop(old_key))
+
+        size = len(data)
+        if size > self.max_bytes:
+            # 上限より大きいものはキャッシュしない
+            return
+
+        self._entries[key] = data
+        self._key_by_path[path] = key
+        self._bytes += size
+
+        # 上限を超えたら、いちばん長く使われていないものから捨てる
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, old_data = self._entries.popitem(last=False)
+            self._key_by_path.pop(old_key[0], None)
+            self._bytes -= len(old_data)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._key_by_path.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """ヒット率などの統計を返す"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+# ======================================================
+#  プロセス全体で1つだけのキャッシュ
+# ======================================================
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_media_cache() -> MediaCache:
+    """全セッション共通の MediaCache を返す（最初の1回だけ作る）"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MediaCache()
+    return _cache
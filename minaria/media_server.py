@@ -0,0 +1,322 @@
+"""
+音・画像・動画を URL で配るための小さなファイルサーバー
+
+data: URI で埋め込むと、クリックのたびに数MBがウェブソケットで送られ、
+ブラウザのキャッシュも効かない。MINARIA_MEDIA_MODE=server のときは
+このサーバーをバックグラウンドで1つだけ立ち上げ、<audio src> / <video src> に
+URL を書くようにする。2回目以降はブラウザのキャッシュ（ETag / Cache-Control）で
+ほぼ通信なしになる。シークや iOS の再生に必要な Range リクエストにも対応。
+
+環境変数
+  MINARIA_MEDIA_MODE      inline（従来どおり data: URI） / server
+  MINARIA_MEDIA_HOST      待ち受けアドレス（既定 127.0.0.1。ほかのマシンから見せるときだけ 0.0.0.0 など）
+  MINARIA_MEDIA_PORT      待ち受けポート（既定 8502）
+  MINARIA_MEDIA_BASE_URL  ブラウザから見たURL（既定 http://localhost:<port>）
+  MINARIA_MEDIA_BLOB_DIR  TTS の音声などを一時的に置くディレクトリ（既定 .cache/media_blobs）
+
+Streamlit をいくつかのプロセスで動かすと、ポートを取れたプロセスの1つだけがサーバーになる。
+TTS の音声はどのプロセスで作られても MINARIA_MEDIA_BLOB_DIR に書くので、
+サーバーになったプロセスがそのまま配れる（プロセスのメモリには置かない）。
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import pathlib
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from minaria.fileio import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+MEDIA_MODE = os.getenv("MINARIA_MEDIA_MODE", "inline").lower()
+MEDIA_HOST = os.getenv("MINARIA_MEDIA_HOST", "127.0.0.1")
+MEDIA_PORT = int(os.getenv("MINARIA_MEDIA_PORT", "8502"))
+MEDIA_BASE_URL = os.getenv("MINARIA_MEDIA_BASE_URL", f"http://localhost:{MEDIA_PORT}").rstrip("/")
+
+# 配ってよい拡張子だけ（.py や .json は出さない）
+ALLOWED_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".wav": "audio/wav",
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".avif": "image/avif",
+}
+
+# URL に ?v=<etag> がついていれば中身は変わらないので1年キャッシュしてよい
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+DEFAULT_CACHE = "public, max-age=3600"
+
+# TTS など「ファイルではない音声」を一時的に置いておく上限
+MAX_BLOB_BYTES = 32 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent
+BLOB_DIR = pathlib.Path(os.getenv("MINARIA_MEDIA_BLOB_DIR", BASE_DIR / ".cache" / "media_blobs"))
+
+# 置いた音声のファイル名は <ハッシュ><拡張子>。拡張子から配るときの MIME タイプがわかる
+BLOB_SUFFIXES = {mime: suffix for suffix, mime in ALLOWED_TYPES.items()}
+BLOB_SUFFIXES.update({"audio/mpeg": ".mp3", "audio/mp3": ".mp3", "audio/ogg": ".ogg", "audio/webm": ".webm"})
+BLOB_NAME = re.compile(r"^[0-9a-f]{32}\.[a-z0-9]+$")
+
+
+def is_server_mode() -> bool:
+    return MEDIA_MODE == "server"
+
+
+def file_etag(stat) -> str:
+    """サイズと更新時刻から ETag を作る（ハッシュ計算はしない）"""
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def parse_range(header: str, size: int):
+    """
+    Range ヘッダーを (start, end) に直す。end は含む。
+    ヘッダーがない／複数範囲 → None、満たせない範囲 → ValueError
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None  # 複数範囲は全体を返してしまう
+    start_s, _, end_s = spec.partition("-")
+    try:
+        if start_s == "":
+            # bytes=-500 → 最後の500バイト
+            length = int(end_s)
+            if length <= 0:
+                raise ValueError(header)
+            return max(size - length, 0), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        raise ValueError(header)
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+# ======================================================
+#  ファイルではない音声（TTS の結果など）
+# ======================================================
+class BlobStore:
+    """
+    中身のハッシュで引ける、容量上限つきの置き場（ディレクトリ1つ・どのプロセスからも同じ場所）。
+    名前は中身で決まるので、何プロセスが同時に書いても同じファイルになる。
+    上限を超えたら、更新時刻（最後に put した時刻）の古いものから消す。
+    """
+
+    # 何回 put するごとにディレクトリの大きさを確かめるか
+    TRIM_EVERY = 16
+
+    def __init__(self, directory=BLOB_DIR, max_bytes: int = MAX_BLOB_BYTES):
+        self.dir = pathlib.Path(directory)
+        self.max_bytes = max_bytes
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def put(self, data: bytes, mime: str) -> str:
+        """置いたファイルの名前（<ハッシュ><拡張子>）を返す"""
+        suffix = BLOB_SUFFIXES.get(mime.split(";")[0].strip().lower(), ".bin")
+        name = hashlib.sha256(data).hexdigest()[:32] + suffix
+        path = self.dir / name
+        try:
+            os.utime(path)  # もうあれば、新しく使われたことにするだけ
+        except FileNotFoundError:
+            atomic_write_bytes(path, data, fsync=False)  # 一時的なものなので fsync はしない
+        with self._lock:
+            self._puts += 1
+            trim = self._puts % self.TRIM_EVERY == 0
+        if trim:
+            self.trim()
+        return name
+
+    def get(self, name: str):
+        """name のファイルの (パス, MIMEタイプ)。ない・名前がおかしいときは None"""
+        if not BLOB_NAME.match(name):
+            return None
+        path = self.dir / name
+        if not path.is_file():
+            return None
+        return path, ALLOWED_TYPES.get(path.suffix, "application/octet-stream")
+
+    def trim(self) -> None:
+        entries = []
+        for path in self.dir.glob("*.*"):
+            if not BLOB_NAME.match(path.name):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # ほかのプロセスが先に消した
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+_blobs = BlobStore()
+
+
+# ======================================================
+#  HTTP ハンドラー
+# ======================================================
+class MediaRequestHandler(BaseHTTPRequestHandler):
+    root = BASE_DIR
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def log_message(self, format, *args):
+        logger.debug("media: " + format, *args)
+
+    def _serve(self, send_body: bool):
+        url = urllib.parse.urlsplit(self.path)
+        rel = urllib.parse.unquote(url.path).lstrip("/")
+
+        if rel.startswith("_blob/"):
+            name = rel[len("_blob/"):]
+            item = _blobs.get(name)
+            if item is None:
+                self.send_error(404)
+                return
+            path, mime = item
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:  # ちょうど消されたところ
+                self.send_error(404)
+                return
+            # 名前が中身のハッシュなので、ずっとキャッシュしてよい
+            self._send(path=path, size=size, mime=mime, etag=name.split(".")[0],
+                       cache=IMMUTABLE_CACHE, send_body=send_body)
+            return
+
+        file_path = (self.root / rel).resolve()
+        mime = ALLOWED_TYPES.get(file_path.suffix.lower())
+        # ルートの外・許可していない拡張子・存在しないものは 404
+        if mime is None or self.root not in file_path.parents or not file_path.is_file():
+            self.send_error(404)
+            return
+
+        stat = file_path.stat()
+        etag = file_etag(stat)
+        version = urllib.parse.parse_qs(url.query).get("v", [None])[0]
+        cache = IMMUTABLE_CACHE if version == etag else DEFAULT_CACHE
+        self._send(path=file_path, size=stat.st_size, mime=mime, etag=etag,
+                   cache=cache, send_body=send_body)
+
+    def _send(self, path, size, mime, etag, cache, send_body):
+        quoted = f'"{etag}"'
+        if self.headers.get("If-None-Match") in (quoted, f"W/{quoted}"):
+            self.send_response(304)
+            self.send_header("ETag", quoted)
+            self.send_header("Cache-Control", cache)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        length = max(end - start + 1, 0)
+
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", mime)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", quoted)
+        self.send_header("Cache-Control", cache)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        if not send_body or length == 0:
+            return
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+# ======================================================
+#  サーバーの起動（プロセスにつき1回）
+# ======================================================
+_server = None
+_server_lock = threading.Lock()
+
+
+def ensure_media_server():
+    """
+    サーバーを1度だけ起動する。ポートが使用中なら他プロセスが配っているとみなす
+    （ファイルも TTS の音声もディスクにあるので、どのプロセスのサーバーでも同じものを配れる）。
+    """
+    global _server
+    if _server is not None:
+        return _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            server = ThreadingHTTPServer((MEDIA_HOST, MEDIA_PORT), MediaRequestHandler)
+        except OSError as e:
+            logger.info("media server not started (%s); assuming another worker serves it", e)
+            _server = False
+            return _server
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, name="minaria-media", daemon=True)
+        thread.start()
+        _server = server
+        return _server
+
+
+def media_url(path) -> str:
+    """リポジトリ内のファイルの URL（?v= つき）を返す"""
+    ensure_media_server()
+    file_path = pathlib.Path(path).resolve()
+    rel = file_path.relative_to(BASE_DIR).as_posix()
+    etag = file_etag(file_path.stat())
+    return f"{MEDIA_BASE_URL}/{urllib.parse.quote(rel)}?v={etag}"
+
+
+def blob_url(data: bytes, mime: str) -> str:
+    """TTS の音声などを MINARIA_MEDIA_BLOB_DIR に置いて、一時的に配る URL を返す"""
+    ensure_media_server()
+    return f"{MEDIA_BASE_URL}/_blob/{_blobs.put(data, mime)}"
+
+
+def guess_mime(path) -> str:
+    suffix = pathlib.Path(path).suffix.lower()
+    return ALLOWED_TYPES.get(suffix) or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
@@ -0,0 +1,79 @@
+"""
+かんたんな計測（レイテンシーや件数）をプロセス全体で集める
+
+  get_metrics().observe("chat.ttft", 0.42)   # 秒などの値を記録
+  get_metrics().incr("tts.cache_hit")        # 回数を数える
+  get_metrics().snapshot()                   # まとめて dict で取り出す
+"""
+import threading
+from collections import deque
+
+# 分位点の計算に使う直近サンプル数
+WINDOW = 500
+
+
+class Series:
+    """直近 WINDOW 件の値から、件数・平均・p50・p95・最大を出す"""
+
+    def __init__(self, window: int = WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": 0}
+
+        def pct(p):
+            return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": pct(0.50),
+            "p95": pct(0.95),
+            "max": ordered[-1],
+            "last": self.samples[-1],
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            self._series.setdefault(name, Series()).add(float(value))
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "series": {name: s.summary() for name, s in self._series.items()},
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+            }
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """全セッション共通の Metrics を返す"""
+    return _metrics
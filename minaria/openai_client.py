@@ -0,0 +1,174 @@
+"""
+プロセス全体で共有する OpenAI クライアント
+
+Streamlit はリランのたびにスクリプトを最初から実行するので、
+OpenAI(api_key=...) を毎回作ると TLS 接続が使い回されず、タイムアウトも再試行もなかった。
+ここでは
+
+  ・クライアントはプロセスで1つ（keep-alive の接続プールを全セッションで共有）
+  ・呼び出しごとのタイムアウト
+  ・429 / 5xx / 接続エラーは、ゆらぎ（ジッター）つきの指数バックオフで再試行
+  ・同時に飛んでいるリクエスト数の上限（教室で一斉に押されてもレート制限に当たりにくい）
+
+をまとめて面倒をみる。再試行は SDK にまかせず自前でやる
+（SDK の再試行だと、待っているあいだも同時実行の枠をふさいでしまうため）。
+
+環境変数
+  MINARIA_OPENAI_TIMEOUT       1回の呼び出しのタイムアウト秒（既定 60）
+  MINARIA_OPENAI_MAX_RETRIES   再試行の回数（既定 3）
+  MINARIA_OPENAI_MAX_INFLIGHT  同時に飛ばすリクエスト数の上限（既定 8）
+  MINARIA_OPENAI_POOL          接続プールの大きさ（既定 20）
+"""
+import contextlib
+import os
+import random
+import threading
+import time
+
+import openai
+
+from minaria.metrics import get_metrics
+
+TIMEOUT = float(os.getenv("MINARIA_OPENAI_TIMEOUT", "60"))
+CONNECT_TIMEOUT = 5.0
+MAX_RETRIES = int(os.getenv("MINARIA_OPENAI_MAX_RETRIES", "3"))
+MAX_INFLIGHT = int(os.getenv("MINARIA_OPENAI_MAX_INFLIGHT", "8"))
+POOL_SIZE = int(os.getenv("MINARIA_OPENAI_POOL", "20"))
+
+# バックオフ（秒）: random(0, min(上限, 基準 × 2^回数))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# 再試行してよい HTTP ステータス
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# SDK が使っている HTTP ライブラリ（httpx / httpx2）の Limits をそのまま使う
+_Limits = type(openai.DEFAULT_CONNECTION_LIMITS)
+
+
+def _timeout():
+    return openai.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def _limits():
+    return _Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE, keepalive_expiry=60.0)
+
+
+# ======================================================
+#  クライアント（プロセスで1つずつ）
+# ======================================================
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> openai.OpenAI:
+    """同じキーなら何度呼んでも同じものを返す。"""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = openai.OpenAI(
+                api_key=api_key,
+                timeout=_timeout(),
+                max_retries=0,
+                http_client=openai.DefaultHttpxClient(limits=_limits(), timeout=_timeout()),
+            )
+            _clients[api_key] = client
+        return client
+
+
+# ======================================================
+#  同時実行の上限（プロセスで1つ）
+# ======================================================
+_inflight = threading.BoundedSemaphore(MAX_INFLIGHT)
+_inflight_count = 0
+_count_lock = threading.Lock()
+
+
+def _entered(waited: float) -> None:
+    global _inflight_count
+    with _count_lock:
+        _inflight_count += 1
+        count = _inflight_count
+    metrics = get_metrics()
+    metrics.observe("openai.queue_wait", waited)
+    metrics.gauge("openai.inflight", count)
+
+
+def _left() -> None:
+    global _inflight_count
+    with _count_lock:
+        _inflight_count -= 1
+        count = _inflight_count
+    _inflight.release()
+    get_metrics().gauge("openai.inflight", count)
+
+
+@contextlib.contextmanager
+def inflight():
+    """この中にいるあいだ、同時実行の枠を1つ使う（ストリームは読み終わるまで持つ）"""
+    started = time.perf_counter()
+    _inflight.acquire()
+    _entered(time.perf_counter() - started)
+    try:
+        yield
+    finally:
+        _left()
+
+
+# ======================================================
+#  再試行
+# ======================================================
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRY_STATUS
+
+
+def backoff_delay(attempt: int, error: Exception = None) -> float:
+    """attempt 回目（0から）の再試行までの待ち。Retry-After があればそれを守る。"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def with_retry(call, *args, **kwargs):
+    """call(*args, **kwargs) を、再試行つきで呼ぶ（待っているあいだは枠を返す）"""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with inflight():
+                return call(*args, **kwargs)
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not is_retryable(e):
+                raise
+            get_metrics().incr("openai.retries")
+            time.sleep(backoff_delay(attempt, e))
+
+
+def stream_with_retry(open_stream):
+    """
+    open_stream() で開いたストリームの中身を順に yield する。
+    開くところ（ここで 429 などが返る）までは再試行し、読み終わるまで枠を持つ。
+    読みはじめてからの失敗は、二重に返事しないよう再試行しない。
+    途中でやめられたとき（close() された・呼び出し側で例外が起きた）も、HTTP のストリームは閉じる。
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        with inflight():
+            try:
+                stream = open_stream()
+            except Exception as e:
+                if attempt >= MAX_RETRIES or not is_retryable(e):
+                    raise
+                error = e
+            else:
+                try:
+                    yield from stream
+                finally:
+                    stream.close()
+                return
+        get_metrics().incr("openai.retries")
+        time.sleep(backoff_delay(attempt, error))
@@ -0,0 +1,76 @@
+"""
+ページの一覧（ページ名 → そのページを描くモジュール）
+
+これまでは minaria_app.py の大きな if/elif にすべてのページのコード・定数・HTML が入っていて、
+どのページを開いていても、リランのたびに全部を読んでいた。ここでは
+
+  ・ページごとにモジュールを分け（minaria/pages/home.py など）、はじめて開かれたときに import する
+    （そのあとはプロセスで使い回す。ほかのセッションも同じモジュールを使う）
+  ・ステージは stage1〜stageN のどれでも minaria/pages/stage.py（StageDef で描き分ける）
+  ・どのモジュールにも render(page) がある
+
+  render_page("stage1")    # minaria.pages.stage を（まだなら）読みこんで render("stage1")
+  is_page("mypage")        # True
+
+メトリクス（minaria.metrics）
+  page.import   はじめて読みこんだときにかかった秒数
+"""
+import importlib
+import threading
+import time
+
+from minaria.metrics import get_metrics
+from minaria.stages import STAGE_DEFS, stage_for_page
+
+HOME = "home"
+
+PAGE_MODULES = {
+    "home": "minaria.pages.home",
+    "intro": "minaria.pages.intro",
+    "chat": "minaria.pages.chat",
+    "mypage": "minaria.pages.mypage",
+}
+STAGE_MODULE = "minaria.pages.stage"
+
+
+def page_names() -> tuple:
+    return (HOME, "intro", *(stage.page for stage in STAGE_DEFS), "chat", "mypage")
+
+
+def module_name(page: str):
+    """ページを描くモジュールの名前（知らないページなら None）"""
+    if page in PAGE_MODULES:
+        return PAGE_MODULES[page]
+    if stage_for_page(page) is not None:
+        return STAGE_MODULE
+    return None
+
+
+def is_page(page: str) -> bool:
+    return module_name(page) is not None
+
+
+# ======================================================
+#  読みこんだモジュール（プロセス全体で1つずつ）
+# ======================================================
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_page(page: str):
+    """ページのモジュール。はじめてのときだけ import する（知らないページは home）"""
+    name = module_name(page) or PAGE_MODULES[HOME]
+    module = _loaded.get(name)
+    if module is None:
+        with _loaded_lock:
+            module = _loaded.get(name)
+            if module is None:
+                started = time.perf_counter()
+                module = importlib.import_module(name)
+                get_metrics().observe("page.import", time.perf_counter() - started)
+                _loaded[name] = module
+    return module
+
+
+def render_page(page: str) -> None:
+    load_page(page).render(page if is_page(page) else HOME)
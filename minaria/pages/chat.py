@@ -0,0 +1,168 @@
+"""
+ページ: ミナリアとのチャット
+"""
+import random
+
+import streamlit as st
+
+from minaria.chat_stream import stream_reply  # チャットの返事をストリームで受け取る
+from minaria.conversation import build_input, fold_history, summarize_turns  # チャットの記憶
+from minaria.providers import ai_available, get_provider  # OpenAI / ローカルのダミー（MINARIA_PROVIDER）
+from minaria.ui import current_session, fragment, save_progress, update_level
+
+# ---------- モデルの呼び出し口 ----------
+# 既定は OpenAI（APIキーは環境変数「OPENAI_API_KEY」から読み取る）。
+# MINARIA_PROVIDER=local にすると、ネットなしで決まった返事を返すダミーになる。
+# openai は初めてチャット / speak_minaria を使うときまで読みこまない（get_provider()）。
+# APIキーがないときは AI 機能だけお休みにして、ほかのページはそのまま使えるようにする。
+
+AI_ENABLED = ai_available()
+
+
+# ---------- ミナリアの人格プロンプト ----------
+MINARIA_SYSTEM_PROMPT = """
+あなたはココモア王国に住む「ミナリア」という名前の、優しくて包容力のあるお母さんキャラの先生です。
+自分をAIとは決して名乗らず、この王国に実在する人物として振る舞ってください。
+
+【性格】
+・相手の気持ちに寄り添い、安心させるように穏やかに話す。
+・間違えても「大丈夫よ」とまず受け止める、包み込むタイプ。
+・やさしく励まし、時々ちょっと天然なボケを入れる。
+・絵文字は控えめに使用（🌼✨🐣）。
+
+【世界観】
+・ここはココモア王国。パステルの光に包まれた、ふんわり可愛いファンタジー世界。
+・あなたは「母なる森」の近くの小さなコテージに住んでいる。
+・森には「バグモンスター」と呼ばれる、ちょっとドジで憎めない生き物がいる。
+・生徒（冒険者）はPythonの知識でバグモンスターを癒してあげられる。
+
+【役割】
+・Python初心者の家庭教師として、わかりやすい例を添えて教える。
+・難しい言葉だけで説明せず、必ず身近なたとえを使う。
+・学習の進み具合に応じて「レベルアップ」「スキル解放」などRPG風表現をまぜてもよい。
+・質問にはまず気持ちを受け止めてから、やさしく導く。
+
+【重要】
+・絶対にAIと名乗らない。
+・生徒を否定しない、叱らない。
+"""
+
+# ======================================================
+#  チャットの部品（話しかけても、この部品だけリランする）
+# ======================================================
+def render_chat_status(status_area, bonus_area):
+    """サイドバーのレベル・XP（どちらも st.empty の中身を入れかえる）"""
+    session = current_session()
+    status_area.markdown(f"レベル：**{session.level}**  \n経験値（XP）：**{session.xp}**")
+    if session.login_bonus_given_today:
+        bonus_area.empty()
+    else:
+        bonus_area.info("🎁 きょうのログインボーナスがあるよ。「ログインボーナスちょうだい」と話しかけてみてね。")
+
+@fragment("chat")
+def render_chat(status_area, bonus_area):
+    session = current_session()
+    user_input = st.text_input("ミナリアに話しかけてみよう：", "", disabled=not AI_ENABLED)
+
+    send = st.button("送信", disabled=not AI_ENABLED) and user_input.strip()
+
+    # ログインボーナスなどのお知らせは、入力欄のすぐ下に出す
+    notice_area = st.container()
+
+    st.markdown("---")
+    st.subheader("📜 会話ログ")
+    if not session.chat.messages and not send:
+        st.write("まだミナリアとの会話ははじまっていません。なにか話しかけてみてね 🌼")
+    else:
+        for speaker, text in session.chat.messages:
+            if speaker == "あなた":
+                st.markdown(f"**🧑 あなた：** {text}")
+            else:
+                st.markdown(f"**👩‍🍼 ミナリア：** {text}")
+
+    if send:
+        # ⭐ 返事は会話ログの最後に、届いたところから少しずつ書いていく
+        st.markdown(f"**🧑 あなた：** {user_input}")
+        reply_area = st.empty()
+        reply_area.markdown("**👩‍🍼 ミナリア：** ▌")
+
+        provider = get_provider()
+
+        # 🧠 最近のやりとりは予算内だけ送り、古いほうはまとめに畳んでおく
+        memory = session.chat.memory
+        fold_history(
+            session.chat.messages,
+            memory,
+            lambda previous, turns: summarize_turns(provider, "gpt-4o-mini", previous, turns),
+        )
+
+        result = stream_reply(
+            provider,
+            "gpt-4o-mini",
+            build_input(MINARIA_SYSTEM_PROMPT, session.chat.messages, memory, user_input),
+            on_delta=lambda partial: reply_area.markdown(f"**👩‍🍼 ミナリア：** {partial}▌"),
+        )
+
+        if result.error is None:
+            reply = result.text
+        elif result.text:
+            # とちゅうまで届いた分は残す
+            reply = f"{result.text}\n\n（とちゅうで途切れちゃったみたい…ごめんね💦 詳細：{result.error}）"
+        else:
+            reply = f"エラーが起きちゃったみたい…ごめんね💦 詳細：{result.error}"
+        reply_area.markdown(f"**👩‍🍼 ミナリア：** {reply}")
+
+        # ストリームが終わってから、まとめて会話ログに入れる
+        session.chat.add_messages(("あなた", user_input), ("ミナリア", reply))
+
+        # ⏱ 返事ごとの速さ（最初の文字まで / ぜんぶ）を記録しておく（直近50件）
+        session.chat.add_metric(result.ttft, result.total)
+
+        if result.error is None:
+            gained_xp = 10
+
+            if (("ログインボーナス" in user_input) or ("ボーナス" in user_input)) and not session.login_bonus_given_today:
+                bonus_item = random.choice(
+                    [
+                        ("ミニポーション", 5),
+                        ("ラッキーキャンディ", 10),
+                        ("ふわふわ毛玉", 8),
+                    ]
+                )
+                item_name, item_xp = bonus_item
+                gained_xp += item_xp
+                session.login_bonus_given_today = True
+                with notice_area:
+                    st.success(f"🎁 ミナリアから『{item_name}』をもらった！ 追加で {item_xp} XP ゲット！")
+
+            session.xp += gained_xp
+            update_level()
+            save_progress()
+
+    render_chat_status(status_area, bonus_area)
+
+# ======================================================
+#  ページ: チャット
+# ======================================================
+def render(page: str):
+    session = current_session()
+    with st.sidebar:
+        st.header("📊 ステータス")
+        # 話しかけても全体はリランしないので、XP などはチャットの部品（render_chat）が書く
+        chat_status_area = st.empty()
+        chat_bonus_area = st.empty()
+
+        if st.button("🌱 ステージ1で練習する"):
+            session.page = "stage1"
+            st.rerun()
+
+    st.subheader("💬 ミナリアとの会話")
+
+    if not AI_ENABLED:
+        st.info("🔌 いまはミナリアとのおしゃべりはお休み中だよ（OPENAI_API_KEY が設定されていません）。ステージの練習はいつでもできるよ！")
+
+    render_chat(chat_status_area, chat_bonus_area)
+
+    if st.button("🏠 タイトルにもどる"):
+        session.page = "home"
+        st.rerun()
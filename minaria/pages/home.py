@@ -0,0 +1,76 @@
+"""
+ページ: タイトル（home）
+"""
+import streamlit as st
+
+from minaria.router import links_checked
+from minaria.ui import autoplay_video, current_session
+
+# ======================================================
+#  ページ: home
+# ======================================================
+def render(page: str):
+    session = current_session()
+    # #/stage1 などのリンクで開いたときは動画を送らない（確かめ終わるまで待つ。minaria/router.py）
+    if links_checked():
+        autoplay_video("minaria.mp4")
+
+    st.markdown(
+        """
+    <div style='text-align:center; padding:10px; font-size:18px; color:#5F4C5B;'>
+    こんにちは、冒険者さん。<br>
+    きょうも少しだけ、いっしょに歩いてみましょうね。🌼
+    </div>
+    """,
+        unsafe_allow_html=True,
+    )
+
+    st.markdown(
+        """
+    <div style='text-align:center; font-size:16px; color:#6A5A78;'>
+    ここはココモア王国。<br>
+    学びが小さな魔法になる、ふんわり優しい世界なの。<br>
+    Pythonの力で、バグモンスターたちを癒してあげましょう。  
+    </div>
+    """,
+        unsafe_allow_html=True,
+    )
+
+    st.markdown("---")
+    
+
+
+    # 1行目：導入 ＋ ステージ1
+    row1_col1, row1_col2 = st.columns(2)
+    with row1_col1:
+        if st.button("🌱 冒険をはじめる"):
+            session.page = "intro"
+            st.rerun()
+    with row1_col2:
+        if st.button("🌱 ステージ1：ポヨンのはらっぱ"):
+            session.page = "stage1"
+            st.rerun()
+
+    # 2行目：ステージ2 ＋ ステージ3
+    row2_col1, row2_col2 = st.columns(2)
+    with row2_col1:
+        if st.button("🌿 ステージ2：もりねむの小道"):
+            session.page = "stage2"
+            st.rerun()
+    with row2_col2:
+        if st.button("🌀 ステージ3：くるくるループの塔"):
+            session.page = "stage3"
+            st.rerun()
+
+    st.markdown("---")
+    
+
+    # マイページボタン
+    if st.button("📊 マイページ"):
+        session.page = "mypage"
+        st.rerun()
+
+    st.markdown(
+        "<div style='text-align:center; color:#A195A6; margin-top:20px;'>ココモア王国より 🌼</div>",
+        unsafe_allow_html=True,
+    )
@@ -0,0 +1,128 @@
+"""
+ページ: 導入シナリオ
+"""
+import streamlit as st
+
+from minaria.renditions import resolve_image
+from minaria.ui import current_session, play_sound
+
+# ---------- 導入シナリオ ----------
+INTRO_MESSAGE = """
+こんにちは、冒険者さん。ようこそココモア王国へ。
+
+ここは、小さな学びが魔法になる、ふんわり優しい世界なの。
+
+森には“バグモンスター”と呼ばれる、ちょっとドジでかわいい子たちがいてね……
+Pythonの魔法を覚えれば、その子たちを癒してあげられるの。
+
+大丈夫、急がなくていいのよ。
+今日から、少しずつ一緒に歩いていきましょうね。🌼
+"""
+
+# ======================================================
+#  この冒険でできるようになるメッセージ関数
+# ======================================================
+def render_promise_banner():
+    """
+    成長フェーズに応じて「約束メッセージ」を表示する
+    フェーズ1：初回〜ステージ1クリア前（フル表示）
+    フェーズ2：ステージ1クリア後（短縮）
+    フェーズ3：3日以上空いた再開時（おかえりなさい）
+    """
+    session = current_session()
+
+    stage1_cleared = session.stage(1).cleared
+    show_return = session.show_return_banner
+
+    # フェーズ3：久しぶり再開
+    if show_return:
+        st.markdown("""
+        <div style="background:#FDF5FF;padding:14px 16px;border-radius:14px;
+                    border:1px solid #E4D3F3;color:#5F4C5B;">
+          <div style="font-weight:700;font-size:16px;">🌼 おかえりなさい</div>
+          <div style="margin-top:6px;font-size:14px;line-height:1.7;">
+            ここでは、<b>パソコンに指示を出す文章（プログラム）</b>の考え方を、
+            ゆっくり身につけられますよ。
+          </div>
+        </div>
+        """, unsafe_allow_html=True)
+        return
+
+    # フェーズ1：初回〜ステージ1クリア前
+    if not stage1_cleared:
+        st.markdown("""
+        <div style="background:#F6FBFF;padding:14px 16px;border-radius:14px;
+                    border:1px solid #D6E9FF;color:#2A3B4C;">
+          <div style="font-weight:700;font-size:16px;">
+            この冒険でできるようになること
+          </div>
+          <div style="margin-top:6px;font-size:14px;line-height:1.7;">
+            ✅ パソコンに指示を出す文章（プログラム）が読める<br>
+            <span style="display:inline-block; margin-left:22px; font-size:12px; color:#5B6B7A;">
+          （「これを表示して」「ここだけ確認して」と伝える方法）
+            </span><br>
+            ✅ 仕事の作業を楽にする考え方が身につく<br>
+            ✅ 「自分にもできた！」という自信がつく
+          </div>
+          <div style="margin-top:8px;font-size:13px;color:#5B6B7A;">
+            学ぶこと：<b>print / 変数 / if / for</b>（まずはここだけ）
+          </div>
+        </div>
+        """, unsafe_allow_html=True)
+        return
+
+    # フェーズ2：ステージ1クリア後
+    st.markdown("""
+    <div style="background:#F6FBFF;padding:10px 14px;border-radius:14px;
+                border:1px solid #D6E9FF;color:#2A3B4C;">
+      <div style="font-size:14px;line-height:1.6;">
+        🌱 パソコンに指示を出す文章（プログラム）の考え方を、
+        少しずつ覚えていきましょう
+      </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+# ======================================================
+#  ページ: 導入シナリオ
+# ======================================================
+def render(page: str):
+    session = current_session()
+
+    # ミナリア画像
+    st.image(resolve_image("minaria.png"), use_container_width=True)
+
+    # ★ 成長フェーズに応じた「約束」バナー（画像の直下）
+    render_promise_banner()
+
+    st.markdown(
+        "<h3 style='text-align:center; color:#6A5A78;'>ミナリアのことば</h3>",
+        unsafe_allow_html=True,
+    )
+
+    st.markdown(
+        f"<div style='background-color:#FDF5FF; padding:20px; border-radius:15px; "
+        f"border:1px solid #E4D3F3; color:#5F4C5B; font-size:16px;'>"
+        f"{INTRO_MESSAGE.replace(chr(10), '<br>')}</div>",
+        unsafe_allow_html=True,
+    )
+
+    st.markdown("")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # ✅ 初心者のメイン導線：intro → stage1
+        if st.button("🌱 学習をはじめる（ステージ1へ）"):
+            session.page = "stage1"
+            # ステージ1の導入画面（step=-1）から始めたいならこれでOK（既に -1 が初期）
+            st.rerun()
+
+    play_sound("sounds/title_fanfare.mp3")
+
+    if st.button("👩‍🍼 ミナリアと話してみる"):
+        session.page = "chat"
+        st.rerun()
+
+    if st.button("🏠 タイトルにもどる"):
+        session.page = "home"
+        st.rerun()
@@ -0,0 +1,198 @@
+"""
+ページ: マイページ（進捗ダッシュボード）
+"""
+import streamlit as st
+
+from minaria.question_bank import get_questions  # 問題バンク（content/stageN.json）
+from minaria.stages import STAGE_DEFS
+from minaria.ui import current_session, get_title_by_xp
+
+# ======================================================
+#  ページ: マイページ（進捗ダッシュボード）
+# ======================================================
+def render(page: str):
+    session = current_session()
+    st.subheader("📊 冒険者マイページ")
+        
+    st.markdown("### 🧑‍🚀 ステータス")
+    # play_sound("sounds/yurukawa_top_loop_v2.mp3")
+    
+    # -------------------------
+    # XP 称号システム（表示）
+    # -------------------------
+    xp = session.xp
+    title_info = get_title_by_xp(xp)
+
+    # 現在の称号バッジ
+    st.markdown(
+        f"""
+        <div style="
+            padding:12px;
+            border-radius:12px;
+            border:1px solid #DDC7F7;
+            background-color:#F9F5FF;
+            margin-top:10px;
+            margin-bottom:10px;
+        ">
+            <div style="font-size:18px; color:#5F4C5B; font-weight:bold;">
+                🏅 あなたの今の称号：{title_info["current_name"]}
+            </div>
+            <div style="font-size:14px; color:#7A6A80; margin-top:4px;">
+                総XP：<b>{xp}</b>
+            </div>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # 次の称号がある場合のみ
+    if title_info["next_name"]:
+        st.markdown(
+            f"次の称号 <b>{title_info['next_name']}</b> まで、あと <b>{title_info['need_xp']}</b> XP",
+            unsafe_allow_html=True,
+        )
+        st.progress(title_info["progress_ratio"])
+    else:
+        st.success("🎉 あなたは最高ランク「ココモア王国のまもりびと」に到達しました！")
+
+
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.markdown(f"**レベル：{session.level}**")
+    with col_b:
+        st.markdown(f"**経験値（XP）：{session.xp}**")
+
+    st.markdown("---")
+
+    # -------------------------
+    # ステージ進捗（solved ベース）
+    # -------------------------
+    solved = session.solved
+
+    # ステージごとに (StageDef, 最後のステップまで解き切った数, 問題数)
+    progress = []
+    for stage in STAGE_DEFS:
+        total = len(get_questions(stage.number))
+        progress.append((stage, stage.done_count(solved, total), total))
+    # まだ解き切っていない最初のステージ（ぜんぶクリアなら None）
+    next_stage = next((stage for stage, done, total in progress if done < total), None)
+
+    # -------------------------
+    # できることバッジ（成果の見える化。ステージをクリアするとそのステージのバッジがつく）
+    # -------------------------
+    st.markdown("### ✅ できるようになったこと")
+
+    def skill_pill(text, unlocked):
+        bg = "#DFF7E7" if unlocked else "#EFEFEF"
+        fg = "#2A3B4C" if unlocked else "#888888"
+        icon = "🏅" if unlocked else "⬜"
+        return f"""
+        <span style="
+            display:inline-block;
+            padding:8px 12px;
+            margin:4px 6px 0 0;
+            border-radius:999px;
+            background:{bg};
+            color:{fg};
+            border:1px solid #DDDDDD;
+            font-size:14px;
+        ">{icon} {text}</span>
+        """
+
+    st.markdown(
+        "".join(
+            skill_pill(text, done >= total)
+            for stage, done, total in progress
+            for text, _hint in stage.skills
+        ),
+        unsafe_allow_html=True
+    )
+    
+    # ✅ ここに追加（バッジの説明を集約）
+    st.info(
+        "💡 バッジは「仕事で役立つ力」の目印です："
+        + " / ".join(hint for stage, _done, _total in progress for _text, hint in stage.skills)
+    )
+    
+    # -------------------------
+    # 次にやること（1つだけ）
+    # -------------------------
+    st.markdown("### 👉 次にやること")
+
+    # 進捗に応じて1つだけ提案
+    if next_stage is not None:
+        st.info(next_stage.next_message or f"次は {next_stage.title} へ進みましょう")
+        if st.button(f"▶ ステージ{next_stage.number}へ行く"):
+            session.page = next_stage.page
+            st.rerun()
+
+    else:
+        first_stage = STAGE_DEFS[0]
+        st.success("🎉 ぜんぶクリア！おつかれさまでした。復習して自信を固めましょう。")
+        if st.button(f"🔁 ステージ{first_stage.number}で復習する"):
+            session.page = first_stage.page
+            st.rerun()
+ 
+    st.markdown("---")
+
+    def stage_badge(done, total):
+        if done >= total:
+            return "💚 <b>CLEAR!</b>", "#B7EB8F"
+        elif done == 0:
+            return "⬜ <b>未スタート</b>", "#C9B4F9"
+        else:
+            return "🟡 <b>進行中…</b>", "#FFF6DA"
+
+
+# ======================================================
+#  ステージ進捗
+# ======================================================
+    def stage_card(title, done, total):
+        badge_text, bg_color = stage_badge(done, total)
+        ratio = min(done / total, 1.0) if total else 0.0
+
+        st.markdown(
+            f"""
+            <div style="
+                background-color:{bg_color};
+                padding:15px;
+                border-radius:15px;
+                border:1px solid #DDD;
+                margin-bottom:12px;
+            ">
+                <div style="font-size:20px; font-weight:bold; color:#5F4C5B;">{title}</div>
+                <div style="margin:5px 0; font-size:16px; color:#5F4C5B;">
+                    進捗：<b>{done} / {total}</b> 問　
+                    {badge_text}
+                </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+
+        st.progress(ratio)
+
+    st.markdown("### 🗺 ステージ進捗")
+
+    for stage, done, total in progress:
+        stage_card(stage.title, done, total)
+
+    st.markdown("---")
+
+    st.markdown("### 🎖 次のおすすめ行動")
+    if next_stage is not None:
+        st.write(next_stage.recommend_message or f"次は **{next_stage.title}** にチャレンジしよう。")
+    else:
+        st.success("✨ すごい！今あるステージはぜんぶ CLEAR しているよ！Python基礎の魔法はばっちり。")
+
+    st.markdown("---")
+
+    col_back1, col_back2 = st.columns(2)
+    with col_back1:
+        if st.button("🏠 タイトルにもどる"):
+            session.page = "home"
+            st.rerun()
+    with col_back2:
+        if st.button("👩‍🍼 ミナリアとお話する（チャットへ）"):
+            session.page = "chat"
+            st.rerun()
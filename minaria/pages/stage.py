@@ -0,0 +1,383 @@
+"""
+ページ: ステージ（minaria/stages.py の StageDef どおりに描く。stage1〜stageN で共通）
+"""
+import streamlit as st
+
+from minaria.assets import asset_exists  # アセット一覧（起動時に1回だけ調べる）
+from minaria.question_bank import get_question_bank  # 問題バンク（content/stageN.json）
+from minaria.renditions import resolve_image  # 軽量版（python -m minaria.build ...）
+from minaria.sandbox import get_sandbox_pool  # 学習者のコードを動かすワーカー
+from minaria.stages import stage_for_page  # ステージの定義（ステップ・XP・クリア演出）
+from minaria.ui import (
+    autoplay_video,
+    award_xp_once,
+    current_session,
+    fragment,
+    go_to,
+    one_time_button,
+    play_sound,
+    render_question_progress,
+    save_progress,
+    show_correct_feedback,
+    show_video,
+)
+
+# ---------- ステージ ----------
+# ステップの流れ・XP・クリア演出は minaria/stages.py、問題は content/stageN.json
+# （プロセスで1回だけ読み、ファイルが更新されたときだけ読みなおす）。
+
+# ======================================================
+#  ステージ共通の描き方（minaria/stages.py の StageDef どおりに描く）
+# ======================================================
+def render_stage_intro(stage):
+    """導入ステップ（説明 → はじめるボタン）"""
+    session = current_session()
+    st.markdown(stage.description)
+    st.markdown("---")
+    for html in stage.intro_html:
+        st.markdown(html, unsafe_allow_html=True)
+    if stage.intro_sound:
+        play_sound(stage.intro_sound)
+
+    if st.button(stage.start_label):
+        session.stage(stage.number).step = 0
+        st.rerun()
+
+def render_stage_clear(stage, state):
+    """全問クリア画面"""
+    state.cleared = True
+
+    st.success(f"✨ ステージ{stage.number}『{stage.name}』をクリアしたよ！")
+    st.info(stage.clear_message)
+
+    # 🎞 クリア動画（streamlit.app では autoplay より st.video のほうが安定）
+    if stage.clear_video:
+        if stage.clear_video_autoplay:
+            autoplay_video(stage.clear_video, width="70%")
+        else:
+            show_video(stage.clear_video)
+        state.clear_played = True
+
+    st.markdown(stage.clear_heading)
+
+    columns = st.columns(len(stage.clear_links) + 1)
+    for column, (label, page) in zip(columns, stage.clear_links):
+        with column:
+            if st.button(label, key=f"stage{stage.number}_to_{page}"):
+                go_to(page)
+
+    with columns[-1]:
+        if st.button("🔁 このステージを復習する", key=f"stage{stage.number}_review_restart"):
+            state.index = 0
+            state.step = -1
+            state.passed = False
+            state.review = True
+            st.rerun()
+
+def render_monster(q):
+    """👾 モンスター表示（どのステップでも共通）"""
+    session = current_session()
+    st.markdown("---")
+    st.markdown(f"### 👾 きょうのバグモンスター：{q['monster_name']}")
+
+    monster = q["monster_name"]
+
+    if session.prev_monster != monster:
+        voice_path = q.get("voice_file")
+        if voice_path:
+            play_sound(voice_path)
+
+    session.prev_monster = monster
+
+    img_path = q.get("monster_image")
+    if img_path and asset_exists(img_path):
+        st.image(resolve_image(img_path), use_container_width=True)
+    else:
+        st.caption("※ まだイラストは準備中だけど、ここにモンスターの絵が入る予定だよ。")
+
+    st.markdown(q["monster_desc"])
+    st.markdown("---")
+
+def render_next_button(stage, state, idx):
+    """正解したら「次へ」ボタン（最後のステップなら次の問題へ）"""
+    if not state.passed:
+        return
+    step = stage.steps[state.step]
+    if st.button(step.next_label, key=f"stage{stage.number}_next_{idx}_{state.step}"):
+        state.passed = False
+        if state.step + 1 < len(stage.steps):
+            state.step += 1
+        else:
+            state.index += 1
+            state.step = 0
+        st.rerun()
+
+def render_run_result(result):
+    """学習者のコードを動かした結果（📺 出力）"""
+    st.markdown("#### 📺 出力")
+
+    if result.timed_out:
+        st.warning(f"⏳ {result.error}。くり返しが止まらなくなっていないか見てみよう。")
+        return
+
+    if result.stdout:
+        st.code(result.stdout.rstrip("\n"), language=None)
+        if result.truncated:
+            st.caption("※ 出力が多いので、とちゅうまでにしたよ")
+    elif not result.error:
+        st.code("（画面には何も表示されません）", language=None)
+
+    if result.error:
+        st.error(f"うまく動かなかったみたい（{result.error_type}）：{result.error}")
+    elif result.stdout:
+        st.success("💡 print の中に書いたものが、そのまま画面に表示されているよ！")
+    elif result.variables:
+        name, value = next(iter(result.variables.items()))
+        st.info(f"これは「{name} に {value} を入れる練習」だよ。 表示されないのが正解！")
+    else:
+        st.info("この問題は、表示のしくみを練習するステップだよ。")
+
+    if result.variables and result.stdout:
+        st.caption("📦 箱の中身：" + " / ".join(f"{name} = {value}" for name, value in result.variables.items()))
+
+def render_copy_step(stage, state, bank, idx):
+    """見本どおりに写す"""
+    q = bank.questions[idx]
+    st.markdown("""
+    <div style="
+        background:#F8FAFC;
+       padding:10px 14px;
+       border-radius:12px;
+       border-left:4px solid #94A3B8;
+       color:#334155;
+       font-size:14px;
+       line-height:1.6;
+       margin-bottom:10px;
+    ">
+       ※ ここは「まねして書く」だけで大丈夫。<br>
+       意味は、あとで少しずつ分かってきます 🌱
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.info(q["lesson_intro"])
+
+    st.markdown("#### ✏ まずは見本どおりに書いてみよう")
+    st.code(q["copy_sample"], language="python")
+
+    code_input = st.text_area(
+        "ここにまねして書いてみてね：",
+        key=f"stage{stage.number}_copy_{idx}",
+        height=80,
+    )
+
+    # --------------------------------------
+    # 👀 実行するとこう表示されるよ（出力）
+    # ※ 問題バンクを読むときに見本コードを動かしておいた結果（minaria/question_bank.py）
+    # --------------------------------------
+    st.markdown("#### 👀 実行するとこうなるよ（見本）")
+
+    preview = bank.previews[idx]["copy_sample"]
+    st.code(preview.output, language=None)
+    if preview.caption:
+        st.caption(preview.caption)
+
+    # --------------------------------------
+    # ✅ 正解チェック（1回だけ押せる）
+    # --------------------------------------
+    if one_time_button(
+        "できたかチェック",
+        key=f"stage{stage.number}_copy_btn_{idx}",
+        allow_retry=state.review,
+    ):
+
+        if not code_input.strip():
+            st.warning("なにも入力されていないみたい。少しだけでいいから、まねして書いてみよう。")
+            state.passed = False
+
+        elif bank.answers[idx]["copy_sample"].matches(code_input):
+
+            state.passed = True
+            state.remember_copy(idx, code_input)
+
+            # ⭐ フィードバック（XP）
+            if state.review:
+                show_correct_feedback(
+                    message="ばっちり！見本どおりに書けたよ。（復習モードなのでXPは変わらないよ）",
+                    xp_gain=0,
+                    monster_emoji="🐣",
+                )
+            else:
+                award_xp_once(
+                    key=stage.solved_key(idx, state.step),
+                    xp=stage.steps[state.step].xp,
+                    message="ばっちり！見本どおりに書けたよ。下で実行して結果を見てみよう。",
+                    emoji="🐣",
+                )
+
+        else:
+            st.error("うーん、少しちがうみたい。スペルやカッコの位置を見比べてみよう。")
+            state.passed = False
+
+    # ==================================================
+    # 🎯 正解後：printの「現象」を体験させるゾーン
+    # ==================================================
+    if state.passed:
+
+        if st.button("▶ 実行してみる", key=f"run_stage{stage.number}_copy_{idx}"):
+            render_run_result(get_sandbox_pool().run(state.copied_code(idx)))
+
+    render_next_button(stage, state, idx)
+
+def render_quiz_step(stage, state, bank, idx):
+    """3択問題"""
+    q = bank.questions[idx]
+    st.markdown(f"**{q['text']}**")
+
+    last_code = state.copied_code(idx)
+    if last_code:
+        with st.expander("💾 さっき写したコードをもう一度見る"):
+            st.code(last_code, language="python")
+
+    user_choice = st.radio(
+        "正しいと思うものをえらんでね：",
+        q["choices"],
+        index=None,
+        key=f"stage{stage.number}_choice_{idx}",
+    )
+
+    if st.button("解答する", key=f"stage{stage.number}_submit_{idx}"):
+
+        # 選択されていない場合
+        if user_choice is None:
+            st.warning("どれか1つを選んでから、『解答する』ボタンを押してね。")
+            state.passed = False
+
+        elif user_choice == q["choices"][q["correct_index"]]:
+
+            # ⭐ 復習モード → XPは与えない（初回か2回目以降かは award_xp_once が判定）
+            if state.review:
+                st.success(stage.quiz_review_message)
+            else:
+                award_xp_once(
+                    key=stage.solved_key(idx, state.step),
+                    xp=stage.steps[state.step].xp,
+                    message=stage.quiz_message,
+                    emoji=stage.quiz_emoji,
+                )
+            st.info(f"ミナリア：{q['explain']}")
+
+            state.passed = True
+
+        # ❌ 不正解の場合
+        else:
+            st.error(stage.quiz_wrong_message)
+            st.info(f"ミナリア：ヒントね。{q['hint']}")
+            state.passed = False
+
+    # ✅ 正解後は「次へ進む」ボタンを表示（ボタン処理の外側で判定）
+    render_next_button(stage, state, idx)
+
+def render_rewrite_step(stage, state, bank, idx):
+    """もう一度、自分の手で書く"""
+    q = bank.questions[idx]
+    st.markdown("#### ✏ もう一度、自分の手で書いてみよう")
+    st.markdown(q["rewrite_prompt"])
+
+    last_code = state.copied_code(idx)
+    if last_code:
+        with st.expander("💾 さっき写したコードを見る"):
+            st.code(last_code, language="python")
+
+    rewrite_input = st.text_area(
+        "ここにコードを書いてみてね：",
+        key=f"stage{stage.number}_rewrite_{idx}",
+        height=80,
+    )
+
+    # 🔘 判定ボタン
+    if st.button("できたかチェック", key=f"stage{stage.number}_rewrite_btn_{idx}"):
+
+        # 入力なしチェック
+        if not rewrite_input.strip():
+            st.warning("まだ何も書かれていないみたい。1行だけでいいよ。")
+            state.passed = False
+
+        # 🎉 正解 / 不正解処理（構文木でくらべる。好きな名前OKなどは問題バンクの answer_rules）
+        elif bank.answers[idx]["rewrite_answer"].matches(rewrite_input):
+            if state.review:
+                st.success("✨ いい感じ！（復習モードなのでXPなし）")
+            else:
+                award_xp_once(
+                    key=stage.solved_key(idx, state.step),
+                    xp=stage.steps[state.step].xp,
+                    message="自分の力で書けたね！とってもいい感じ！",
+                    emoji="✨",
+                )
+
+            state.passed = True
+
+        else:
+            st.error("うーん、少し違うみたい。見本の形を思い出してみよう。")
+            state.passed = False
+
+    render_next_button(stage, state, idx)
+
+# ステップの種類 → 描く関数
+STEP_RENDERERS = {
+    "copy": render_copy_step,
+    "quiz": render_quiz_step,
+    "rewrite": render_rewrite_step,
+}
+
+@fragment("stage_step")
+def render_step(stage, state, bank, idx):
+    """いまのステップ（入力・チェック・実行はこの中だけリランする。「次へ」で全体をリランする）"""
+    STEP_RENDERERS[stage.steps[state.step].kind](stage, state, bank, idx)
+    # 全体のリランを待たずに、ここで変わった XP・solved を保存する
+    save_progress()
+
+def render_stage(stage):
+    session = current_session()
+    state = session.stage(stage.number)
+    bank = get_question_bank(stage.number)
+    questions = bank.questions
+
+    st.subheader(stage.title)
+
+    if stage.has_intro:
+        # ⭐ 導入画面はここで止める（この下の問題表示に進ませない）
+        if state.step < 0:
+            render_stage_intro(stage)
+            st.stop()
+    else:
+        st.markdown(stage.description)
+    if not 0 <= state.step < len(stage.steps):
+        state.step = 0
+
+    # 進捗バー
+    idx = state.index
+    render_question_progress(idx, len(questions), label=f"ステージ{stage.number}の進み具合：")
+
+    # 🌟 全問クリア
+    if idx >= len(questions):
+        render_stage_clear(stage, state)
+        # ✅ クリア画面で止める（下に混ざらないように）
+        st.stop()
+
+    render_monster(questions[idx])
+    render_step(stage, state, bank, idx)
+
+    # ---------------------------------------------------
+    # ページ下部の共通ボタン（どのステップでも表示）
+    # ---------------------------------------------------
+    st.markdown("---")
+
+    if st.button("👩‍🍼 ミナリアとお話する（チャットへ）", key=f"stage{stage.number}_to_chat"):
+        go_to("chat")
+
+    if st.button("🏠 タイトルにもどる", key=f"stage{stage.number}_back_home"):
+        go_to("home")
+
+
+def render(page: str):
+    render_stage(stage_for_page(page))
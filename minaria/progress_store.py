@@ -0,0 +1,357 @@
+"""
+学習の進みぐあい（XP・レベル・解いた問題・各ステージの位置とクリア）の保存先
+
+これまでは xp_data.json 1つに {"xp": N} だけを書いていたので、
+サーバーで何人かが同時に遊ぶとおたがいの XP を上書きしていたし、
+solved やステージの位置は再起動で消えていた。
+ここでは SQLite（WAL モード）に、学習者ごとの行として保存する。
+
+  store = get_progress_store()
+  progress = store.load("learner-id")   # st.session_state と同じキーの dict
+  store.save("learner-id", progress)    # 1回のトランザクションで書く
+
+アプリからは get_progress_writer() を通して書く（その場では書かず、裏のスレッドで
+学習者ごとにまとめて書く。minaria.write_behind）。
+
+progress のキー
+  xp, level, solved                     （solved は {"stage1_0_step2": True, ...}）
+  stage{N}_index, stage{N}_cleared      （N = STAGES。minaria.stages の STAGE_DEFS の番号）
+
+テーブル
+  learners        学習者ごとに1行（xp / level / solved）
+  stage_progress  (学習者, ステージ) ごとに1行（主キーで引くので学習者1人ぶんがすぐ読める）
+
+SQLite が使えない置き場所（共有ディレクトリなど）では MINARIA_PROGRESS_BACKEND=json にすると、
+学習者ごとの JSON ファイルに保存する（minaria.fileio で atomic に書き、プロセス間でロックし、
+チェックサムと前の世代を残す）。複数の Streamlit プロセスが同じディレクトリを使っても安全。
+
+環境変数
+  MINARIA_PROGRESS_BACKEND  sqlite（既定）/ json
+  MINARIA_PROGRESS_DB    DB ファイル（既定 data/progress.sqlite3）
+  MINARIA_PROGRESS_POOL  使い回す接続の数（既定 4）
+  MINARIA_PROGRESS_DIR   json のときの保存先（既定 data/progress）
+  MINARIA_PROGRESS_FLUSH_SEC  まとめ書きの間隔（既定 1 秒）
+  MINARIA_PROGRESS_FLUSH_MAX  これだけたまったら間隔を待たずに書く（既定 32 人ぶん）
+
+  python -m minaria.progress_store show <learner>          保存内容を表示
+  python -m minaria.progress_store import-json <learner>   昔の xp_data.json の XP を取りこむ
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import re
+import time
+
+from minaria.fileio import CorruptFileError, file_lock, read_checked_json, write_checked_json
+from minaria.stages import STAGE_DEFS
+from minaria.write_behind import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent
+DB_PATH = pathlib.Path(os.getenv("MINARIA_PROGRESS_DB", BASE_DIR / "data" / "progress.sqlite3"))
+POOL_SIZE = int(os.getenv("MINARIA_PROGRESS_POOL", "4"))
+BACKEND = os.getenv("MINARIA_PROGRESS_BACKEND", "sqlite")
+JSON_DIR = pathlib.Path(os.getenv("MINARIA_PROGRESS_DIR", BASE_DIR / "data" / "progress"))
+FLUSH_INTERVAL = float(os.getenv("MINARIA_PROGRESS_FLUSH_SEC", "1.0"))
+FLUSH_MAX = int(os.getenv("MINARIA_PROGRESS_FLUSH_MAX", "32"))
+
+# ステージの番号（ステージを足すのは minaria.stages の STAGE_DEFS だけでよい）
+STAGES = tuple(stage.number for stage in STAGE_DEFS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS learners (
+    learner_id  TEXT PRIMARY KEY,
+    xp          INTEGER NOT NULL DEFAULT 0,
+    level       INTEGER NOT NULL DEFAULT 1,
+    solved      TEXT    NOT NULL DEFAULT '{}',
+    updated_at  REAL    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stage_progress (
+    learner_id  TEXT    NOT NULL REFERENCES learners(learner_id) ON DELETE CASCADE,
+    stage       INTEGER NOT NULL,
+    idx         INTEGER NOT NULL DEFAULT 0,
+    cleared     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (learner_id, stage)
+) WITHOUT ROWID;
+"""
+
+
+def default_progress() -> dict:
+    """まだ何も保存していない学習者の進みぐあい"""
+    progress = {"xp": 0, "level": 1, "solved": {}}
+    for stage in STAGES:
+        progress[f"stage{stage}_index"] = 0
+        progress[f"stage{stage}_cleared"] = False
+    return progress
+
+
+def progress_keys():
+    return tuple(default_progress())
+
+
+class ConnectionPool:
+    """
+    SQLite の接続を使い回す。接続は作るたびに PRAGMA を流すので、
+    リランのたびに開け閉めせず、スレッドをまたいで貸し出す。
+    """
+
+    def __init__(self, path, size: int = POOL_SIZE):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: トランザクションは BEGIN / COMMIT で自分で区切る
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ProgressStore:
+    def __init__(self, path=DB_PATH, pool_size: int = POOL_SIZE):
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """書きこみ用。BEGIN IMMEDIATE で先に書きこみロックを取り、失敗したら全部もどす。"""
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _read(conn, learner_id: str) -> dict:
+        progress = default_progress()
+        row = conn.execute(
+            "SELECT xp, level, solved FROM learners WHERE learner_id = ?", (learner_id,)
+        ).fetchone()
+        if row is None:
+            return progress
+
+        progress["xp"], progress["level"] = int(row[0]), int(row[1])
+        try:
+            progress["solved"] = json.loads(row[2])
+        except ValueError:
+            pass
+        for stage, idx, cleared in conn.execute(
+            "SELECT stage, idx, cleared FROM stage_progress WHERE learner_id = ?", (learner_id,)
+        ):
+            progress[f"stage{stage}_index"] = int(idx)
+            progress[f"stage{stage}_cleared"] = bool(cleared)
+        return progress
+
+    def load(self, learner_id: str) -> dict:
+        with self.pool.connection() as conn:
+            return self._read(conn, learner_id)
+
+    def save(self, learner_id: str, progress: dict) -> None:
+        """progress に入っているキーだけを書く（なければ今の値のまま）"""
+        with self.transaction() as conn:
+            self._write(conn, learner_id, progress)
+
+    def save_many(self, batch: dict) -> None:
+        """{learner_id: progress} をまとめて1回のトランザクションで書く"""
+        with self.transaction() as conn:
+            for learner_id, progress in batch.items():
+                self._write(conn, learner_id, progress)
+
+    @classmethod
+    def _write(cls, conn, learner_id: str, progress: dict) -> None:
+        current = cls._read(conn, learner_id)
+        current.update({k: v for k, v in progress.items() if k in current})
+
+        conn.execute(
+            """
+            INSERT INTO learners (learner_id, xp, level, solved, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(learner_id) DO UPDATE SET
+                xp = excluded.xp, level = excluded.level,
+                solved = excluded.solved, updated_at = excluded.updated_at
+            """,
+            (
+                learner_id,
+                int(current["xp"]),
+                int(current["level"]),
+                json.dumps(current["solved"], ensure_ascii=False, sort_keys=True),
+                time.time(),
+            ),
+        )
+        conn.executemany(
+            """
+            INSERT INTO stage_progress (learner_id, stage, idx, cleared) VALUES (?, ?, ?, ?)
+            ON CONFLICT(learner_id, stage) DO UPDATE SET idx = excluded.idx, cleared = excluded.cleared
+            """,
+            [
+                (learner_id, stage, int(current[f"stage{stage}_index"]), int(bool(current[f"stage{stage}_cleared"])))
+                for stage in STAGES
+            ],
+        )
+
+    def learner_count(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM learners").fetchone()[0]
+
+
+# ======================================================
+#  学習者ごとの JSON ファイル
+# ======================================================
+_FILE_SAFE_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class JsonProgressStore:
+    """
+    1人1ファイル（<dir>/<learner>.json）。ProgressStore と同じ load / save / save_many。
+    書くときは「ロック → 今の中身を読む → 合わせる → atomic に置きかえ」を1人ずつ行う。
+    """
+
+    def __init__(self, directory=JSON_DIR):
+        self.dir = pathlib.Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, learner_id: str) -> pathlib.Path:
+        if not _FILE_SAFE_ID.fullmatch(learner_id):
+            raise ValueError(f"ファイル名に使えない学習者IDです: {learner_id!r}")
+        return self.dir / f"{learner_id}.json"
+
+    def _read(self, path: pathlib.Path) -> dict:
+        progress = default_progress()
+        try:
+            saved = read_checked_json(path)
+        except FileNotFoundError:
+            return progress
+        except CorruptFileError:
+            logger.warning("%s がこわれていたので、最初からにします", path)
+            return progress
+        progress.update({k: v for k, v in saved.items() if k in progress})
+        return progress
+
+    def load(self, learner_id: str) -> dict:
+        path = self._path(learner_id)
+        with file_lock(path, shared=True):
+            return self._read(path)
+
+    def save(self, learner_id: str, progress: dict) -> None:
+        path = self._path(learner_id)
+        with file_lock(path):
+            current = self._read(path)
+            current.update({k: v for k, v in progress.items() if k in current})
+            write_checked_json(path, current)
+
+    def save_many(self, batch: dict) -> None:
+        for learner_id, progress in batch.items():
+            self.save(learner_id, progress)
+
+    def learner_count(self) -> int:
+        return sum(1 for _ in self.dir.glob("*.json"))
+
+
+# ======================================================
+#  プロセス全体で1つだけのストア
+# ======================================================
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store():
+    """MINARIA_PROGRESS_BACKEND で選んだストア（ProgressStore か JsonProgressStore）"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if BACKEND == "json":
+                    _store = JsonProgressStore()
+                elif BACKEND == "sqlite":
+                    _store = ProgressStore()
+                else:
+                    raise ValueError(f"MINARIA_PROGRESS_BACKEND が不明です: {BACKEND}（sqlite / json）")
+    return _store
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_progress_writer() -> WriteBehindQueue:
+    """進みぐあいの write-behind キュー（学習者ごとに最新の状態だけを、まとめて書く）"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = WriteBehindQueue(
+                    get_progress_store().save_many,
+                    name="progress",
+                    interval=FLUSH_INTERVAL,
+                    max_pending=FLUSH_MAX,
+                )
+    return _writer
+
+
+def load_progress(learner_id: str) -> dict:
+    """まだ書いていない分があればそれを、なければ DB の内容を返す"""
+    pending = get_progress_writer().pending(learner_id)
+    if pending is not None:
+        progress = default_progress()
+        progress.update(pending)
+        return progress
+    return get_progress_store().load(learner_id)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="学習の進みぐあいの保存先（SQLite / JSON）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="保存内容を表示する")
+    show.add_argument("learner")
+    imp = sub.add_parser("import-json", help="昔の xp_data.json の XP を取りこむ")
+    imp.add_argument("learner")
+    imp.add_argument("--file", default=str(BASE_DIR / "xp_data.json"))
+    args = parser.parse_args(argv)
+
+    store = get_progress_store()
+    if args.command == "show":
+        print(json.dumps(store.load(args.learner), ensure_ascii=False, indent=2))
+    elif args.command == "import-json":
+        with open(args.file, "r", encoding="utf-8") as f:
+            xp = int(json.load(f).get("xp", 0))
+        store.save(args.learner, {"xp": xp, "level": max(1, xp // 50 + 1)})
+        print(f"{args.learner}: xp={xp} を取りこみました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+モデル（チャット・言い換え・音声化）の呼び出し口
+
+アプリは OpenAI を直接さわらず、ここの Provider を通して呼ぶ。
+
+  provider.stream_text(model, messages)   返事をストリームで（少しずつの文字列を yield）
+  provider.complete_text(model, messages) 返事をまとめて（言い換え・要約など）
+  provider.synthesize(text, model, voice) 音声化（mp3 のバイト列）
+
+バックエンド（環境変数 MINARIA_PROVIDER）
+  openai  本物の OpenAI API（既定）
+  local   ネットにつながない、決まった返事を返すダミー。
+          待ち時間をわざと入れられるので、お金をかけずに負荷試験・ベンチマークができる。
+
+openai（と、その中で使う minaria.openai_client）は、初めてモデルを呼ぶときまで import しない。
+起動が速くなり、APIキーがなくてもステージ1〜3やマイページはそのまま動く
+（そのときは ai_available() が False になり、アプリは AI 機能だけお休みにする）。
+
+local の待ち時間（秒）
+  MINARIA_LOCAL_LATENCY      最初の文字までの待ち（既定 0.3）
+  MINARIA_LOCAL_TOKEN_DELAY  文字のかたまり1つごとの待ち（既定 0.02）
+  MINARIA_LOCAL_TTS_LATENCY  音声化1回の待ち（既定 0.4）
+"""
+import contextlib
+import hashlib
+import os
+import threading
+import time
+
+
+class Provider:
+    """バックエンドの共通の形。name はキャッシュのキーなどに使う。"""
+
+    name = "base"
+    audio_mime = "audio/mp3"
+
+    def stream_text(self, model: str, messages):
+        raise NotImplementedError
+
+    def complete_text(self, model: str, messages) -> str:
+        return "".join(self.stream_text(model, messages))
+
+    def synthesize(self, text: str, model: str, voice: str) -> bytes:
+        raise NotImplementedError
+
+
+# ======================================================
+#  OpenAI
+# ======================================================
+class OpenAIProvider(Provider):
+    """
+    呼び出しはどれも minaria.openai_client の再試行・同時実行の上限を通す
+    （openai の import を遅らせるため、使うところで import する）。
+    """
+
+    name = "openai"
+
+    def __init__(self, client):
+        self.client = client
+
+    def stream_text(self, model: str, messages):
+        from minaria.openai_client import stream_with_retry
+
+        stream = stream_with_retry(lambda: self.client.responses.create(model=model, input=messages, stream=True))
+        with contextlib.closing(stream):
+            for event in stream:
+                if getattr(event, "type", "") == "response.output_text.delta":
+                    yield event.delta
+
+    def complete_text(self, model: str, messages) -> str:
+        from minaria.openai_client import with_retry
+
+        return with_retry(self.client.responses.create, model=model, input=messages).output_text
+
+    def synthesize(self, text: str, model: str, voice: str) -> bytes:
+        from minaria.openai_client import with_retry
+
+        return with_retry(self._synthesize, text, model, voice)
+
+    def _synthesize(self, text: str, model: str, voice: str) -> bytes:
+        # 届いたチャンクをつなげて返す
+        with self.client.audio.speech.with_streaming_response.create(
+            model=model,
+            voice=voice,
+            input=text,
+            response_format="mp3",
+        ) as response:
+            return b"".join(response.iter_bytes(8192))
+
+
+# ======================================================
+#  ローカルのダミー（決まった返事 ＋ 無音の mp3）
+# ======================================================
+_LOCAL_REPLIES = [
+    "「{topic}」のこと、話してくれてありがとう。いっしょにゆっくり考えようね。",
+    "なるほど、「{topic}」なんだね。あなたのペースで大丈夫だよ。",
+    "ふふっ、「{topic}」か〜。すてきだね！ つづきもきかせてほしいな。",
+    "「{topic}」って、ちょっとむずかしいよね。ひとつずつ見ていこう？",
+]
+
+# MPEG-1 Layer III / 128kbps / 44.1kHz / モノラルの無音フレーム（約26ms）。
+# サイド情報がすべて0なので、どのデコーダーでも無音として再生される。
+_SILENT_MP3_FRAME = b"\xff\xfb\x90\xc0" + bytes(417 - 4)
+_FRAME_SECONDS = 1152 / 44100
+
+# 1文字あたりのしゃべる長さ（無音の長さ）
+_SECONDS_PER_CHAR = 0.12
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+class LocalProvider(Provider):
+    """
+    同じ入力には必ず同じ返事を返す（入力のハッシュでテンプレートを選ぶ）。
+    待ち時間は本物の API に近い形（最初の文字まで待つ → 少しずつ届く）で入れる。
+    """
+
+    name = "local"
+
+    def __init__(self, latency: float = None, token_delay: float = None, tts_latency: float = None,
+                 chunk_chars: int = 2):
+        self.latency = _env_float("MINARIA_LOCAL_LATENCY", 0.3) if latency is None else latency
+        self.token_delay = _env_float("MINARIA_LOCAL_TOKEN_DELAY", 0.02) if token_delay is None else token_delay
+        self.tts_latency = _env_float("MINARIA_LOCAL_TTS_LATENCY", 0.4) if tts_latency is None else tts_latency
+        self.chunk_chars = chunk_chars
+
+    def reply_for(self, messages) -> str:
+        """最後のユーザー発言から、決まった返事を作る"""
+        last = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        topic = last.strip().splitlines()[0][:20] if last.strip() else "…"
+        digest = hashlib.sha256(last.encode("utf-8")).digest()
+        return _LOCAL_REPLIES[digest[0] % len(_LOCAL_REPLIES)].format(topic=topic)
+
+    def stream_text(self, model: str, messages):
+        reply = self.reply_for(messages)
+        time.sleep(self.latency)
+        for i in range(0, len(reply), self.chunk_chars):
+            if i:
+                time.sleep(self.token_delay)
+            yield reply[i:i + self.chunk_chars]
+
+    def complete_text(self, model: str, messages) -> str:
+        reply = self.reply_for(messages)
+        time.sleep(self.latency + self.token_delay * (len(reply) // self.chunk_chars))
+        return reply
+
+    def synthesize(self, text: str, model: str, voice: str) -> bytes:
+        time.sleep(self.tts_latency)
+        frames = max(1, int(len(text) * _SECONDS_PER_CHAR / _FRAME_SECONDS))
+        return _SILENT_MP3_FRAME * frames
+
+
+# ======================================================
+#  環境変数からバックエンドを選ぶ
+# ======================================================
+PROVIDER_NAME = os.getenv("MINARIA_PROVIDER", "openai")
+
+
+def create_provider(name: str = PROVIDER_NAME) -> Provider:
+    if name == "local":
+        return LocalProvider()
+    if name == "openai":
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "OPENAI_API_KEY が設定されていません。環境変数を設定してください。"
+            )
+        from minaria.openai_client import get_client
+
+        # クライアントはプロセスで共有（リランしても接続プールが残る）
+        return OpenAIProvider(get_client(api_key))
+    raise ValueError(f"MINARIA_PROVIDER が不明です: {name}（openai / local）")
+
+
+def ai_available(name: str = PROVIDER_NAME) -> bool:
+    """AI 機能が使えるか（設定を見るだけで、openai は import しない）"""
+    if name == "local":
+        return True
+    return name == "openai" and bool(os.getenv("OPENAI_API_KEY"))
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str = PROVIDER_NAME):
+    """
+    初めて呼ばれたときに Provider を作って、以後はプロセスで使い回す。
+    AI 機能が使えない設定（APIキーなし）なら None を返す（例外にはしない）。
+    """
+    if not ai_available(name):
+        return None
+    key = (name, os.getenv("OPENAI_API_KEY"))
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = create_provider(name)
+            _providers[key] = provider
+        return provider
@@ -0,0 +1,364 @@
+"""
+問題バンク（content/stage1.json など）を読む
+
+これまでは STAGE1_QUESTIONS などの大きなリストが minaria_app.py に直接書いてあり、
+リランのたびに作り直していた。問題を足すにもアプリを書きかえて出しなおす必要があった。
+ここでは
+
+  ・問題は content/stage<N>.json（PyYAML が入っていれば .yaml / .yml も可）に置く
+  ・読むときにスキーマを確かめる（まちがいはファイル名と何問目かつきで QuestionBankError）
+  ・プロセスで1回だけ読んでキャッシュし、ファイルの更新時刻が変わったときだけ読みなおす
+  ・読みなおした中身がまちがっていたら、前に読めた中身を使いつづける（ログに出す）
+
+  questions = get_questions(1)    # tuple。中の dict は共有なので書きかえないこと
+  bank = get_question_bank(1)     # 問題と、読むときに作っておいたもの（下）
+
+読むときに1回だけ作っておくもの（描くときは引くだけ）
+  bank.answers[i]["copy_sample"]    正解（minaria.grading.ExpectedAnswer。.fingerprint つき）
+  bank.previews[i]["copy_sample"]   見本コードをほんとうに動かした出力と説明（Preview）
+  （rewrite_answer も同じ）
+
+問題の形（ステージ1だけ写経のお題が必須）
+  text / choices / correct_index   3択問題（choices は文字列2つ以上、correct_index はその番号）
+  hint / explain                   まちがえたときのヒント・正解の解説
+  monster_name / monster_desc      出てくるモンスター
+  monster_image / voice_file       モンスターの絵・ミナリアの声（なくてもよい）
+  lesson_intro                     ミナリアのやさしい導入
+  copy_sample                      まず “そのまま写す” 見本コード
+  rewrite_prompt / rewrite_answer  ちょっと変えてもう一度書くお題とその正解コード
+  answer_rules                     rewrite_answer とのくらべかた（minaria.grading のルール。なければ DEFAULT_RULES）
+
+  python -m minaria.question_bank     # 全ステージを確かめて、まちがいがあれば終了コード 1
+"""
+import ast
+import json
+import logging
+import os
+import pathlib
+import sys
+import threading
+import time
+
+from dataclasses import dataclass
+
+from minaria.grading import DEFAULT_RULES, GRADING_RULES, ExpectedAnswer
+from minaria.progress_store import STAGES
+from minaria.sandbox import get_sandbox_pool
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent
+CONTENT_DIR = pathlib.Path(os.getenv("MINARIA_CONTENT_DIR", BASE_DIR / "content"))
+
+# 同じステージのファイルが複数あれば、前にあるものを使う
+BANK_SUFFIXES = (".json", ".yaml", ".yml")
+
+# 更新チェックは最短でもこの秒数おき（renditions.ManifestFile と同じ）
+RELOAD_INTERVAL = 2.0
+
+# フィールド名 → 型
+QUESTION_FIELDS = {
+    "text": str,
+    "choices": list,
+    "correct_index": int,
+    "hint": str,
+    "explain": str,
+    "monster_name": str,
+    "monster_desc": str,
+    "monster_image": str,
+    "voice_file": str,
+    "lesson_intro": str,
+    "copy_sample": str,
+    "rewrite_prompt": str,
+    "rewrite_answer": str,
+    "answer_rules": list,
+}
+REQUIRED_FIELDS = ("text", "choices", "correct_index", "hint", "explain", "monster_name", "monster_desc")
+# ステージごとに追加で必須のもの
+STAGE_REQUIRED_FIELDS = {
+    1: ("lesson_intro", "copy_sample", "rewrite_prompt", "rewrite_answer"),
+}
+
+
+class QuestionBankError(ValueError):
+    """問題バンクのファイルがない・読めない・スキーマに合わない"""
+
+
+# ======================================================
+#  読みこみとスキーマの確認
+# ======================================================
+def bank_path(stage: int, content_dir=None) -> pathlib.Path:
+    """ステージの問題ファイル（どれもなければ .json のパス）"""
+    content_dir = pathlib.Path(content_dir or CONTENT_DIR)
+    for suffix in BANK_SUFFIXES:
+        path = content_dir / f"stage{stage}{suffix}"
+        if path.is_file():
+            return path
+    return content_dir / f"stage{stage}.json"
+
+
+def read_bank_file(path):
+    """JSON / YAML をそのまま読む（スキーマは見ない）"""
+    path = pathlib.Path(path)
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as e:
+        raise QuestionBankError(f"{path}: 読めません（{e}）") from e
+    try:
+        if path.suffix in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError as e:
+                raise QuestionBankError(f"{path}: YAML を読むには PyYAML が必要です") from e
+            return yaml.safe_load(text)
+        return json.loads(text)
+    except QuestionBankError:
+        raise
+    except Exception as e:  # json.JSONDecodeError / yaml.YAMLError
+        raise QuestionBankError(f"{path}: 形式がこわれています（{e}）") from e
+
+
+def _question_errors(stage: int, question) -> list:
+    if not isinstance(question, dict):
+        return ["dict ではありません"]
+    errors = []
+    required = REQUIRED_FIELDS + STAGE_REQUIRED_FIELDS.get(stage, ())
+    for name in required:
+        if name not in question:
+            errors.append(f"{name} がありません")
+    for name, value in question.items():
+        expected = QUESTION_FIELDS.get(name)
+        if expected is None:
+            errors.append(f"知らないフィールド {name}")
+        elif not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            errors.append(f"{name} は {expected.__name__} にしてください")
+
+    choices = question.get("choices")
+    if isinstance(choices, list):
+        if len(choices) < 2:
+            errors.append("choices は2つ以上にしてください")
+        if not all(isinstance(c, str) and c for c in choices):
+            errors.append("choices は空でない文字列にしてください")
+        if len(set(choices)) != len(choices):
+            errors.append("choices に同じものがあります")
+        index = question.get("correct_index")
+        if isinstance(index, int) and not isinstance(index, bool) and not 0 <= index < len(choices):
+            errors.append(f"correct_index {index} が choices の範囲（0〜{len(choices) - 1}）の外です")
+    rules = question.get("answer_rules", ())
+    if isinstance(rules, list) and not all(isinstance(rule, str) and rule in GRADING_RULES for rule in rules):
+        errors.append(f"answer_rules は {' / '.join(GRADING_RULES)} から選んでください")
+    if "rewrite_prompt" in question and not question.get("rewrite_answer"):
+        errors.append("rewrite_prompt があるのに rewrite_answer がありません")
+    return errors
+
+
+def validate_bank(stage: int, data, source="<bank>") -> tuple:
+    """
+    読んだ中身を確かめて、問題の tuple を返す（choices は tuple にする）。
+    まちがいはまとめて1つの QuestionBankError にする。
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("questions"), list):
+        raise QuestionBankError(f"{source}: {{\"stage\": {stage}, \"questions\": [...]}} の形にしてください")
+    if data.get("stage", stage) != stage:
+        raise QuestionBankError(f"{source}: stage が {data.get('stage')!r} です（{stage} のはず）")
+    if not data["questions"]:
+        raise QuestionBankError(f"{source}: 問題が1つもありません")
+
+    errors = []
+    for i, question in enumerate(data["questions"]):
+        errors.extend(f"{source}: {i + 1}問目: {message}" for message in _question_errors(stage, question))
+    if errors:
+        raise QuestionBankError("\n".join(errors))
+    return tuple({**q, "choices": tuple(q["choices"])} for q in data["questions"])
+
+
+# copy_sample は「見本どおり」なので、ゆるめるルールはなし
+COPY_RULES = ()
+
+
+@dataclass(frozen=True, slots=True)
+class Preview:
+    """「👀 実行するとこうなるよ（見本）」に出すもの"""
+    output: str         # st.code で見せる文字（出力がなければその説明）
+    caption: str = ""
+    ok: bool = True     # 見本がうまく動かなかった（次に読みなおすときにもう一度動かす）
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionBank:
+    """1ステージぶんの、確かめ済みの問題と、そこから前もって作っておいたもの"""
+    stage: int
+    questions: tuple
+    answers: tuple      # 問題ごとに {"copy_sample": ExpectedAnswer, "rewrite_answer": ExpectedAnswer}
+    previews: tuple = ()    # 問題ごとに {"copy_sample": Preview, "rewrite_answer": Preview}
+
+
+def _compile_answers(question: dict) -> dict:
+    answers = {}
+    if "copy_sample" in question:
+        answers["copy_sample"] = ExpectedAnswer(question["copy_sample"], COPY_RULES)
+    if "rewrite_answer" in question:
+        answers["rewrite_answer"] = ExpectedAnswer(
+            question["rewrite_answer"], question.get("answer_rules", DEFAULT_RULES)
+        )
+    return answers
+
+
+def _prints_only_text(code: str) -> bool:
+    """print( ) の中が文字だけか（見本の説明を「そのまま表示」と「計算して表示」で分ける）"""
+    calls = [
+        node for node in ast.walk(ast.parse(code))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "print"
+    ]
+    return bool(calls) and all(
+        isinstance(arg, ast.Constant) and isinstance(arg.value, str) for call in calls for arg in call.args
+    )
+
+
+# 見本の出力（指紋 → Preview）。読みなおしても、変わっていない見本は動かしなおさない
+_previews = {}
+_previews_lock = threading.Lock()
+
+
+def _preview(answer: ExpectedAnswer, source="<bank>") -> Preview:
+    preview = _previews.get(answer.fingerprint)
+    if preview is not None:
+        return preview
+    result = get_sandbox_pool().run(answer.source)
+    if not result.ok:
+        logger.warning("%s: 見本コードがうまく動きませんでした（%s: %s）\n%s",
+                       source, result.error_type, result.error, answer.source)
+        return Preview(output="（実行結果）", ok=False)
+    if result.stdout:
+        caption = ("print() は文字をそのまま表示する魔法だよ。" if _prints_only_text(answer.source)
+                   else "中の計算をしてから、結果を表示しているよ。")
+        preview = Preview(output=result.stdout.rstrip("\n"), caption=caption)
+    else:
+        preview = Preview(output="（画面には何も表示されません）", caption="この問題は、準備や仕組みを学ぶステップだよ。")
+    with _previews_lock:
+        _previews[answer.fingerprint] = preview
+    return preview
+
+
+def build_bank(stage: int, questions: tuple, source="<bank>") -> QuestionBank:
+    """正解コードの構文木・見本の出力などを、読むときに1回だけ作る"""
+    answers = []
+    errors = []
+    for i, question in enumerate(questions):
+        try:
+            answers.append(_compile_answers(question))
+        except SyntaxError as e:
+            errors.append(f"{source}: {i + 1}問目: 正解のコードが Python として読めません（{e.msg}）")
+    if errors:
+        raise QuestionBankError("\n".join(errors))
+    previews = tuple(
+        {field: _preview(answer, source) for field, answer in compiled.items()} for compiled in answers
+    )
+    return QuestionBank(stage=stage, questions=questions, answers=tuple(answers), previews=previews)
+
+
+def load_bank(stage: int, path=None) -> QuestionBank:
+    path = pathlib.Path(path) if path is not None else bank_path(stage)
+    questions = validate_bank(stage, read_bank_file(path), source=path)
+    return build_bank(stage, questions, source=path)
+
+
+# ======================================================
+#  更新時刻を見て読みなおすキャッシュ
+# ======================================================
+class BankFile:
+    """1ステージぶんの問題ファイル。更新時刻が変わったときだけ読みなおす。"""
+
+    def __init__(self, stage: int, path=None):
+        self.stage = stage
+        self._path = pathlib.Path(path) if path is not None else None
+        self._bank = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.version = 0  # 読みなおすたびに増える
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._path or bank_path(self.stage)
+
+    def get(self) -> QuestionBank:
+        now = time.monotonic()
+        if self._bank is not None and now - self._checked_at < RELOAD_INTERVAL:
+            return self._bank
+        with self._lock:
+            if self._bank is not None and now - self._checked_at < RELOAD_INTERVAL:
+                return self._bank
+            path = self.path
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if self._bank is None or mtime != self._mtime:
+                try:
+                    if mtime is None:
+                        raise QuestionBankError(f"{path}: ファイルがありません")
+                    bank = load_bank(self.stage, path)
+                except QuestionBankError as e:
+                    if self._bank is None:
+                        raise
+                    # 編集中のまちがいでアプリを止めない。前の中身のまま、直るまで毎回は読まない
+                    logger.error("問題バンクを読みなおせませんでした（前の中身を使います）\n%s", e)
+                else:
+                    self._bank = bank
+                    self.version += 1
+                self._mtime = mtime
+            self._checked_at = now
+        return self._bank
+
+
+# ======================================================
+#  プロセス全体で1つだけのキャッシュ
+# ======================================================
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_bank_file(stage: int) -> BankFile:
+    bank_file = _banks.get(stage)
+    if bank_file is None:
+        with _banks_lock:
+            bank_file = _banks.setdefault(stage, BankFile(stage))
+    return bank_file
+
+
+def get_question_bank(stage: int) -> QuestionBank:
+    """ステージの QuestionBank（キャッシュを引くだけ。ファイルが変わっていれば読みなおす）"""
+    return get_bank_file(stage).get()
+
+
+def get_questions(stage: int) -> tuple:
+    return get_question_bank(stage).questions
+
+
+def bank_files(content_dir=None) -> list:
+    """いまある問題ファイル（minaria.assets がアセットの参照を集めるのに使う）"""
+    content_dir = pathlib.Path(content_dir or CONTENT_DIR)
+    paths = [bank_path(stage, content_dir) for stage in STAGES]
+    return [path for path in paths if path.is_file()]
+
+
+# ======================================================
+#  検証コマンド
+# ======================================================
+def main(argv=None) -> int:
+    failed = False
+    for stage in STAGES:
+        path = bank_path(stage)
+        try:
+            bank = load_bank(stage, path)
+        except QuestionBankError as e:
+            print(e, file=sys.stderr)
+            failed = True
+        else:
+            print(f"  ok  stage{stage}  {path}  ({len(bank.questions)} 問)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+ビルド済みの軽量版（python -m minaria.build ...）を実行時に選ぶ
+
+manifest はプロセスで1回だけ読み、ファイルが更新されたときだけ読み直す。
+manifest がない・元ファイルが変わっている場合は、元のファイルをそのまま返す。
+"""
+import json
+import os
+import pathlib
+import threading
+import time
+
+from minaria.build.common import BASE_DIR, BUILD_DIR
+
+# 使ってよい画像形式（前にあるほど優先）。AVIF を使うなら "avif,webp,jpeg" など
+IMAGE_FORMATS = tuple(
+    f.strip() for f in os.getenv("MINARIA_IMAGE_FORMATS", "webp,jpeg").split(",") if f.strip()
+)
+# st.image(use_container_width=True) で実際に出る幅くらい
+IMAGE_TARGET_WIDTH = int(os.getenv("MINARIA_IMAGE_WIDTH", "720"))
+
+# manifest の更新チェックは最短でもこの秒数おき
+RELOAD_INTERVAL = 2.0
+
+
+class ManifestFile:
+    """JSON の manifest を、更新時刻が変わったときだけ読み直すラッパー"""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._data = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.version = 0  # 読み直すたびに増える（選択結果のキャッシュ破棄用）
+
+    def get(self) -> dict:
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_INTERVAL:
+            return self._data
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._data = self._load() if mtime is not None else {}
+                self.version += 1
+        return self._data
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+_image_manifest = ManifestFile(BUILD_DIR / "images" / "manifest.json")
+_image_choice = {}  # (path, width) -> 選んだパス（manifest が変わったら空にする）
+_image_choice_version = None
+
+
+def _manifest_key(path) -> str:
+    p = pathlib.Path(path)
+    if not p.is_absolute():
+        p = BASE_DIR / p
+    try:
+        return p.resolve().relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def _source_unchanged(key: str, entry: dict) -> bool:
+    """元ファイルのサイズが manifest と同じか（ハッシュは重いのでサイズで見る）"""
+    try:
+        return (BASE_DIR / key).stat().st_size == entry.get("bytes")
+    except OSError:
+        return False
+
+
+def pick_rendition(renditions, formats, target_width: int):
+    """
+    優先順の形式のなかで、target_width 以上でいちばん小さい幅を選ぶ。
+    それがなければ、いちばん大きい幅。
+    """
+    for fmt in formats:
+        candidates = [r for r in renditions if r.get("format") == fmt]
+        if not candidates:
+            continue
+        wide_enough = [r for r in candidates if r["width"] >= target_width]
+        if wide_enough:
+            return min(wide_enough, key=lambda r: r["width"])
+        return max(candidates, key=lambda r: r["width"])
+    return None
+
+
+def resolve_image(path, width: int = IMAGE_TARGET_WIDTH) -> str:
+    """画像のパスを、いちばん良い軽量版のパスに置きかえる（なければそのまま）"""
+    global _image_choice_version
+    data = _image_manifest.get()
+    if _image_choice_version != _image_manifest.version:
+        _image_choice.clear()
+        _image_choice_version = _image_manifest.version
+
+    cache_key = (str(path), width)
+    chosen = _image_choice.get(cache_key)
+    if chosen is not None:
+        return chosen
+
+    chosen = str(path)
+    key = _manifest_key(path)
+    entry = data.get("images", {}).get(key)
+    if entry and _source_unchanged(key, entry):
+        best = pick_rendition(entry.get("renditions", []), IMAGE_FORMATS, width)
+        if best and (BASE_DIR / best["path"]).exists():
+            chosen = str(BASE_DIR / best["path"])
+
+    _image_choice[cache_key] = chosen
+    return chosen
+
+
+# ======================================================
+#  動画（python -m minaria.build videos）
+# ======================================================
+# low / mid / original。学校の Wi-Fi なら low がおすすめ
+VIDEO_QUALITY = os.getenv("MINARIA_VIDEO_QUALITY", "mid").lower()
+
+VIDEO_MIME = {"mp4": "video/mp4", "webm": "video/webm"}
+
+_video_manifest = ManifestFile(BUILD_DIR / "videos" / "manifest.json")
+
+
+def resolve_video(path, quality: str = VIDEO_QUALITY) -> dict:
+    """
+    動画の再生候補を返す。
+    {"sources": [(パス, MIMEタイプ), ...], "poster": パス or None}
+    sources は webm → mp4 の順（<source> を上から試すブラウザ向け）。
+    軽量版がなければ元の mp4 だけ。
+    """
+    original = {"sources": [(str(path), "video/mp4")], "poster": None}
+    if quality == "original":
+        return original
+
+    key = _manifest_key(path)
+    entry = _video_manifest.get().get("videos", {}).get(key)
+    if not entry or not _source_unchanged(key, entry):
+        return original
+
+    sources = []
+    for fmt in ("webm", "mp4"):
+        for r in entry.get("renditions", []):
+            if r.get("quality") == quality and r.get("format") == fmt and (BASE_DIR / r["path"]).exists():
+                sources.append((str(BASE_DIR / r["path"]), VIDEO_MIME[fmt]))
+    if not sources:
+        return original
+
+    poster = entry.get("poster")
+    poster = str(BASE_DIR / poster) if poster and (BASE_DIR / poster).exists() else None
+    return {"sources": sources, "poster": poster}
+
+
+def resolve_video_file(path, quality: str = VIDEO_QUALITY) -> str:
+    """st.video に渡す1本（どのブラウザでも再生できる mp4）を返す"""
+    mp4 = [p for p, mime in resolve_video(path, quality)["sources"] if mime == "video/mp4"]
+    return mp4[0] if mp4 else str(path)
+
+
+# ======================================================
+#  音声（python -m minaria.build audio）
+# ======================================================
+_audio_manifest = ManifestFile(BUILD_DIR / "audio" / "manifest.json")
+
+AUDIO_FORMATS = ("opus", "aac")
+
+
+def resolve_audio(path) -> list:
+    """
+    音声の再生候補を [(パス, MIMEタイプ), ...] で返す（優先順）。
+    Opus → AAC → 元の mp3 の順。軽量版がなければ元の mp3 だけ。
+    """
+    candidates = []
+    key = _manifest_key(path)
+    entry = _audio_manifest.get().get("audio", {}).get(key)
+    if entry and _source_unchanged(key, entry):
+        for fmt in AUDIO_FORMATS:
+            for r in entry.get("renditions", []):
+                if r.get("format") == fmt and (BASE_DIR / r["path"]).exists():
+                    candidates.append((str(BASE_DIR / r["path"]), r["mime"]))
+    candidates.append((str(path), "audio/mpeg"))
+    return candidates
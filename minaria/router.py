@@ -0,0 +1,68 @@
+"""
+ページを URL で開けるようにする
+
+  ?page=stage1     サーバーが読める形。ページを移るたびに書きかえる（?learner= などはそのまま）
+  #/stage1         静的版（README の公開URL）と同じ形のリンク
+
+# から後ろはサーバーに届かないので、小さなコンポーネント（components/router）がブラウザで読んで
+Python に知らせる。知らせが届くのは最初のリランのあとなので、セッションの最初のリランでは
+home の動画（数MB）を送らずに待つ（links_checked()）。#/stage1 で開いた人には動画を送らない。
+
+  page = start_page(st.query_params)   # セッションの最初に1回（?page= がなければ None）
+  linked = hash_link()                 # 新しく届いた #/... のページ（なければ None）
+  sync_page_query(session.page)        # ?page= をいまのページにそろえる
+"""
+import pathlib
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from minaria.pages import HOME, is_page
+
+_COMPONENT_DIR = pathlib.Path(__file__).resolve().parent / "components" / "router"
+_router_component = components.declare_component("minaria_router", path=str(_COMPONENT_DIR))
+
+ROUTER_KEY = "minaria_router"
+
+
+def page_from_link(link: str):
+    """"#/stage1" / "/stage1" / "stage1" → "stage1"（知らないページなら None）"""
+    page = (link or "").lstrip("#").strip("/").split("?")[0]
+    return page if is_page(page) else None
+
+
+def start_page(query_params):
+    """URL の ?page=（セッションの最初に読む）"""
+    return page_from_link(query_params.get("page", ""))
+
+
+def hash_link(key: str = ROUTER_KEY):
+    """
+    ブラウザから新しく届いた #/... のページ。ページ全体のリランのたびに呼ぶ
+    （コンポーネントを置きつづけるため。同じ知らせは2回は返さない）。
+    """
+    runs_key = f"{key}_runs"
+    st.session_state[runs_key] = st.session_state.get(runs_key, 0) + 1
+    value = _router_component(key=key, default=None)
+    if not isinstance(value, dict):
+        return None
+    seen_key = f"{key}_seen"
+    if st.session_state.get(seen_key) == value.get("seq"):
+        return None
+    st.session_state[seen_key] = value.get("seq")
+    return page_from_link(value.get("hash", ""))
+
+
+def links_checked(key: str = ROUTER_KEY) -> bool:
+    """#/... のリンクを確かめ終わったか（ブラウザから知らせが来たか、2回目以降のリラン）"""
+    return st.session_state.get(f"{key}_seen") is not None or st.session_state.get(f"{key}_runs", 0) > 1
+
+
+def sync_page_query(page: str) -> None:
+    """?page= をいまのページにそろえる（home のときは消す）"""
+    current = st.query_params.get("page")
+    if page == HOME:
+        if current is not None:
+            del st.query_params["page"]
+    elif current != page:
+        st.query_params["page"] = page
@@ -0,0 +1,284 @@
+"""
+学習者のコードをほんとうに動かす（先に起動しておいたワーカーのプール）
+
+これまでの「▶ 実行してみる」は何も動かしておらず、正規表現で print("...") や
+name = "..." + print(name) の形を見つけて、それらしい出力を作っていた（見本の出力は
+正規表現で切り出した式を eval していた）。ここでは
+
+  ・minaria/sandbox_worker.py を何個か先に起動しておき（Python の起動は最初だけ）、
+    パイプでコードを渡して、print の出力を受け取る
+  ・ワーカーは OS の制限（CPU 時間・メモリ・ファイルやソケットを開けない）と
+    組みこみ関数の制限の中で動かす（くわしくは sandbox_worker.py）
+  ・1回ごとに時間の上限があり、返事がなければそのワーカーを止めて新しく起動しなおす
+
+  result = get_sandbox_pool().run('print("Hello")')
+  result.stdout      # "Hello\n"
+  result.ok          # エラーも時間切れもなかったか
+
+（見本コードの出力は、問題バンクを読むときに動かしておく。minaria/question_bank.py）
+
+メトリクス（minaria.metrics）
+  sandbox.run          1回の実行にかかった秒数（待ち時間を含む）
+  sandbox.wait         空いているワーカーを待った秒数
+  sandbox.busy         いま動いているワーカーの数（gauge）
+  sandbox.utilization  busy / ワーカー数（gauge）
+  sandbox.timeouts / sandbox.errors / sandbox.restarts   回数
+
+環境変数
+  MINARIA_SANDBOX_WORKERS    ワーカーの数（既定 2）
+  MINARIA_SANDBOX_TIMEOUT    1回の実行の上限秒数（既定 2 秒）
+  MINARIA_SANDBOX_CPU_SEC    1回に使ってよい CPU 秒数（既定 1 秒）
+  MINARIA_SANDBOX_MEMORY_MB  ワーカー1つのメモリの上限（既定 256MB）
+
+  python -m minaria.sandbox 'for i in range(3): print(i)'
+"""
+import atexit
+import json
+import logging
+import os
+import pathlib
+import queue
+import selectors
+import struct
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from minaria.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = pathlib.Path(__file__).resolve().parent / "sandbox_worker.py"
+
+POOL_SIZE = int(os.getenv("MINARIA_SANDBOX_WORKERS", "2"))
+RUN_TIMEOUT = float(os.getenv("MINARIA_SANDBOX_TIMEOUT", "2.0"))
+CPU_SECONDS = int(os.getenv("MINARIA_SANDBOX_CPU_SEC", "1"))
+MEMORY_MB = int(os.getenv("MINARIA_SANDBOX_MEMORY_MB", "256"))
+
+# 学習者のコードと出力の上限（文字数）
+MAX_CODE = 10_000
+MAX_OUTPUT = 10_000
+
+# ワーカー1つで動かす回数の上限（超えたら起動しなおす。もれたメモリなどを持ちこさない）
+MAX_RUNS_PER_WORKER = 500
+
+HEADER = struct.Struct(">I")
+
+
+@dataclass(frozen=True, slots=True)
+class RunResult:
+    stdout: str = ""
+    error: str = ""                 # エラーの説明（"name 'x' is not defined" など。なければ ""）
+    error_type: str = ""            # "NameError" / "SyntaxError" / "Rejected"（動かす前に断った）/ "Timeout" など
+    timed_out: bool = False
+    truncated: bool = False         # 出力が多すぎて途中で止めた
+    variables: dict = field(default_factory=dict)   # 最後に残った str / int / float / bool の変数（repr）
+    seconds: float = 0.0            # ワーカーの中で動かしていた秒数
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and not self.timed_out
+
+
+class WorkerError(Exception):
+    """ワーカーが落ちた・返事がおかしい"""
+
+
+class Worker:
+    """起動したままの sandbox_worker.py 1つ"""
+
+    def __init__(self, cpu_seconds: int, memory_mb: int):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-I", "-S", str(WORKER_SCRIPT), str(cpu_seconds), str(memory_mb), str(MAX_OUTPUT)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={},
+            cwd="/" if os.name == "posix" else None,
+        )
+        self.runs = 0
+        self._ready = False
+
+    def _read_exact(self, n: int, deadline: float) -> bytes:
+        fd = self.proc.stdout.fileno()
+        chunks = []
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            while n:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not sel.select(remaining):
+                    raise TimeoutError
+                chunk = os.read(fd, n)
+                if not chunk:
+                    raise WorkerError(f"ワーカーが終了しました（終了コード {self.proc.poll()}）")
+                chunks.append(chunk)
+                n -= len(chunk)
+        return b"".join(chunks)
+
+    def _read_frame(self, deadline: float) -> dict:
+        (length,) = HEADER.unpack(self._read_exact(HEADER.size, deadline))
+        try:
+            return json.loads(self._read_exact(length, deadline))
+        except ValueError as e:
+            raise WorkerError("ワーカーの返事がこわれています") from e
+
+    def wait_ready(self, timeout: float) -> None:
+        if not self._ready:
+            self._read_frame(time.monotonic() + timeout)
+            self._ready = True
+
+    def run(self, code: str, timeout: float) -> dict:
+        payload = json.dumps({"code": code}, ensure_ascii=False).encode("utf-8")
+        try:
+            self.proc.stdin.write(HEADER.pack(len(payload)) + payload)
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError("ワーカーに書きこめません") from e
+        self.runs += 1
+        return self._read_frame(time.monotonic() + timeout)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def kill(self) -> None:
+        if self.alive():
+            self.proc.kill()
+        try:
+            self.proc.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            pass
+        for pipe in (self.proc.stdin, self.proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class SandboxPool:
+    def __init__(self, size: int = POOL_SIZE, timeout: float = RUN_TIMEOUT,
+                 cpu_seconds: int = CPU_SECONDS, memory_mb: int = MEMORY_MB):
+        self.size = size
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self._idle = queue.LifoQueue()
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        # 先に全部起動しておく（Popen はすぐ戻り、Python の起動はその裏で進む）
+        for _ in range(size):
+            self._idle.put(self._spawn())
+        atexit.register(self.close)
+
+    def _spawn(self) -> Worker:
+        return Worker(self.cpu_seconds, self.memory_mb)
+
+    def _set_busy(self, delta: int) -> None:
+        with self._lock:
+            self._busy += delta
+            busy = self._busy
+        metrics = get_metrics()
+        metrics.gauge("sandbox.busy", busy)
+        metrics.gauge("sandbox.utilization", busy / self.size if self.size else 0.0)
+
+    def _replace(self, worker: Worker) -> Worker:
+        worker.kill()
+        get_metrics().incr("sandbox.restarts")
+        return self._spawn()
+
+    def run(self, code: str, timeout: float = None) -> RunResult:
+        """code を動かして結果を返す。空いているワーカーがなければ timeout 秒まで待つ。"""
+        timeout = self.timeout if timeout is None else timeout
+        if len(code) > MAX_CODE:
+            return RunResult(error_type="Rejected", error=f"コードが長すぎます（{MAX_CODE} 文字まで）")
+
+        metrics = get_metrics()
+        started = time.perf_counter()
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            metrics.incr("sandbox.timeouts")
+            return RunResult(timed_out=True, error_type="Busy", error="混み合っています。少し待ってからもう一度どうぞ")
+        metrics.observe("sandbox.wait", time.perf_counter() - started)
+
+        self._set_busy(+1)
+        try:
+            if not worker.alive():
+                worker = self._replace(worker)
+            worker.wait_ready(timeout)
+            reply = worker.run(code, timeout)
+        except TimeoutError:
+            metrics.incr("sandbox.timeouts")
+            worker = self._replace(worker)
+            result = RunResult(timed_out=True, error_type="Timeout", error=f"{timeout:g} 秒たっても終わりませんでした")
+        except WorkerError as e:
+            # CPU 時間やメモリの上限で OS に止められたときもここに来る
+            metrics.incr("sandbox.errors")
+            logger.info("sandbox: %s", e)
+            worker = self._replace(worker)
+            result = RunResult(error_type="Killed", error="時間かメモリを使いすぎたので止めました")
+        except BaseException:
+            # 途中まで読んだワーカーは使いまわせない
+            worker = self._replace(worker)
+            raise
+        else:
+            result = RunResult(
+                stdout=reply.get("stdout", ""),
+                error=reply.get("error", ""),
+                error_type=reply.get("error_type", ""),
+                truncated=bool(reply.get("truncated")),
+                variables=dict(reply.get("variables") or {}),
+                seconds=float(reply.get("seconds", 0.0)),
+            )
+            if worker.runs >= MAX_RUNS_PER_WORKER:
+                worker = self._replace(worker)
+        finally:
+            self._set_busy(-1)
+            if self._closed:
+                worker.kill()
+            else:
+                self._idle.put(worker)
+
+        metrics.observe("sandbox.run", time.perf_counter() - started)
+        return result
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                return
+
+
+# ======================================================
+#  プロセス全体で1つだけのプール
+# ======================================================
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """最初に呼ばれたときにワーカーを起動する（そのあとは使い回す）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SandboxPool()
+    return _pool
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    code = " ".join(argv) if argv else sys.stdin.read()
+    result = get_sandbox_pool().run(code)
+    sys.stdout.write(result.stdout)
+    if result.error:
+        print(f"{result.error_type}: {result.error}", file=sys.stderr)
+    print(json.dumps(get_metrics().snapshot()["series"].get("sandbox.run", {})), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
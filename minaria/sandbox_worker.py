@@ -0,0 +1,209 @@
+"""
+学習者のコードを動かすワーカー（minaria.sandbox がいくつか先に起動しておく）
+
+  python -I -S minaria/sandbox_worker.py <cpu秒> <メモリMB> <出力の上限文字数>
+
+標準ライブラリだけを使い、minaria パッケージは読みこまない（-I -S で起動するので
+カレントディレクトリも site-packages も見えない）。stdin から1件ずつ
+「4バイトの長さ + JSON」で {"code": "..."} を受け取り、同じ形で結果を返す。
+
+閉じこめかた（どれか1つが破られても、次のものが止める）
+  ・AST を見て import・__dunder__ への参照・_ や f_ / gi_ などで始まる属性を断る
+    （"{0.__globals__}".format(print) のように、書式の中でたどる属性も同じように断る）
+  ・組みこみ関数は SAFE_BUILTINS だけ（open / __import__ / eval / exec / input などはない）
+  ・print は出力を文字列にためるだけ（上限つき）
+  ・OS の制限（resource）：メモリ・CPU 時間・ファイルの新規作成・書きこみ・プロセスの生成
+    （開けるファイル数を 0〜2 番だけにするので、ファイルもソケットも開けない）
+"""
+import ast
+import builtins
+import json
+import os
+import re
+import string
+import struct
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows（OS の制限はかけられない）
+    resource = None
+
+HEADER = struct.Struct(">I")
+
+SAFE_BUILTIN_NAMES = (
+    "abs", "all", "any", "bool", "chr", "dict", "divmod", "enumerate", "filter", "float",
+    "int", "isinstance", "len", "list", "map", "max", "min", "ord", "pow", "range", "repr",
+    "reversed", "round", "set", "sorted", "str", "sum", "tuple", "zip",
+    "True", "False", "None",
+    "Exception", "ArithmeticError", "IndexError", "KeyError", "NameError", "TypeError",
+    "ValueError", "ZeroDivisionError",
+)
+SAFE_BUILTINS = {name: getattr(builtins, name) for name in SAFE_BUILTIN_NAMES}
+
+# 使わせない属性（_ で始まるもの・フレームやコードオブジェクトからモジュールの中へたどれるもの）
+BLOCKED_ATTR_PREFIXES = ("_", "f_", "gi_", "co_", "cr_", "ag_", "tb_")
+
+# 書式の中で属性・添字をたどる str のメソッド（"{0.attr}" / "{0[key]}"）
+FORMAT_METHODS = ("format", "format_map")
+_FIELD_PART = re.compile(r"[.\[]([^.\[\]]*)")
+
+# 結果で返す変数（「name に "Minaria" を入れたよ」の表示用）
+SIMPLE_TYPES = (str, int, float, bool)
+MAX_VARIABLES = 20
+MAX_REPR = 200
+MAX_ERROR = 500
+
+
+class Rejected(Exception):
+    """動かす前に断ったコード"""
+
+
+class OutputLimit(Exception):
+    """print の出力が多すぎる"""
+
+
+def check(tree) -> None:
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            raise Rejected("import は使えません")
+        if isinstance(node, ast.Attribute) and node.attr.startswith(BLOCKED_ATTR_PREFIXES):
+            raise Rejected(f"{node.attr} は使えません")
+        if isinstance(node, ast.Name) and node.id.startswith("__"):
+            raise Rejected(f"{node.id} は使えません")
+        if isinstance(node, ast.Attribute) and node.attr in FORMAT_METHODS:
+            _check_format(node)
+
+
+def _check_format(node) -> None:
+    # 書式の文字列がその場に書いてあるときだけ使わせる（変数に入れた書式は中を確かめられない）
+    if not (isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)):
+        raise Rejected(f"{node.attr} は \"...\".{node.attr}(...) の形でだけ使えます")
+    for part in _format_field_parts(node.value.value):
+        if part.startswith(BLOCKED_ATTR_PREFIXES):
+            raise Rejected(f"{part} は使えません")
+
+
+def _format_field_parts(text: str):
+    """"{0.a[b]:{1.c}}" → "a", "b", "c"（書式の中でたどる属性・添字。書式の指定の中の {} もふくむ）"""
+    try:
+        fields = list(string.Formatter().parse(text))
+    except ValueError as e:
+        raise Rejected(f"書式がまちがっています: {e}")
+    for _literal, field_name, format_spec, _conversion in fields:
+        if field_name:
+            yield from _FIELD_PART.findall(field_name)
+        if format_spec:
+            yield from _format_field_parts(format_spec)
+
+
+def run(code: str, cpu_seconds: int, max_output: int) -> dict:
+    out = []
+    size = 0
+
+    def _print(*args, sep=" ", end="\n", **_):
+        nonlocal size
+        text = (" " if sep is None else str(sep)).join(str(a) for a in args) + ("\n" if end is None else str(end))
+        size += len(text)
+        if size > max_output:
+            out.append(text[: max(0, max_output - (size - len(text)))])
+            raise OutputLimit()
+        out.append(text)
+
+    result = {"stdout": "", "error": "", "error_type": "", "truncated": False, "variables": {}}
+    try:
+        tree = ast.parse(code, "<minaria>", "exec")
+        check(tree)
+        compiled = compile(tree, "<minaria>", "exec")
+    except SyntaxError as e:
+        result.update(error_type="SyntaxError", error=f"{e.lineno}行目: {e.msg}")
+        return result
+    except Rejected as e:
+        result.update(error_type="Rejected", error=str(e))
+        return result
+
+    namespace = {"__builtins__": dict(SAFE_BUILTINS, print=_print), "__name__": "__main__"}
+    _limit_cpu(cpu_seconds)
+    try:
+        exec(compiled, namespace)
+    except OutputLimit:
+        result["truncated"] = True
+    except MemoryError:
+        result.update(error_type="MemoryError", error="メモリを使いすぎました")
+    except RecursionError:
+        result.update(error_type="RecursionError", error="関数の呼び出しが深すぎます")
+    except Exception as e:
+        result.update(error_type=type(e).__name__, error=str(e)[:MAX_ERROR])
+    result["stdout"] = "".join(out)
+    variables = [
+        (name, value) for name, value in namespace.items()
+        if not name.startswith("__") and isinstance(value, SIMPLE_TYPES)
+    ]
+    result["variables"] = {name: repr(value)[:MAX_REPR] for name, value in variables[:MAX_VARIABLES]}
+    return result
+
+
+def _limit_cpu(cpu_seconds: int) -> None:
+    # RLIMIT_CPU はプロセスの通算なので、「いままで使った分 + 1回ぶん」にする（超えたら SIGXCPU で終わる）
+    if resource is None:
+        return
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    spent = int(used.ru_utime + used.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (spent + cpu_seconds, hard))
+
+
+def _lock_down(memory_mb: int) -> None:
+    if resource is None:
+        return
+    limits = [
+        (resource.RLIMIT_AS, memory_mb * 1024 * 1024),
+        (resource.RLIMIT_FSIZE, 0),
+        (resource.RLIMIT_NOFILE, 3),
+    ]
+    if hasattr(resource, "RLIMIT_NPROC"):
+        limits.append((resource.RLIMIT_NPROC, 0))
+    for kind, value in limits:
+        try:
+            resource.setrlimit(kind, (value, value))
+        except (ValueError, OSError):
+            pass
+
+
+def _read_exact(n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = os.read(0, n)
+        if not chunk:
+            raise EOFError
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _write(obj) -> None:
+    payload = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    data = memoryview(HEADER.pack(len(payload)) + payload)
+    while data:
+        data = data[os.write(1, data):]
+
+
+def main(argv) -> None:
+    cpu_seconds, memory_mb, max_output = int(argv[1]), int(argv[2]), int(argv[3])
+    _lock_down(memory_mb)
+    _write({"ready": os.getpid()})
+    while True:
+        try:
+            (length,) = HEADER.unpack(_read_exact(HEADER.size))
+            request = json.loads(_read_exact(length))
+        except EOFError:
+            return
+        started = time.perf_counter()
+        result = run(request["code"], cpu_seconds, max_output)
+        result["seconds"] = time.perf_counter() - started
+        _write(result)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,258 @@
+"""
+1人ぶんのセッションの状態（型つき・__slots__ つき）
+
+これまでは st.session_state に30個ほどのキーをばらばらに置いていて、
+リランのたびに「if "x" not in st.session_state」を何十回も調べていた
+（bgm_volume のように2回初期化しているものや、
+ stage1_last_copy_code_{idx} のように問題ごとに増えていくキーもあった）。
+ここでは LearnerSession 1つにまとめて st.session_state["minaria"] に置く。
+
+  session = get_session(st.session_state)   # あれば取り出すだけ（O(1)）
+  session.xp += 10
+  session.stage(1).step = 2
+
+ステージごとの状態は StageState にまとまっている（どのステージも同じ形）。
+session.stages は {ステージの番号: StageState} で、STAGE_DEFS にあるステージの分だけある。
+
+形を変えたときは SCHEMA_VERSION を上げ、MIGRATIONS に「1つ前の形 → 新しい形」の
+変換（dict → dict）を足す。古い形のセッションは get_session() のときに変換される。
+  version 1  st.session_state に直接置いていたキー（このモジュールより前）
+  version 3  LearnerSession（ステージの状態は stages の StageState: step / passed）
+（version 2 は公開前にだけあった形なので、変換はない）
+"""
+import sys
+from dataclasses import asdict, dataclass, field, fields
+
+from minaria.conversation import new_memory
+from minaria.progress_store import STAGES
+
+SCHEMA_VERSION = 3
+
+# st.session_state のキー
+SESSION_KEY = "minaria"
+
+# チャットの会話ログ・速さの記録は直近このぶんだけ残す
+MAX_MESSAGES = 200
+MAX_CHAT_METRICS = 50
+
+
+@dataclass(slots=True)
+class StageState:
+    index: int = 0                      # いま何問目か（0から）
+    step: int = -1                      # -1: 導入 / 0〜: StageDef.steps の何番目か（minaria.stages）
+    passed: bool = False                # いまのステップに正解したか（「次へ」ボタンを出す）
+    review: bool = False                # 復習モード
+    cleared: bool = False
+    clear_played: bool = False          # クリア演出を流したか
+    last_copy_index: int = -1           # last_copy_code がどの問題のものか
+    last_copy_code: str = ""            # copy ステップで写したコード（いまの問題の1つだけ）
+
+    def remember_copy(self, index: int, code: str) -> None:
+        self.last_copy_index = index
+        self.last_copy_code = code
+
+    def copied_code(self, index: int) -> str:
+        return self.last_copy_code if self.last_copy_index == index else ""
+
+
+def new_stages() -> dict:
+    return {number: StageState() for number in STAGES}
+
+
+@dataclass(slots=True)
+class ChatState:
+    messages: list = field(default_factory=list)   # [(話し手, 文), ...]
+    metrics: list = field(default_factory=list)    # [{"ttft": 秒, "total": 秒}, ...]
+    memory: dict = field(default_factory=new_memory)  # minaria.conversation の記憶
+
+    def add_messages(self, *items) -> None:
+        self.messages.extend(items)
+        if len(self.messages) > MAX_MESSAGES:
+            # 古いほうから捨てる（捨てたぶんは conversation の要約に入っている）
+            drop = len(self.messages) - MAX_MESSAGES
+            del self.messages[:drop]
+            self.memory["folded"] = max(0, self.memory["folded"] - drop)
+
+    def add_metric(self, ttft, total) -> None:
+        self.metrics.append({"ttft": ttft, "total": total})
+        del self.metrics[:-MAX_CHAT_METRICS]
+
+
+@dataclass(slots=True)
+class LearnerSession:
+    schema_version: int = SCHEMA_VERSION
+    learner_id: str = ""
+    page: str = "home"
+
+    # 進みぐあい（minaria.progress_store に保存するもの）
+    xp: int = 0
+    level: int = 1
+    solved: dict = field(default_factory=dict)     # {"stage1_0_step2": True, "stage2_3": True, ...}
+    stages: dict = field(default_factory=new_stages)  # {ステージの番号: StageState}
+
+    last_xp: int = 0                                # 称号判定用
+    saved_progress: dict = None                     # 最後に保存を予約した進みぐあい
+
+    # ログインボーナス・再開バナー
+    last_login_date: str = None
+    login_bonus_given_today: bool = False
+    last_play_date: str = None
+    show_return_banner: bool = False
+
+    prev_monster: str = None                        # 声を流したモンスター（同じなら流さない）
+    pressed: set = field(default_factory=set)      # one_time_button で押したボタン
+    chat: ChatState = field(default_factory=ChatState)
+
+    def stage(self, number: int) -> StageState:
+        state = self.stages.get(number)
+        if state is None:
+            # セッションができたあとに足されたステージ（開発中にモジュールを読みなおしたときなど）
+            state = self.stages[number] = StageState()
+        return state
+
+    # ---------- progress_store とのやりとり ----------
+    def progress(self) -> dict:
+        """progress_store の形（xp / level / solved / stageN_index / stageN_cleared）"""
+        progress = {"xp": self.xp, "level": self.level, "solved": dict(self.solved)}
+        for number in STAGES:
+            stage = self.stage(number)
+            progress[f"stage{number}_index"] = stage.index
+            progress[f"stage{number}_cleared"] = stage.cleared
+        return progress
+
+    def apply_progress(self, progress: dict) -> None:
+        self.xp = int(progress.get("xp", self.xp))
+        self.level = int(progress.get("level", self.level))
+        self.solved = dict(progress.get("solved", self.solved))
+        for number in STAGES:
+            stage = self.stage(number)
+            stage.index = int(progress.get(f"stage{number}_index", stage.index))
+            stage.cleared = bool(progress.get(f"stage{number}_cleared", stage.cleared))
+
+    # ---------- 大きさ ----------
+    def footprint(self) -> int:
+        """このセッションが使っているおおよそのバイト数（中のリストや dict もたどる）"""
+        return _deep_sizeof(self, set())
+
+
+def _deep_sizeof(obj, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_sizeof(getattr(obj, f.name), seen) for f in fields(obj))
+    return size
+
+
+# ======================================================
+#  dict との変換とマイグレーション
+# ======================================================
+def to_dict(session: LearnerSession) -> dict:
+    data = asdict(session)
+    data["pressed"] = sorted(session.pressed)
+    return data
+
+
+def from_dict(data: dict) -> LearnerSession:
+    def build(cls, values):
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (values or {}).items() if k in known})
+
+    data = dict(data)
+    session = build(LearnerSession, {k: v for k, v in data.items() if k not in ("stages", "chat", "pressed")})
+    stages = {int(number): values for number, values in (data.get("stages") or {}).items()}
+    session.stages = {number: build(StageState, stages.get(number)) for number in STAGES}
+    session.chat = build(ChatState, data.get("chat"))
+    session.pressed = set(data.get("pressed", ()))
+    session.schema_version = SCHEMA_VERSION
+    return session
+
+
+_V1_STAGE_FIELDS = ("index", "review", "cleared", "clear_played", "last_answer_correct",
+                    "step", "feedback", "copy_correct", "rewrite_correct")
+_V1_TOP_FIELDS = ("learner_id", "page", "xp", "level", "solved", "last_xp", "saved_progress",
+                  "last_login_date", "login_bonus_given_today", "last_play_date", "show_return_banner",
+                  "prev_monster")
+
+
+# version 1 でステップごとにあった「正解したか」のフラグ（ステージ1は step 0/1/2 の順）
+_V1_PASSED_FIELDS = ("copy_correct", "last_answer_correct", "rewrite_correct")
+
+
+def _migrate_v1_stage(number: int, flat: dict) -> dict:
+    """stageN_* のキー → StageState の dict（ステップごとのフラグは step と passed にする）"""
+    stage = {name: flat[name] for name in ("index", "review", "cleared", "clear_played") if name in flat}
+    if number == 1:
+        stage["step"] = step = flat.get("step", -1)
+        if 0 <= step < len(_V1_PASSED_FIELDS):
+            stage["passed"] = bool(flat.get(_V1_PASSED_FIELDS[step], False))
+    else:
+        stage["step"] = 0
+        stage["passed"] = bool(flat.get("last_answer_correct", False))
+    return stage
+
+
+def _migrate_v1(state) -> dict:
+    """st.session_state に直接置いていたキー → いまの version の dict"""
+    data = {k: state[k] for k in _V1_TOP_FIELDS if k in state}
+    data["stages"] = {}
+    for number in STAGES:
+        flat = {
+            name: state[f"stage{number}_{name}"] for name in _V1_STAGE_FIELDS if f"stage{number}_{name}" in state
+        }
+        data["stages"][number] = _migrate_v1_stage(number, flat)
+    data["chat"] = {
+        "messages": list(state.get("messages", [])),
+        "metrics": list(state.get("chat_metrics", [])),
+        "memory": dict(state.get("chat_memory") or new_memory()),
+    }
+    data["schema_version"] = SCHEMA_VERSION
+    return data
+
+
+# version → その version の dict を1つ新しい version の dict にする関数（いまはない）
+MIGRATIONS = {}
+
+
+def _legacy_keys(state):
+    return [k for k in list(state.keys()) if k in _V1_TOP_FIELDS or k in ("messages", "chat_metrics", "chat_memory")
+            or (k.startswith("stage") and "_" in k and k.split("_", 1)[1] in _V1_STAGE_FIELDS)
+            or k.startswith("stage1_last_copy_code_")]
+
+
+def get_session(state) -> LearnerSession:
+    """
+    state（st.session_state）から LearnerSession を取り出す。
+    なければ作る。古い形（前のバージョンのキーや古い schema_version）なら変換してから置きなおす。
+    """
+    session = state.get(SESSION_KEY)
+    if isinstance(session, LearnerSession) and session.schema_version == SCHEMA_VERSION:
+        return session
+
+    if session is None:
+        legacy = _legacy_keys(state)
+        if legacy:
+            data = _migrate_v1(state)
+            for key in legacy:
+                del state[key]
+        else:
+            data = None
+    else:
+        # 古い schema_version（またはモジュールを読みなおす前のクラスのもの）
+        data = to_dict(session) if hasattr(session, "__dataclass_fields__") else dict(session)
+        data.setdefault("schema_version", SCHEMA_VERSION)
+
+    if data is None:
+        session = LearnerSession()
+    else:
+        while data.get("schema_version", SCHEMA_VERSION) < SCHEMA_VERSION:
+            data = MIGRATIONS[data["schema_version"]](data)
+        session = from_dict(data)
+
+    state[SESSION_KEY] = session
+    return session
@@ -0,0 +1,234 @@
+"""
+ステージの定義（どのステップをどの順に・XP・クリア演出・文言）
+
+これまでは stage1 / stage2 / stage3 のページがそれぞれ150行ほどの if/elif のかたまりで、
+ステージを足すたびにほぼ同じコードがアプリに増えていた。ここではステージを StageDef で表し、
+アプリ側は render_stage(stage) 1つで全ステージを描く。
+
+  stage = stage_for_page(session.page)   # "stage2" → StageDef（dict を引くだけ）
+  stage.steps                            # (Step("copy", 10), Step("quiz", 20), ...) など
+  stage.solved_key(index, step)          # 正解済みの記録（session.solved）のキー
+
+ステップの種類
+  copy     見本どおりに写す
+  quiz     3択
+  rewrite  ちょっと変えてもう一度書く
+
+問題そのものは content/stage<N>.json（minaria.question_bank）にある。
+ステージを足すときは STAGE_DEFS に1つ足し、問題ファイルを置くだけでよい
+（保存する進みぐあい・セッションの状態・マイページはどれも STAGE_DEFS から作る）。
+"""
+from dataclasses import dataclass
+
+STEP_KINDS = ("copy", "quiz", "rewrite")
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    kind: str                       # STEP_KINDS のどれか
+    xp: int                         # 初めて正解したときの XP
+    next_label: str = "▶ 次へ進む"   # 正解したあとに出す「次へ」ボタン
+
+
+@dataclass(frozen=True, slots=True)
+class StageDef:
+    number: int
+    title: str                      # 見出し
+    name: str                       # 『…』をクリアしたよ！ の中身
+    description: str                # ステージの説明（導入ステップがあれば導入で、なければ毎問の上に出す）
+    steps: tuple                    # 1問ごとに進むステップ（Step）
+    quiz_message: str               # 3択に初めて正解したとき
+    quiz_emoji: str
+    quiz_review_message: str        # 3択に復習モードで正解したとき
+    quiz_wrong_message: str
+    clear_message: str              # クリアしたときのミナリアのひとこと
+    clear_video: str = ""
+    clear_video_autoplay: bool = False   # True: autoplay_video / False: show_video
+    clear_heading: str = "### 👉 次にやること"
+    clear_links: tuple = ()         # クリア画面のボタン ((ラベル, 行き先ページ), ...)。最後に「復習する」がつく
+    # 導入ステップ（「はじめる」を押すまで問題を出さない）。intro_html が空なら導入なし
+    intro_html: tuple = ()
+    intro_sound: str = ""
+    start_label: str = "🌱 はじめる"
+    # マイページ
+    skills: tuple = ()              # クリアしたらつくバッジ ((バッジの文, 説明), ...)
+    next_message: str = ""          # 「次にやること」（空なら title から作る）
+    recommend_message: str = ""     # 「次のおすすめ行動」（空なら title から作る）
+
+    @property
+    def page(self) -> str:
+        return f"stage{self.number}"
+
+    @property
+    def has_intro(self) -> bool:
+        return bool(self.intro_html)
+
+    def solved_key(self, index: int, step: int) -> str:
+        """ステップが1つだけなら stageN_i、複数なら stageN_i_stepK"""
+        if len(self.steps) == 1:
+            return f"stage{self.number}_{index}"
+        return f"stage{self.number}_{index}_step{step}"
+
+    def done_key(self, index: int) -> str:
+        """その問題を最後のステップまで解いたかの記録"""
+        return self.solved_key(index, len(self.steps) - 1)
+
+    def done_count(self, solved: dict, total: int) -> int:
+        return sum(1 for i in range(total) if solved.get(self.done_key(i), False))
+
+
+STAGE_DEFS = (
+    StageDef(
+        number=1,
+        title="🌱 ステージ1：ポヨンのはらっぱ",
+        name="ポヨンのはらっぱ",
+        description="""
+        ここは、ココモア王国の入口「ポヨンのはらっぱ」。  
+        地面がぽよんぽよんしていて、はじめての冒険者でも安心して歩ける場所です。  
+
+        ここでは **print** と **変数** の、いちばんやさしい魔法を練習するよ。  
+        1つの魔法ごとに「まねして書く → えらぶ → もう一度書く」という流れで進みます。
+        """,
+        steps=(
+            Step("copy", 10, next_label="▶ クイズに進む"),
+            Step("quiz", 20),
+            Step("rewrite", 20, next_label="▶ 次の問題へ"),
+        ),
+        quiz_message="バグモンスターがにこっと笑ったよ！",
+        quiz_emoji="🟢",
+        quiz_review_message="⭕ 正解！（復習モードなのでXPは変わらないよ）",
+        quiz_wrong_message="❌ ざんねん…！でも大丈夫、ここで迷うのはふつうだよ。",
+        clear_message="ミナリア：最初の一歩を踏み出せたね。本当にえらいわ。次のステージも、あなたのペースでいきましょうね。",
+        clear_video="stage1_clear.mp4",
+        clear_video_autoplay=True,
+        clear_links=(
+            ("🌿 ステージ2へ進む", "stage2"),
+            ("📊 マイページで成果を見る", "mypage"),
+            ("🏠 タイトルにもどる", "home"),
+        ),
+        intro_html=(
+            # ✅ 10秒でわかる：プログラム／実行／変数（生活語）
+            """
+        <div style="
+          background:#EEF7FF;
+          padding:14px 16px;
+          border-radius:14px;
+          border:1px solid #CFE6FF;
+          color:#1F2A37;
+          font-size:15px;
+          line-height:1.8;
+          margin-top:6px;
+        ">
+          <b style="font-size:16px;">⏱ 10秒でわかる3つ</b><br>
+          ✅ <b>プログラム</b>：パソコンへの「お願いメモ」<br>
+          ✅ <b>実行</b>：そのお願いを「いまやってもらう」こと<br>
+          ✅ <b>変数</b>：あとで使うための「名前つきの箱」<br>
+          <span style="font-size:12px; color:#4B5563;">
+            ※ この3つがわかると、仕事の“確認・整理”が速くなります
+          </span>
+        </div>
+        """,
+            # 📌 ミナリアの一言（printの不安を消す）
+            """
+        <div style="
+          background:#FFF4D6;
+          padding:16px 18px;
+          border-radius:14px;
+          border-left:6px solid #E6A800;
+          color:#1F2A37;
+          font-size:16px;
+          line-height:1.8;
+        ">
+          <b style="font-size:17px;">📌 ミナリアからのひとこと</b><br><br>
+          print はね、<br>
+          <span style="font-weight:700; color:#0F172A;">
+            「作業の途中経過を画面に出すメモ」
+          </span>
+          みたいなものよ。<br>
+          これができると、エラーで迷子になりにくくなるの。
+        </div>
+        """,
+        ),
+        intro_sound="sounds/minaria_Poyon.mp3",
+        skills=(
+            ("画面に出せた（print）", "print＝途中経過を見てミスを減らす"),
+            ("箱に入れられた（変数）", "変数＝値をまとめて使い回す"),
+        ),
+        next_message="🌱 ステージ1を続けましょう（まずは「画面に出す」ところまで）",
+        recommend_message="🌱 まずは **ステージ1** を終わらせてみよう。print と 変数の魔法を完成させようね。",
+    ),
+    StageDef(
+        number=2,
+        title="🌿 ステージ2：もりねむの小道",
+        name="もりねむの小道",
+        description="""
+    ここは、少しだけ奥に進んだ「もりねむの小道」。  
+    木々がゆらゆら揺れていて、「行こうかな、どうしようかな」と迷っているように見える場所です。  
+
+    ここでは **if文** の魔法を練習します。  
+    条件によって、やることを変えられる「分かれ道の魔法」だよ。  
+    3つの選択肢から、正しそうなものを選んでね。
+    """,
+        steps=(Step("quiz", 25),),
+        quiz_message="⭕ 正解！バグモンスターが、ほっとした顔で森の奥へ帰っていったよ。",
+        quiz_emoji="🌳",
+        quiz_review_message="⭕ 正解！森のバグモンスターがほっとした顔で帰っていったよ。（復習モードなのでXPは変わらないよ）",
+        quiz_wrong_message="❌ ざんねん…！でも大丈夫、ここで迷うのは当たり前なの。",
+        clear_message="ミナリア：条件で動きを変える魔法、だいぶわかってきたみたいね。とっても素敵よ。",
+        clear_video="stage2_clear.mp4",
+        clear_links=(
+            ("🌀 ステージ3へ進む", "stage3"),
+            ("🏠 タイトルにもどる", "home"),
+        ),
+        skills=(("条件で分けられた（if）", "if＝条件でチェックを分ける"),),
+        next_message="🌿 次はステージ2へ進みましょう（if：『もし〜なら』の分かれ道）",
+        recommend_message="🌿 次は **ステージ2** だよ。条件分岐の if 文をいっしょに練習しよう。",
+    ),
+    StageDef(
+        number=3,
+        title="🌀 ステージ3：くるくるループの塔",
+        name="くるくるループの塔",
+        description="""
+    ここは、同じ階段をぐるぐる回ってしまう「くるくるループの塔」。  
+    まよっているバグモンスターたちに、**for文** の魔法で「何回くり返すか」を教えてあげよう。  
+
+    3つの選択肢から、正しそうなコードを選んでね。
+    """,
+        steps=(Step("quiz", 30),),
+        quiz_message="⭕ 正解！高い塔の階段も、スイスイのぼれるようになってきたよ！",
+        quiz_emoji="🗼",
+        quiz_review_message=(
+            "⭕ 正解！塔の階段をスイスイのぼっていけるようになったよ。"
+            "（復習モードなのでXPは変わらないよ）"
+        ),
+        quiz_wrong_message="❌ ざんねん…！でも大丈夫、くり返しは少しずつ慣れていけばいいのよ。",
+        clear_message=(
+            "ミナリア：くり返しの魔法まで身についたなんて、本当にすごいわ。"
+            "これで基礎の魔法はばっちりね。"
+        ),
+        clear_video="stage3_clear.mp4",
+        clear_heading="### 👉 次にやること（1つえらんでね）",
+        clear_links=(
+            ("📊 マイページで成果を見る", "mypage"),
+            ("🏠 タイトルにもどる", "home"),
+        ),
+        skills=(("くり返せた（for）", "for＝一覧を順番に処理する"),),
+        next_message="🌀 次はステージ3へ進みましょう（for：くり返しの魔法）",
+        recommend_message=(
+            "🌀 ここまで来たら **ステージ3** にチャレンジ！for 文のくり返しが使えると、一気にできることが増えるよ。"
+        ),
+    ),
+)
+
+# 番号・ページ名 → StageDef（ステージがいくつあっても引くのは dict 1回）
+_BY_NUMBER = {stage.number: stage for stage in STAGE_DEFS}
+_BY_PAGE = {stage.page: stage for stage in STAGE_DEFS}
+
+
+def get_stage(number: int) -> StageDef:
+    return _BY_NUMBER[number]
+
+
+def stage_for_page(page: str):
+    """ステージのページなら StageDef、ほかのページなら None"""
+    return _BY_PAGE.get(page)
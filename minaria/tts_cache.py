@@ -0,0 +1,159 @@
+"""
+speak_minaria 用のディスクキャッシュ（言い換え文 ＋ 音声）
+
+speak_minaria は「言い換え（gpt-4o-mini）→ 音声化（TTS）」で毎回2回 API を呼ぶ。
+同じヒント文なら結果も同じなので、
+  (バックエンド, 元の文, 言い換えモデル, プロンプト, TTSモデル, 声)
+をキーにして、言い換え文と音声をディスクに保存しておく。
+2回目からは API を呼ばずにすぐ再生できる。
+
+容量には上限があり、超えたら「いちばん長く使われていないもの」から消す。
+
+環境変数
+  MINARIA_TTS_CACHE_DIR  保存先（既定 .cache/tts）
+  MINARIA_TTS_CACHE_MB   上限（既定 200MB）
+"""
+import hashlib
+import json
+import os
+import pathlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent
+CACHE_DIR = pathlib.Path(os.getenv("MINARIA_TTS_CACHE_DIR", BASE_DIR / ".cache" / "tts"))
+MAX_BYTES = int(os.getenv("MINARIA_TTS_CACHE_MB", "200")) * 1024 * 1024
+
+
+class CachedSpeech(NamedTuple):
+    rewrite: str   # ミナリア風に言い換えた文
+    audio: bytes
+    mime: str
+
+
+def tts_cache_key(text: str, rewrite_model: str, prompt: str, tts_model: str, voice: str,
+                  provider: str = "openai") -> str:
+    """結果を左右するものを全部まとめたキー（ダミーの音声が本物と混ざらないよう、バックエンド名も入れる）"""
+    raw = json.dumps([provider, text, rewrite_model, prompt, tts_model, voice], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    1件 = <key>.audio（音声）＋ <key>.json（言い換え文など）の2ファイル。
+    .json は音声を書き終えてから置くので、.json があれば完成している。
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.dir = pathlib.Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> バイト数（古い順）
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._scan()
+
+    def _paths(self, key: str):
+        return self.dir / f"{key}.audio", self.dir / f"{key}.json"
+
+    def _scan(self) -> None:
+        """起動時に1回だけ、ディスクにあるものを最終使用時刻の順に並べる"""
+        if not self.dir.exists():
+            return
+        entries = []
+        for meta in self.dir.glob("*.json"):
+            audio = meta.with_suffix(".audio")
+            try:
+                size = audio.stat().st_size + meta.stat().st_size
+                entries.append((meta.stat().st_mtime, meta.stem, size))
+            except FileNotFoundError:
+                continue
+        for _mtime, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+
+    def get(self, key: str):
+        """あれば CachedSpeech、なければ None"""
+        audio_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            audio = audio_path.read_bytes()
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                size = self._index.pop(key, None)
+                if size is not None:
+                    self._bytes -= size
+            return None
+
+        now = time.time()
+        try:
+            os.utime(meta_path, (now, now))  # 最終使用時刻（LRU 用）
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if key in self._index:
+                self._index.move_to_end(key)
+        return CachedSpeech(rewrite=meta.get("rewrite", ""), audio=audio, mime=meta.get("mime", "audio/mp3"))
+
+    def put(self, key: str, speech: CachedSpeech) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        audio_path, meta_path = self._paths(key)
+        meta = json.dumps({"rewrite": speech.rewrite, "mime": speech.mime, "created": time.time()}, ensure_ascii=False)
+
+        for path, data in ((audio_path, speech.audio), (meta_path, meta.encode("utf-8"))):
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+        size = len(speech.audio) + len(meta.encode("utf-8"))
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._bytes -= old
+            self._index[key] = size
+            self._bytes += size
+            victims = []
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                victim, victim_size = self._index.popitem(last=False)
+                self._bytes -= victim_size
+                self.evictions += 1
+                victims.append(victim)
+
+        for victim in victims:
+            for path in self._paths(victim):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+# ======================================================
+#  プロセス全体で1つだけのキャッシュ
+# ======================================================
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTSCache()
+    return _cache
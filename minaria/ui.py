@@ -0,0 +1,507 @@
+"""
+どのページからも使う画面の部品（音・動画・XP・進みぐあいの保存など）
+
+これまでは minaria_app.py の中にあり、ページのコードといっしょにリランのたびに読まれていた。
+ページごとのモジュール（minaria/pages/）からも使えるように、ここにまとめる。
+セッションは st.session_state の LearnerSession（current_session()）。
+"""
+import base64
+import functools
+import json
+import os
+import pathlib
+import re
+import time
+import uuid
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from minaria.assets import asset_exists, get_asset_manifest  # アセット一覧（起動時に1回だけ調べる）
+from minaria.bgm_component import bgm_player  # リランしても止まらないBGM
+from minaria.media_cache import get_media_cache  # 音・動画の base64 キャッシュ
+from minaria.media_server import blob_url, is_server_mode as is_media_server_mode, media_url
+from minaria.metrics import get_metrics  # 部品ごとのリランの秒数（ui.*）
+from minaria.progress_store import default_progress, get_progress_writer, load_progress as load_saved_progress  # 学習者ごとの進みぐあい（SQLite）
+from minaria.providers import get_provider  # OpenAI / ローカルのダミー（MINARIA_PROVIDER）
+from minaria.renditions import resolve_audio, resolve_video, resolve_video_file  # 軽量版（python -m minaria.build ...）
+from minaria.session import get_session  # セッションの状態（LearnerSession）
+from minaria.tts_cache import CachedSpeech, get_tts_cache, tts_cache_key  # ボイスのディスクキャッシュ
+from minaria.voice_stream import stream_speech  # しゃべり出しの早いボイス
+
+
+def current_session():
+    """このセッションの LearnerSession"""
+    return get_session(st.session_state)
+
+
+# ======================================================
+#  ミナリアボイス関数
+# ======================================================
+# 言い換え・音声化の設定（キャッシュのキーにも入る）
+MINARIA_REWRITE_MODEL = "gpt-4o-mini"
+MINARIA_VOICE_PROMPT = "あなたは優しく包容力のある女性『ミナリア』として話してください。短く柔らかく言い換えてください。"
+MINARIA_TTS_MODEL = "gpt-4o-mini-tts"
+MINARIA_TTS_VOICE = "alloy"
+
+# 1文できたところから順にしゃべり出す（0 にすると全部そろってから再生）
+MINARIA_TTS_STREAMING = os.getenv("MINARIA_TTS_STREAMING", "1") != "0"
+
+def speak_minaria(text: str, stream: bool = MINARIA_TTS_STREAMING):
+    # APIキーがないときは声なし（文字のヒントはそのまま出ている）
+    provider = get_provider()
+    if provider is None:
+        return
+
+    # 同じセリフは API を呼ばずにディスクキャッシュから再生する
+    cache = get_tts_cache()
+    key = tts_cache_key(
+        text, MINARIA_REWRITE_MODEL, MINARIA_VOICE_PROMPT, MINARIA_TTS_MODEL, MINARIA_TTS_VOICE, provider.name
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        autoplay_audio(cached.audio, mime=cached.mime)
+        return
+
+    try:
+        if stream:
+            # 言い換えをストリームで受け取り、1文ずつ音声化してブラウザのキューに積む
+            utterance = uuid.uuid4().hex
+            speech, _first_audio_sec = stream_speech(
+                provider,
+                text,
+                rewrite_model=MINARIA_REWRITE_MODEL,
+                prompt=MINARIA_VOICE_PROMPT,
+                tts_model=MINARIA_TTS_MODEL,
+                voice=MINARIA_TTS_VOICE,
+                on_audio=lambda audio, mime: enqueue_voice(audio, mime, utterance),
+            )
+            cache.put(key, speech)
+            return
+
+        # ① ミナリア風のセリフに変換
+        rewrite = provider.complete_text(
+            MINARIA_REWRITE_MODEL,
+            [
+                {"role": "system", "content": MINARIA_VOICE_PROMPT},
+                {"role": "user", "content": text}
+            ]
+        )
+
+        # ② TTS で音声化（ここには説明文を渡さない）
+        audio_bytes = provider.synthesize(rewrite, MINARIA_TTS_MODEL, MINARIA_TTS_VOICE)
+        cache.put(key, CachedSpeech(rewrite=rewrite, audio=audio_bytes, mime=provider.audio_mime))
+        autoplay_audio(audio_bytes, mime=provider.audio_mime)
+
+    except Exception as e:
+        st.warning(f"音声生成でエラーが発生しました: {e}")
+
+# ======================================================
+#  メディアの src（data: URI か、メディアサーバーの URL）
+# ======================================================
+BASE_DIR = pathlib.Path(__file__).resolve().parent.parent  # アセットはリポジトリの直下
+
+# 全アセットのサイズ・ハッシュをプロセス起動時に1回だけ調べておく
+# （足りないファイルは python -m minaria.assets で確認できる）
+get_asset_manifest()
+
+def media_src(path, mime: str) -> str:
+    """
+    <audio> / <video> の src に書く文字列を返す。
+    MINARIA_MEDIA_MODE=server なら URL（ブラウザにキャッシュされる）、
+    それ以外は従来どおり base64 の data: URI。
+    """
+    if is_media_server_mode():
+        return media_url(path)
+    return f"data:{mime};base64,{get_media_cache().get_b64(path)}"
+
+
+def audio_sources(path) -> list:
+    """
+    音声の (src, MIMEタイプ) 候補を返す（軽量版 → 元の mp3 の順）。
+    data: URI は候補の数だけ送られてしまうので、inline では
+    どのブラウザでも鳴る1本（AAC、なければ mp3）に絞る。
+    """
+    candidates = resolve_audio(path)
+    if not is_media_server_mode():
+        candidates = [c for c in candidates if c[1] == "audio/mp4"][:1] or candidates[-1:]
+    return [(media_src(BASE_DIR / p, mime), mime) for p, mime in candidates]
+
+
+# ======================================================
+#  自動音声の関数
+# ======================================================
+def autoplay_audio(audio_bytes: bytes, mime: str = "audio/mp3"):
+    """
+    再生ボタンなしで自動再生を試みるためのHTMLを埋め込む。
+    ※ブラウザの自動再生ポリシーによりブロックされる場合あり
+    """
+    if is_media_server_mode():
+        src = blob_url(audio_bytes, mime)
+    else:
+        b64 = base64.b64encode(audio_bytes).decode("utf-8")
+        src = f"data:{mime};base64,{b64}"
+    _autoplay_audio_sources([(src, mime)])
+
+
+def enqueue_voice(audio_bytes: bytes, mime: str, utterance: str):
+    """
+    ストリーミングで届いた1文ぶんの音声を、ブラウザ側のキューに積んで順番に再生する。
+    （<audio autoplay> を並べると全部同時に鳴ってしまうため）
+    キューは親ページ（window.parent）に置くので、iframe が消えても再生は続く。
+    別のセリフ（utterance）が来たら、前のセリフは止めて入れ替える。
+    """
+    if is_media_server_mode():
+        src = blob_url(audio_bytes, mime)
+    else:
+        src = f"data:{mime};base64,{base64.b64encode(audio_bytes).decode('utf-8')}"
+
+    components.html(
+        f"""
+        <script>
+        (function () {{
+            const w = window.parent;
+            const q = w.__minariaVoice || (w.__minariaVoice = {{ queue: [], current: null, utterance: null }});
+            if (q.utterance !== {json.dumps(utterance)}) {{
+                if (q.current) q.current.pause();
+                q.queue = [];
+                q.current = null;
+                q.utterance = {json.dumps(utterance)};
+            }}
+            q.queue.push({json.dumps(src)});
+            function next() {{
+                if (q.current || !q.queue.length) return;
+                const audio = new w.Audio(q.queue.shift());
+                q.current = audio;
+                audio.onended = audio.onerror = () => {{ q.current = null; next(); }};
+                audio.play().catch(() => {{ q.current = null; next(); }});
+            }}
+            next();
+        }})();
+        </script>
+        """,
+        height=0,
+    )
+
+
+def _source_tags(sources) -> str:
+    return "\n".join(f'<source src="{src}" type="{mime}">' for src, mime in sources)
+
+
+def _autoplay_audio_sources(sources):
+    """(src, mime) の候補を指定して autoplay_audio と同じ HTML を埋め込む"""
+    html = f"""
+    <audio autoplay>
+        {_source_tags(sources)}
+        Your browser does not support the audio element.
+    </audio>
+    """
+    st.markdown(html, unsafe_allow_html=True)
+
+
+# ======================================================
+#  音の関数
+# ======================================================
+def play_sound(path: str):
+    sound_path = BASE_DIR / path
+
+    if not asset_exists(path):
+        st.warning(f"音声ファイルが見つかりません: {sound_path}")
+        return
+
+    # 毎回エンコードせず、キャッシュ（または URL）を使う。軽量版があればそちら
+    sources = audio_sources(sound_path)
+
+    st.markdown(f"""
+        <audio id="minaria_sound">{_source_tags(sources)}</audio>
+        <script>
+            // Streamlit が DOM を描画し終わった後に確実に実行
+            window.addEventListener("load", () => {{
+                setTimeout(() => {{
+                    const audio = document.getElementById("minaria_sound");
+                    if (audio) audio.play();
+                }}, 150);  // ← 150ms 遅延が安定動作のコツ
+            }});
+        </script>
+    """, unsafe_allow_html=True)
+
+
+    # 再生ボタンなし・自動再生を試みる
+    _autoplay_audio_sources(sources)
+
+# ======================================================
+#  BGMの関数（ユーザー指定音量つき）
+# ======================================================
+def autoplay_bgm(path: str, volume: float = 0.5):
+    """
+    BGM をページに関係なく流し続ける。
+    コンポーネントの iframe はリランしても残るので、音源は最初の1回だけ送り、
+    あとは音量だけが届く（クリックのたびに曲が頭から鳴り直さない）。
+    """
+    sound_path = BASE_DIR / path
+    if not asset_exists(path):
+        st.warning(f"音声ファイルが見つかりません: {sound_path}")
+        return
+
+    bgm_player(
+        track=path,
+        volume=volume,
+        sources_factory=lambda: audio_sources(sound_path),
+    )
+
+# ======================================================
+#  その部品だけリランする（st.fragment）
+# ======================================================
+def fragment(name: str):
+    """
+    st.fragment で包むデコレーター。部品の中のボタン・入力を使ったときは、
+    その部品の関数だけがリランする（CSS・BGM・ログイン判定・ページの分岐は動かさない）。
+    アプリ全体をリランするのは、部品の中で st.rerun() を呼んだとき（ページ・ステップを移るとき）だけ。
+    1回ぶんの秒数を ui.<name> に記録する（python -m benchmarks.bench_fragments）。
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                get_metrics().observe(f"ui.{name}", time.perf_counter() - started)
+        return st.fragment(timed)
+    return decorate
+
+# ======================================================
+#  XPファイル保存用の関数
+# ======================================================
+def autoplay_video(path: str, width: str = "70%"):
+    """ローカルの mp4 を自動再生で表示するヘルパー（軽量版があればそちらを使う）"""
+    if not asset_exists(path):
+        st.caption("※ アニメーションはまだ準備中だよ")
+        return
+
+    video = resolve_video(path)
+    sources = video["sources"]
+    poster_attr = ""
+
+    if is_media_server_mode():
+        # URL なら webm / mp4 の両方を並べても、ブラウザは1本しか取りに来ない
+        if video["poster"]:
+            poster_attr = f' poster="{media_url(video["poster"])}"'
+    else:
+        # data: URI は候補の数だけ送られてしまうので mp4 の1本だけにする
+        sources = [s for s in sources if s[1] == "video/mp4"][:1]
+
+    source_tags = "\n".join(
+        f'<source src="{media_src(BASE_DIR / p, mime)}" type="{mime}">'
+        for p, mime in sources
+    )
+
+    video_html = f"""
+    <div style='text-align: center;'>
+        <video width="{width}" autoplay loop muted playsinline{poster_attr}>
+            {source_tags}
+        </video>
+    </div>
+    """
+    st.markdown(video_html, unsafe_allow_html=True)
+
+
+def show_video(path: str):
+    """st.video で動画を出す（軽量版があればそちら、ファイルがなければ出さない）"""
+    if not asset_exists(path):
+        st.caption("※ アニメーションはまだ準備中だよ")
+        return
+    st.video(resolve_video_file(path))
+
+# ======================================================
+#  進みぐあいの永続化：学習者ごとに SQLite に保存
+# ======================================================
+# 学習者は URL の ?learner=... で見分ける（はじめての人には新しく作ってつける）
+# 保存するもの：XP・レベル・solved・stageN_index・stageN_cleared
+
+LEARNER_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+def current_learner_id() -> str:
+    """URL の ?learner= を読む。なければ（おかしな値でも）新しく作って URL にのせる。"""
+    learner_id = st.query_params.get("learner", "")
+    if not LEARNER_ID_PATTERN.fullmatch(learner_id):
+        learner_id = uuid.uuid4().hex[:16]
+        st.query_params["learner"] = learner_id
+    return learner_id
+
+def load_progress() -> None:
+    """この学習者の保存データをセッションに読みこむ（セッションの最初に1回）"""
+    session = current_session()
+    try:
+        progress = load_saved_progress(session.learner_id)
+    except Exception as e:
+        st.warning(f"進みぐあいを読みこめませんでした（今回は最初からになります）: {e}")
+        progress = default_progress()
+    session.apply_progress(progress)
+    session.saved_progress = session.progress()
+
+def save_progress() -> None:
+    """
+    進みぐあいを保存する（前回から変わっていなければ何もしない）。
+    ここでは予約するだけで、ディスクへは裏のスレッドがまとめて書く（ボタンを押しても待たされない）。
+    """
+    session = current_session()
+    snapshot = session.progress()
+    if snapshot == session.saved_progress:
+        return
+    get_progress_writer().submit(session.learner_id, snapshot)
+    session.saved_progress = snapshot
+
+# ======================================================
+#  ステージ内で「いま何問目か」を表示するヘルパー
+# ======================================================
+def render_question_progress(current_index: int, total: int, label: str = "いま"):
+    """ステージ内で「いま何問目か」を表示するヘルパー"""
+    if total <= 0:
+        return
+    # 0スタートの index を 1〜total に直す
+    current = min(current_index + 1, total)
+    st.markdown(f"📘 {label} {current} / {total} 問目")
+    st.progress(current / total)
+    
+# ======================================================
+#  解答ボタンを複数回押さないようにする関数
+# ======================================================
+def one_time_button(label, key, allow_retry=False):
+    """
+    allow_retry=True のときは、その描画タイミングで毎回「未押下」にリセットする。
+    （復習モードで使うと便利）
+    """
+    session = current_session()
+    if allow_retry:
+        session.pressed.discard(key)
+
+    clicked = st.button(label, disabled=key in session.pressed)
+    if clicked:
+        session.pressed.add(key)
+    return clicked
+
+# ======================================================
+#  初回正解だけ XP を付与する共通関数（キーは呼び出し側で決める）
+# ======================================================
+def award_xp_once(key: str, xp: int, message: str, emoji: str):
+    # すでに正解している場合（やり直し・復習）
+    session = current_session()
+    if session.solved.get(key, False):
+        show_correct_feedback(
+            message="復習バッチリ！この問題は前にもクリアしているからXPは増えないよ。",
+            xp_gain=0,
+            monster_emoji=emoji,
+        )
+        return False  # 初回クリアではない
+
+    # 初回クリアの場合
+    show_correct_feedback(
+        message=message,
+        xp_gain=xp,
+        monster_emoji=emoji,
+    )
+    session.solved[key] = True
+    return True  # 初回クリア
+
+
+# ======================================================
+#  XPご褒美：称号システム
+# ======================================================
+
+TITLE_TIERS = [
+    {"xp": 0,   "name": "🌙 星空を見上げる人"},
+    {"xp": 50,  "name": "🌱 ポヨン草原のさんぽびと"},
+    {"xp": 120, "name": "💧 ちいさなバグヒーラー"},
+    {"xp": 250, "name": "🕊 ミナリアのとなり歩き"},
+    {"xp": 400, "name": "✨ 森を照らすあかり"},
+    {"xp": 600, "name": "🌈 ココモア王国のまもりびと"},
+]
+
+def get_title_by_xp(xp: int):
+    """現在XPから、今の称号と次の称号、進み具合を返す"""
+    current = TITLE_TIERS[0]
+    next_tier = None
+
+    for tier in TITLE_TIERS:
+        if xp >= tier["xp"]:
+            current = tier
+        else:
+            next_tier = tier
+            break
+
+    # 次の称号がない = カンスト
+    if not next_tier:
+        return {
+            "current_name": current["name"],
+            "current_xp": xp,
+            "next_name": None,
+            "need_xp": 0,
+            "progress_ratio": 1.0,
+        }
+
+    need = max(next_tier["xp"] - xp, 0)
+    ratio = (xp - current["xp"]) / (next_tier["xp"] - current["xp"])
+
+    return {
+        "current_name": current["name"],
+        "current_xp": xp,
+        "next_name": next_tier["name"],
+        "need_xp": need,
+        "progress_ratio": max(0.0, min(ratio, 1.0)),
+    }
+
+# ---------- レベル計算 ----------
+def update_level():
+    session = current_session()
+    session.level = max(1, session.xp // 50 + 1)
+
+# ---------- 正解表示のヘルパー関数 ----------
+def show_correct_feedback(message: str, xp_gain: int, monster_emoji: str = "👾"):
+    """
+    正解したときの共通UI＋XP加算。
+    XPが0のときはXPポップは表示しない。
+    """
+    session = current_session()
+
+    html = f"""
+    <div class="correct-box">
+        <div class="correct-box-title">
+            <span class="correct-box-monster">{monster_emoji}</span>
+            正解だよ！
+        </div>
+        <div>{message}</div>
+    </div>
+    """
+    st.markdown(html, unsafe_allow_html=True)
+
+    # ⭐ XPが0のときはポップを出さない
+    if xp_gain > 0:
+        st.markdown(f'<div class="xp-float">+{xp_gain} XP</div>', unsafe_allow_html=True)
+        play_sound("sounds/stage_clear.mp3")
+
+    # XP加算前の状態
+    old_xp = session.xp
+    old_title = get_title_by_xp(old_xp)["current_name"]
+
+    # XP加算
+    session.xp += xp_gain
+    update_level()
+    save_progress()
+
+    # NEW称号チェック（xp_gain > 0 のときだけでOK）
+    if xp_gain > 0:
+        new_title = get_title_by_xp(session.xp)["current_name"]
+        if new_title != old_title:
+            st.success(f"🌟 NEW称号 解放！ {new_title}")
+            play_sound("sounds/new_title_unlock.mp3")
+
+    session.last_xp = session.xp
+
+# ======================================================
+#  ページを移る（アプリ全体をリランする）
+# ======================================================
+def go_to(page: str):
+    session = current_session()
+    session.page = page
+    st.rerun()
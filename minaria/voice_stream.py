@@ -0,0 +1,87 @@
+"""
+speak_minaria のストリーミング版（しゃべり出しを早くする）
+
+これまでは「言い換えを全部待つ → 音声化を全部待つ → 再生」だったので、
+声が出るまでに API 2往復ぶん待っていた。ここでは
+  1. 言い換えをストリームで受け取り
+  2. 1文できた時点でその文の TTS を別スレッドで始め
+  3. できた音声から順番にブラウザへ送る
+ので、しゃべり出しまでの時間はおよそ「最初の1文ぶん」になる。
+"""
+import contextlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from minaria.tts_cache import CachedSpeech
+
+# 文の区切り（句点・感嘆符・疑問符・改行）
+_SENTENCE = re.compile(r".+?(?:[。！？!?…]+|\n+)", re.S)
+
+# 短すぎる文は次の文とまとめて1回の TTS にする
+MIN_SENTENCE_CHARS = 6
+
+# TTS は文ごとに並行して走らせる（再生順はキューで守る）
+_tts_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="minaria-tts")
+
+
+def split_sentences(buffer: str):
+    """buffer から完成した文を取り出す。(文のリスト, 残り) を返す。"""
+    sentences = []
+    pos = 0
+    pending = ""
+    for m in _SENTENCE.finditer(buffer):
+        pending += m.group(0)
+        pos = m.end()
+        if len(pending.strip()) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending.strip())
+            pending = ""
+    return sentences, pending + buffer[pos:]
+
+
+def stream_speech(provider, text: str, *, rewrite_model: str, prompt: str, tts_model: str, voice: str, on_audio):
+    """
+    言い換え → 文ごとの TTS をパイプラインで流す。
+    on_audio(audio_bytes, mime) は1文ぶんの音声ができるたびに、文の順番どおりに呼ばれる
+    （呼び出し元のスレッドで呼ぶので、中で st.* を使ってよい）。
+    戻り値はキャッシュ用の CachedSpeech（音声は全文をつなげたもの）と、
+    最初の音声を渡すまでの秒数。
+    """
+    started = time.perf_counter()
+    first_audio_at = None
+    rewrite = ""
+    buffer = ""
+    futures = []
+    chunks = []
+
+    def flush_ready(wait: bool):
+        nonlocal first_audio_at
+        # 先頭から順に、終わっているものだけ渡す（wait=True なら全部待つ）
+        while futures and (wait or futures[0].done()):
+            audio = futures.pop(0).result()
+            chunks.append(audio)
+            if first_audio_at is None:
+                first_audio_at = time.perf_counter() - started
+            on_audio(audio, provider.audio_mime)
+
+    messages = [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": text},
+    ]
+    # on_audio で止められても、言い換えのストリームはその場で閉じる
+    with contextlib.closing(provider.stream_text(rewrite_model, messages)) as deltas:
+        for delta in deltas:
+            rewrite += delta
+            buffer += delta
+            sentences, buffer = split_sentences(buffer)
+            for sentence in sentences:
+                futures.append(_tts_pool.submit(provider.synthesize, sentence, tts_model, voice))
+            flush_ready(wait=False)
+
+    if buffer.strip():
+        futures.append(_tts_pool.submit(provider.synthesize, buffer.strip(), tts_model, voice))
+    flush_ready(wait=True)
+
+    # mp3 はフレームの並びなので、そのままつなげても1本の音声として再生できる
+    speech = CachedSpeech(rewrite=rewrite, audio=b"".join(chunks), mime=provider.audio_mime)
+    return speech, first_audio_at
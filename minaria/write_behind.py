@@ -0,0 +1,106 @@
+"""
+あとからまとめて書く（write-behind）キュー
+
+正解のたび・チャットのたびに、その場（リクエストのスレッド）でディスクに書いていたので、
+ボタンを押すとディスクの書きこみぶん待たされていた。ここでは
+
+  ・submit(key, value) はキューに置くだけ（すぐ戻る）
+  ・同じ key の値は最新の1つにまとめる（何回正解しても、書くのは最後の状態だけ）
+  ・裏のスレッドが、一定時間ごと、またはたまった件数が多くなったらまとめて書く
+  ・プロセスが終わるときにも残りを書く
+  ・pending(key) は、まだ書いていない値を返す（書いている途中の値も、書き終わるまでは返す）
+
+メトリクス（minaria.metrics）
+  <name>.queue_depth   まだ書いていない件数（gauge）
+  <name>.flush         1回のまとめ書きにかかった秒数
+  <name>.flush_size    1回で書いた件数
+  <name>.flush_errors  書けなかった回数（書けなかった分は次の回にもう一度書く）
+"""
+import atexit
+import logging
+import threading
+import time
+
+from minaria.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    def __init__(self, write_batch, *, name: str, interval: float = 1.0, max_pending: int = 32):
+        """write_batch(dict[key, value]) は、まとめて書く関数（1回のトランザクションにする想定）"""
+        self.write_batch = write_batch
+        self.name = name
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._inflight = {}     # いま書いている途中の分（書き終わるまでは pending() から見える）
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"minaria-{name}-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, key, value) -> None:
+        """書く予約だけして、すぐ戻る"""
+        with self._lock:
+            self._pending[key] = value
+            depth = len(self._pending)
+        get_metrics().gauge(f"{self.name}.queue_depth", depth)
+        if depth >= self.max_pending:
+            self._wake.set()
+
+    def pending(self, key):
+        """まだ書いていない値（なければ None）。読むときはディスクよりこちらを優先する。"""
+        with self._lock:
+            value = self._pending.get(key)
+            return self._inflight.get(key) if value is None else value
+
+    def flush(self) -> int:
+        """たまっている分をいま書く。書いた件数を返す。"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            metrics = get_metrics()
+            started = time.perf_counter()
+            try:
+                self.write_batch(batch)
+            except Exception:
+                logger.exception("%s: %d 件の書きこみに失敗しました（次の回にもう一度書きます）", self.name, len(batch))
+                metrics.incr(f"{self.name}.flush_errors")
+                with self._lock:
+                    # 失敗しているあいだに新しい値が来ていたら、そちらを残す
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                    self._inflight = {}
+                    metrics.gauge(f"{self.name}.queue_depth", len(self._pending))
+                return 0
+
+            metrics.observe(f"{self.name}.flush", time.perf_counter() - started)
+            metrics.observe(f"{self.name}.flush_size", len(batch))
+            with self._lock:
+                # 書き終わってから消す（それまでに読みに来た人にも最新の値が見えるように）
+                self._inflight = {}
+                metrics.gauge(f"{self.name}.queue_depth", len(self._pending))
+            return len(batch)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """裏のスレッドを止めて、残りを全部書く（プロセス終了時にも呼ばれる）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+        self.flush()
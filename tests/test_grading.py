@@ -0,0 +1,85 @@
+"""
+答えの判定（minaria.grading）のルール
+
+書きかたのちがい（空白・クォート・比べる向き）は正解にし、意味のちがいはまちがいにする。
+"""
+import pytest
+
+from minaria.grading import ExpectedAnswer
+from minaria.progress_store import STAGES
+from minaria.question_bank import get_question_bank
+
+
+@pytest.mark.parametrize("submission, expected", [
+    ('print("Hello, world!")', True),
+    ("print('Hello, world!')", True),            # クォートちがい
+    ('print( "Hello, world!" )', True),          # 空白ちがい
+    ('  print("Hello, world!")\n', True),        # 前後の空白
+    ('print("Hello,world!")', False),            # 文字列の中身はそのまま比べる
+    ('prnt("Hello, world!")', False),
+    ('print("Hello, world!"', False),            # 文法エラー
+])
+def test_exact_answer(submission, expected):
+    assert ExpectedAnswer('print("Hello, world!")').matches(submission) is expected
+
+
+@pytest.mark.parametrize("submission, expected", [
+    ("name = 'Hanako'", True),
+    ('name = ""', False),                        # 空の文字列はだめ
+    ("name = 3", False),
+    ('nam = "Hanako"', False),                   # 変数の名前は正解どおり
+])
+def test_any_string(submission, expected):
+    answer = ExpectedAnswer('name = "Cocomoa"', rules=("any_string",))
+    assert answer.matches(submission) is expected
+
+
+@pytest.mark.parametrize("submission, expected", [
+    ("print(1 + 2)", True),
+    ("print(1.5 + 2)", True),
+    ("print(True + 2)", False),                  # True は数にしない
+    ("print('3' + 5)", False),
+    ("print(3 - 5)", False),                     # 演算子はそのまま
+])
+def test_any_number(submission, expected):
+    answer = ExpectedAnswer("print(3 + 5)", rules=("any_number",))
+    assert answer.matches(submission) is expected
+
+
+@pytest.mark.parametrize("submission, expected", [
+    ("if 80 <= score:\n    print('ok')", True),  # 左右を入れかえても同じ
+    ("if score > 80:\n    print('ok')", False),
+])
+def test_compare_order(submission, expected):
+    answer = ExpectedAnswer("if score >= 80:\n    print('ok')")
+    assert answer.matches(submission) is expected
+
+
+def test_compare_order_can_be_turned_off():
+    answer = ExpectedAnswer("if score >= 80:\n    print('ok')", rules=())
+    assert not answer.matches("if 80 <= score:\n    print('ok')")
+
+
+def test_ellipsis_matches_any_expression():
+    answer = ExpectedAnswer("print(...)")
+    assert answer.matches("print(1 + 2)")
+    assert answer.matches("print(name)")
+    assert not answer.matches("print(1, 2)")
+
+
+def test_fingerprint_ignores_formatting():
+    assert ExpectedAnswer('print("a")').fingerprint == ExpectedAnswer("print( 'a' )").fingerprint
+    assert ExpectedAnswer('print("a")').fingerprint != ExpectedAnswer('print("b")').fingerprint
+
+
+def test_unknown_rule():
+    with pytest.raises(ValueError):
+        ExpectedAnswer("x = 1", rules=("nope",))
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_bank_answers_match_themselves(stage):
+    # 問題バンクの正解（copy_sample / rewrite_answer）は、そのまま書けば正解になる
+    for answers in get_question_bank(stage).answers:
+        for answer in answers.values():
+            assert answer.matches(answer.source), answer
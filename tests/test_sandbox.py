@@ -0,0 +1,70 @@
+"""
+学習者のコードを動かすワーカー（minaria.sandbox）の閉じこめ
+
+ここにあるコードは、どれも「動かしてはいけない」か「途中で止めなければいけない」もの。
+ワーカーの AST チェックや組みこみ関数・OS の制限を変えたら、python -m pytest tests で確かめる。
+"""
+import pytest
+
+from minaria.sandbox import SandboxPool
+from minaria.sandbox_worker import resource
+
+# 動かす前に断られなければいけないコード
+ESCAPES = (
+    "import os",
+    "from os import system",
+    "print.__self__",
+    "().__class__.__base__.__subclasses__()",
+    "__import__('os')",
+    "f'{print.__self__}'",
+    '"{0.__globals__}".format(print)',
+    '"{0[__builtins__]}".format({})',
+    '"{x.__globals__}".format_map({"x": print})',
+    '"{0:{1.__class__}}".format(1, 2)',
+    's = "{0.__globals__}"\ns.format(print)',
+    'str.format("{0.__globals__}", print)',
+    "def g():\n    yield\ng().gi_frame",
+)
+
+# 使えないはずの組みこみ関数（呼ぶと NameError）
+MISSING_BUILTINS = ("open", "eval", "exec", "compile", "getattr", "input", "globals", "vars", "format")
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SandboxPool(size=1)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.parametrize("code", ESCAPES)
+def test_escape_is_rejected(pool, code):
+    result = pool.run(code)
+    assert result.error_type == "Rejected", result
+
+
+@pytest.mark.parametrize("name", MISSING_BUILTINS)
+def test_unsafe_builtin_is_missing(pool, name):
+    result = pool.run(f"{name}")
+    assert result.error_type == "NameError", result
+
+
+def test_plain_format_still_works(pool):
+    result = pool.run('print("{} と {name:>3}".format(1, name="a"))\nprint(f"{3:>2}")')
+    assert result.ok, result
+    assert result.stdout == "1 と   a\n 3\n"
+
+
+@pytest.mark.skipif(resource is None, reason="OS の制限（resource）がない環境")
+def test_infinite_loop_is_killed(pool):
+    result = pool.run("while True:\n    pass")
+    assert result.error_type == "Killed", result
+    # 止めたあとのワーカーは入れかわっていて、次のコードはふつうに動く
+    assert pool.run('print("ok")').stdout == "ok\n"
+
+
+@pytest.mark.skipif(resource is None, reason="OS の制限（resource）がない環境")
+@pytest.mark.parametrize("code", ("x = [0] * (10 ** 9)", "x = 'a' * (10 ** 10)"))
+def test_huge_allocation_is_memory_error(pool, code):
+    result = pool.run(code)
+    assert result.error_type == "MemoryError", result